@@ -1,22 +1,76 @@
-from flask import Flask, request, jsonify
-from werkzeug.utils import secure_filename
+from flask import Flask, Request, Response, request, jsonify, g
+import io
 import os
 import sys
+import time
 
 # Add ML folder to path so we can import predict.py
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ML_DIR = os.path.join(BASE_DIR, "ml")
 sys.path.append(ML_DIR)
 
-from predict import predict_image
+import metrics
+from admission import AdmissionController, Overloaded
+from batching import MicroBatcher
+from disease_info import CONTENT_TYPE as DISEASE_INFO_CONTENT_TYPE, DiseaseInfoNotFound, not_modified
+from predict import predict_image, predict_batch, prediction_cache, registry, disease_index, disease_info_for, cascade_policy
+from plot_predict import FRAMED_CONTENT_TYPE, BatchRequestError, parse_framed, parse_multipart, predict_plot
+from profiling import Profiler
+from tiling import options_from_params, predict_tiles
+
+class InMemoryRequest(Request):
+    # Werkzeug spools uploads over 500KB to a temporary file; keep them in memory
+    # instead (bounded by MAX_CONTENT_LENGTH) so the upload path never touches disk
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
 
 app = Flask(__name__)
+app.request_class = InMemoryRequest
+
+# Concurrent uploads for the same crop share one forward pass
+# (tune with BATCH_MAX_SIZE / BATCH_MAX_WAIT_MS)
+batcher = MicroBatcher.from_env(predict_batch)
+
+# Bounded inference pool: fast 429/503 instead of timeouts under overload
+# (tune with MAX_IN_FLIGHT / MAX_QUEUE)
+admission = AdmissionController.from_env()
+metrics.register_collector(admission.collect_metrics)
+
+# Opt-in profiling of live requests (PROFILING_ENABLED / PROFILE_SAMPLE_RATE, see profiling.py)
+profiler = Profiler.from_env()
 
-# Where uploaded images will be temporarily saved
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Pre-warm crop models (MODEL_PREWARM), evicted LRU under MODEL_BUDGET_MB
+registry.prewarm_from_env()
+
+# Uploads are decoded in memory, nothing is written to disk
 app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10MB limit
+# Multi-image uploads get a larger limit of their own
+BATCH_MAX_CONTENT_LENGTH = int(os.environ.get("BATCH_MAX_CONTENT_LENGTH", str(50 * 1024 * 1024)))
+
+@app.before_request
+def start_timer():
+    g.timings = {}
+    g.started = time.perf_counter()
+
+@app.after_request
+def add_timings(response):
+    # Per-request latency breakdown, visible in browser dev tools and access logs
+    timings = dict(getattr(g, "timings", {}))
+    if hasattr(g, "started"):
+        timings["total"] = (time.perf_counter() - g.started) * 1000
+        if request.url_rule is not None and request.endpoint != "metrics_route":
+            metrics.HTTP_REQUEST_SECONDS.observe(timings["total"] / 1000, endpoint=request.url_rule.rule)
+    if timings:
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={duration:.1f}" for name, duration in timings.items()
+        )
+    if getattr(g, "profile", None) is not None and g.profile.name:
+        response.headers["X-Profile-File"] = g.profile.name
+    return response
+
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    return jsonify(e.to_dict()), e.status, {"Retry-After": str(e.retry_after)}
 
 @app.route("/api/predict/tomato", methods=["POST"])
 def predict_tomato():
@@ -27,24 +81,146 @@ def predict_tomato():
     if file.filename == "":
         return jsonify({"error": "Empty filename"}), 400
 
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(file_path)
+    started = time.perf_counter()
+    image_bytes = file.read()
+    g.timings["upload"] = (time.perf_counter() - started) * 1000
+    metrics.observe_stage("upload", g.timings["upload"] / 1000)
 
     try:
-        disease, confidence = predict_image(file_path)
+        started = time.perf_counter()
+        g.profile = profiler.claim("tomato", request.headers.get("X-Profile"), request.headers.get("X-Profile-Token"))
+        if g.profile is not None:
+            # Unbatched and uncached, so the forward pass runs on the profiled thread
+            result = admission.call(g.profile.run, predict_image, image_bytes, crop="tomato", use_cache=False)
+        else:
+            result = admission.call(predict_image, image_bytes, crop="tomato", batcher=batcher)
+        g.timings["predict"] = (time.perf_counter() - started) * 1000
+        if "error" in result:
+            # 413 / 400 for oversized or undecodable images
+            return jsonify(result), result.get("status", 500)
         response = {
-            "disease": disease,
-            "confidence": confidence / 100  # send as 0-1
+            "disease": result["disease"],
+            "confidence": result["confidence"] / 100  # send as 0-1
         }
+        if request.args.get("includeInfo", "0") not in ("0", "false", ""):
+            response["diseaseInfo"] = disease_info_for("tomato", result["disease"], request.args.get("lang"))
+    except Overloaded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        # Remove uploaded file after prediction
-        if os.path.exists(file_path):
-            os.remove(file_path)
 
+    app.logger.info(
+        "predict tomato: %d bytes, upload %.1f ms, predict %.1f ms",
+        len(image_bytes), g.timings["upload"], g.timings["predict"]
+    )
     return jsonify(response)
 
+@app.route("/api/predict/batch", methods=["POST"])
+def predict_plot_batch():
+    # Many leaves from one plot: multipart "images" or the binary framing (see plot_predict.py)
+    request.max_content_length = BATCH_MAX_CONTENT_LENGTH
+
+    started = time.perf_counter()
+    try:
+        if request.mimetype == FRAMED_CONTENT_TYPE:
+            items = parse_framed(request.get_data(), default_crop=request.args.get("crop"))
+        else:
+            items = parse_multipart(request.files, request.form, default_crop=request.args.get("crop"))
+    except BatchRequestError as e:
+        return jsonify({"error": str(e)}), 400
+    g.timings["upload"] = (time.perf_counter() - started) * 1000
+    metrics.observe_stage("upload", g.timings["upload"] / 1000)
+
+    try:
+        started = time.perf_counter()
+        g.profile = profiler.claim("batch", request.headers.get("X-Profile"), request.headers.get("X-Profile-Token"))
+        if g.profile is not None:
+            response = admission.call(g.profile.run, predict_plot, items)
+        else:
+            response = admission.call(predict_plot, items)
+        g.timings["predict"] = (time.perf_counter() - started) * 1000
+    except BatchRequestError as e:
+        return jsonify({"error": str(e)}), 400
+    except Overloaded:
+        raise
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    app.logger.info(
+        "predict batch: %d images, upload %.1f ms, predict %.1f ms",
+        len(items), g.timings["upload"], g.timings["predict"]
+    )
+    return jsonify(response)
+
+@app.route("/api/predict/tiled", methods=["POST"])
+def predict_tiled():
+    # One large field / drone photo scored tile by tile; ?crop=&stride= (see tiling.py)
+    request.max_content_length = BATCH_MAX_CONTENT_LENGTH
+    if "image" not in request.files:
+        return jsonify({"error": "No image provided"}), 400
+    try:
+        options = options_from_params({**request.args.to_dict(), **request.form.to_dict()})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    started = time.perf_counter()
+    image_bytes = request.files["image"].read()
+    g.timings["upload"] = (time.perf_counter() - started) * 1000
+    metrics.observe_stage("upload", g.timings["upload"] / 1000)
+
+    started = time.perf_counter()
+    result = admission.call(predict_tiles, image_bytes, **options)
+    g.timings["predict"] = (time.perf_counter() - started) * 1000
+    if "error" in result:
+        return jsonify(result), result.get("status", 500)
+    return jsonify(result)
+
+@app.route("/api/predict/stats", methods=["GET"])
+def predict_stats():
+    return jsonify({
+        "batching": batcher.stats(),
+        "models": registry.stats(),
+        "cache": prediction_cache.stats(),
+        "admission": admission.stats(),
+        "diseaseInfo": disease_index.stats(),
+        "cascade": cascade_policy.stats()
+    })
+
+@app.route("/api/disease-info/<crop>/<disease>", methods=["GET"])
+def disease_info_route(crop, disease):
+    try:
+        entry = disease_index.lookup(crop, disease, request.args.get("lang", "en"))
+    except DiseaseInfoNotFound as e:
+        return jsonify(e.payload), 404
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if not_modified(request.headers.get("If-None-Match"), entry.etag):
+        return Response(status=304, headers=headers)
+    return Response(entry.body, content_type=DISEASE_INFO_CONTENT_TYPE, headers=headers)
+
+@app.route("/api/disease-info", methods=["GET"])
+def disease_info_crops():
+    return jsonify({"crops": disease_index.crops()})
+
+@app.route("/admin/profile", methods=["GET", "POST"])
+def profile_admin():
+    # {"requests": N, "tfTrace": true} profiles the next N prediction requests
+    if not profiler.enabled:
+        return jsonify({"error": "Not found"}), 404
+    if not profiler.authorized(request.headers.get("X-Profile-Token")):
+        return jsonify({"error": "Forbidden"}), 403
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        try:
+            return jsonify(profiler.arm(data.get("requests", 1), data.get("tfTrace", False)))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(profiler.status())
+
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Development server only (FLASK_DEBUG=1 turns on the debugger); serve
+    # production traffic through ml/async_server.py or ml/prefork.py
+    app.run(host="0.0.0.0", port=5000, debug=os.environ.get("FLASK_DEBUG") == "1")
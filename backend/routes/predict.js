@@ -44,13 +44,181 @@ router.post("/:crop", upload.single("image"), async (req, res) => {
     }
 
     const imgPath = path.resolve(req.file.path);
+    const lang = req.query.lang || "en";
 
-    // Spawn Python process (ml folder is in root, not backend)
-    const mlScriptPath = path.join(__dirname, "../../ml/predict.py");
-    const pythonProcess = spawn("python", [
-      mlScriptPath, 
+    let parsedResult;
+    try {
+      parsedResult = await runPrediction(imgPath, cropNormalized, lang);
+    } finally {
+      // Delete uploaded file after prediction
+      fs.unlink(imgPath, () => {});
+    }
+
+    if (parsedResult.error) {
+      return res.status(500).json({ error: "Prediction failed", details: parsedResult.error });
+    }
+
+    // Capitalize crop name properly (handle names with underscores)
+    const capitalizedCrop = cropNormalized
+      .split('_')
+      .map((word, index) => {
+        // Only capitalize the first word, keep rest as is (for names like "Cherry_(including_sour)")
+        if (index === 0) {
+          return word.charAt(0).toUpperCase() + word.slice(1);
+        }
+        return word;
+      })
+      .join('_');
+
+    console.log(`🔬 ML Prediction - Crop: "${cropNormalized}" → "${capitalizedCrop}", Disease: "${parsedResult.disease}"`);
+
+    // The Python side returns the disease info with the prediction (ml/disease_info.py);
+    // only an older predict.py needs the extra lookup
+    const { diseaseInfo: bundledInfo, ...prediction } = parsedResult;
+    const diseaseInfo = bundledInfo || await fetchDiseaseInfo(
+      capitalizedCrop,
+      prediction.disease,
+      lang
+    );
+
+    // Combine prediction result with disease info
+    const response = {
+      ...prediction,
+      ...diseaseInfo
+    };
+
+    // Log activity (optional - only if user is authenticated)
+    const userId = await getUserIdFromRequest(req);
+    console.log('🔬 Disease detection - userId extracted:', userId);
+    if (userId) {
+      const loggedActivity = await logActivity(userId, {
+        activityType: 'disease-detection',
+        title: `Disease Detection - ${capitalizedCrop}`,
+        description: `Detected ${parsedResult.disease} in ${capitalizedCrop} with ${parsedResult.confidence || 'N/A'}% confidence`,
+        status: parsedResult.disease === 'Healthy' ? 'completed' : 'completed',
+        result: parsedResult.disease === 'Healthy' ? 'Crop is healthy' : `Disease detected: ${parsedResult.disease}`,
+        metadata: { crop: capitalizedCrop, disease: parsedResult.disease, confidence: parsedResult.confidence }
+      });
+      console.log('🔬 Disease detection activity logged:', loggedActivity ? 'Success' : 'Failed');
+    } else {
+      console.log('⚠️ Disease detection - No userId found, skipping activity log');
+    }
+
+    res.json(response);
+  } catch (err) {
+    console.error("Error:", err);
+    res.status(500).json({ error: "Internal server error" });
+  }
+});
+
+// ---------------------------------------------------------------------------
+// Python inference daemon
+//
+// `python ml/predict.py --daemon` keeps every crop model loaded and answers
+// JSON-lines requests on stdin/stdout, so uploads no longer pay for importing
+// TensorFlow and loading the .h5 model each time. Set ML_DAEMON=0 to fall back
+// to the one-shot CLI (one Python process per prediction).
+// ---------------------------------------------------------------------------
+const ML_SCRIPT_PATH = path.join(__dirname, "../../ml/predict.py");
+const PYTHON_BIN = process.env.PYTHON_BIN || "python";
+const USE_DAEMON = process.env.ML_DAEMON !== "0";
+const DAEMON_TIMEOUT_MS = parseInt(process.env.ML_DAEMON_TIMEOUT_MS || "60000", 10);
+
+let daemon = null;
+
+function startDaemon() {
+  const proc = spawn(PYTHON_BIN, [ML_SCRIPT_PATH, "--daemon"]);
+  const state = { proc, nextId: 1, pending: new Map(), buffer: "", ready: null };
+
+  state.ready = new Promise((resolve, reject) => {
+    state.onReady = resolve;
+    state.onFail = reject;
+  });
+
+  proc.stdout.on("data", (data) => {
+    state.buffer += data.toString();
+    let newline;
+    while ((newline = state.buffer.indexOf("\n")) !== -1) {
+      const line = state.buffer.slice(0, newline).trim();
+      state.buffer = state.buffer.slice(newline + 1);
+      if (!line) continue;
+
+      let message;
+      try {
+        message = JSON.parse(line);
+      } catch (err) {
+        console.error("ML daemon sent invalid JSON:", line);
+        continue;
+      }
+
+      if (message.ready) {
+        console.log("✅ ML daemon ready, crops loaded:", (message.crops || []).join(", "));
+        state.onReady();
+        continue;
+      }
+
+      const waiter = state.pending.get(message.id);
+      if (waiter) {
+        state.pending.delete(message.id);
+        clearTimeout(waiter.timer);
+        delete message.id;
+        waiter.resolve(message);
+      }
+    }
+  });
+
+  proc.stderr.on("data", (data) => {
+    console.error("ML daemon stderr:", data.toString());
+  });
+
+  proc.on("error", (err) => {
+    console.error("❌ Failed to start ML daemon:", err.message);
+  });
+
+  proc.stdin.on("error", (err) => {
+    console.error("ML daemon stdin error:", err.message);
+  });
+
+  proc.on("close", (code) => {
+    console.error(`❌ ML daemon exited with code ${code}`);
+    state.onFail(new Error("ML daemon exited"));
+    for (const waiter of state.pending.values()) {
+      clearTimeout(waiter.timer);
+      waiter.reject(new Error("ML daemon exited"));
+    }
+    state.pending.clear();
+    if (daemon === state) daemon = null;
+  });
+
+  return state;
+}
+
+async function predictWithDaemon(imgPath, crop, lang) {
+  if (!daemon) daemon = startDaemon();
+  const state = daemon;
+  await state.ready;
+
+  return new Promise((resolve, reject) => {
+    const id = state.nextId++;
+    const timer = setTimeout(() => {
+      state.pending.delete(id);
+      reject(new Error("ML daemon timed out"));
+    }, DAEMON_TIMEOUT_MS);
+
+    state.pending.set(id, { resolve, reject, timer });
+    state.proc.stdin.write(JSON.stringify({ id, image: imgPath, crop, includeInfo: true, lang }) + "\n");
+  });
+}
+
+// One-shot CLI: spawn a fresh Python process for this prediction
+function predictWithProcess(imgPath, crop, lang) {
+  return new Promise((resolve) => {
+    const pythonProcess = spawn(PYTHON_BIN, [
+      ML_SCRIPT_PATH,
       "--image", imgPath,
-      "--crop", cropNormalized
+      "--crop", crop,
+      "--with-info",
+      "--lang", lang
     ]);
 
     let result = "";
@@ -64,76 +232,30 @@ router.post("/:crop", upload.single("image"), async (req, res) => {
       errorOutput += data.toString();
     });
 
-    pythonProcess.on("close", async (code) => {
-      // Delete uploaded file after prediction
-      fs.unlinkSync(imgPath);
-
+    pythonProcess.on("close", (code) => {
       if (errorOutput) console.error("Python stderr:", errorOutput);
 
-      if (code !== 0) {
-        return res.status(500).json({ error: "Prediction failed", details: errorOutput });
-      }
-
       try {
-        const parsedResult = JSON.parse(result);
-        
-        // Fetch detailed disease information from database
-        const lang = req.query.lang || "en";
-        
-        // Capitalize crop name properly (handle names with underscores)
-        const capitalizedCrop = cropNormalized
-          .split('_')
-          .map((word, index) => {
-            // Only capitalize the first word, keep rest as is (for names like "Cherry_(including_sour)")
-            if (index === 0) {
-              return word.charAt(0).toUpperCase() + word.slice(1);
-            }
-            return word;
-          })
-          .join('_');
-
-        console.log(`🔬 ML Prediction - Crop: "${cropNormalized}" → "${capitalizedCrop}", Disease: "${parsedResult.disease}"`);
-        
-        const diseaseInfo = await fetchDiseaseInfo(
-          capitalizedCrop, 
-          parsedResult.disease,
-          lang
-        );
-
-        // Combine prediction result with disease info
-        const response = {
-          ...parsedResult,
-          ...diseaseInfo
-        };
-
-        // Log activity (optional - only if user is authenticated)
-        const userId = await getUserIdFromRequest(req);
-        console.log('🔬 Disease detection - userId extracted:', userId);
-        if (userId) {
-          const loggedActivity = await logActivity(userId, {
-            activityType: 'disease-detection',
-            title: `Disease Detection - ${capitalizedCrop}`,
-            description: `Detected ${parsedResult.disease} in ${capitalizedCrop} with ${parsedResult.confidence || 'N/A'}% confidence`,
-            status: parsedResult.disease === 'Healthy' ? 'completed' : 'completed',
-            result: parsedResult.disease === 'Healthy' ? 'Crop is healthy' : `Disease detected: ${parsedResult.disease}`,
-            metadata: { crop: capitalizedCrop, disease: parsedResult.disease, confidence: parsedResult.confidence }
-          });
-          console.log('🔬 Disease detection activity logged:', loggedActivity ? 'Success' : 'Failed');
-        } else {
-          console.log('⚠️ Disease detection - No userId found, skipping activity log');
-        }
-
-        res.json(response);
+        const parsed = JSON.parse(result);
+        if (code !== 0 && !parsed.error) parsed.error = errorOutput || "Prediction failed";
+        resolve(parsed);
       } catch (err) {
-        console.error("Error parsing result:", err);
-        res.status(500).json({ error: "Invalid response from prediction system" });
+        resolve({ error: errorOutput || "Invalid response from prediction system" });
       }
     });
+  });
+}
+
+async function runPrediction(imgPath, crop, lang = "en") {
+  if (!USE_DAEMON) return predictWithProcess(imgPath, crop, lang);
+
+  try {
+    return await predictWithDaemon(imgPath, crop, lang);
   } catch (err) {
-    console.error("Error:", err);
-    res.status(500).json({ error: "Internal server error" });
+    console.error("ML daemon unavailable, using one-shot prediction:", err.message);
+    return predictWithProcess(imgPath, crop, lang);
   }
-});
+}
 
 // Helper function to fetch disease info from database
 async function fetchDiseaseInfo(crop, disease, lang) {
@@ -1,441 +0,0 @@
-#!/usr/bin/env python3
-"""
-Comprehensive Disease Database Builder
-Adds detailed treatment information for all crops
-"""
-
-import json
-import os
-
-DB_PATH = os.path.join(os.path.dirname(__file__), "disease_database.json")
-
-# Load existing database (has Tomato and Potato)
-with open(DB_PATH, 'r', encoding='utf-8') as f:
-    database = json.load(f)
-
-print("Loading existing database...")
-print(f"Current crops: {list(database.keys())}")
-
-# Template for healthy plants (reusable)
-def healthy_template(crop_en, crop_hi, crop_mr):
-    return {
-        "name": {"en": "Healthy Plant", "hi": "स्वस्थ पौधा", "mr": "निरोगी रोप"},
-        "description": {
-            "en": f"Your {crop_en} plant is healthy! Continue with regular care.",
-            "hi": f"आपका {crop_hi} स्वस्थ है! नियमित देखभाल जारी रखें।",
-            "mr": f"तुमचे {crop_mr} निरोगी आहे! नियमित काळजी चालू ठेवा।"
-        },
-        "severity": "None",
-        "affectedParts": [],
-        "treatment": {
-            "en": ["No treatment needed", "Continue regular care", "Monitor weekly"],
-            "hi": ["कोई उपचार की आवश्यकता नहीं", "नियमित देखभाल जारी रखें", "साप्ताहिक निगरानी करें"],
-            "mr": ["उपचाराची गरज नाही", "नियमित काळजी चालू ठेवा", "साप्ताहिक पाहणी करा"]
-        },
-        "prevention": {
-            "en": ["Use disease-free seeds/plants", "Maintain proper spacing", "Remove weeds regularly"],
-            "hi": ["रोगमुक्त बीज/पौधे का उपयोग करें", "उचित दूरी बनाए रखें", "नियमित रूप से खरपतवार हटाएं"],
-            "mr": ["रोगमुक्त बियाणे/रोपे वापरा", "योग्य अंतर राखा", "नियमितपणे तण काढा"]
-        },
-        "organicSolution": {
-            "en": ["Apply neem oil spray monthly", "Use compost"],
-            "hi": ["मासिक नीम तेल छिड़काव", "खाद का उपयोग करें"],
-            "mr": ["मासिक कडुलिंबाचे तेल फवारणी", "कंपोस्ट वापरा"]
-        }
-    }
-
-# NEW CROPS WITH COMPREHENSIVE DATA
-new_data = {
-    "Apple": {
-        "healthy": healthy_template("apple", "सेब", "सफरचंद"),
-        "Apple_scab": {
-            "name": {"en": "Apple Scab", "hi": "सेब स्कैब", "mr": "सफरचंद स्कॅब"},
-            "description": {
-                "en": "Fungal disease with dark spots on leaves and fruits",
-                "hi": "पत्तियों और फलों पर काले धब्बे वाला कवक रोग",
-                "mr": "पानांवर आणि फळांवर गडद ठिपके असलेला बुरशीजन्य रोग"
-            },
-            "severity": "High",
-            "affectedParts": ["Leaves", "Fruits"],
-            "treatment": {
-                "en": ["Remove infected leaves", "Spray Mancozeb @ 2.5g/L", "Repeat every 10-14 days"],
-                "hi": ["संक्रमित पत्ते हटाएं", "मैनकोजेब @ 2.5g/L छिड़कें", "10-14 दिन में दोहराएं"],
-                "mr": ["संक्रमित पाने काढा", "मॅनकोझेब @ 2.5g/L फवारणी", "10-14 दिवसांनी पुन्हा"]
-            },
-            "prevention": {
-                "en": ["Use resistant varieties", "Remove fallen leaves", "Prune for air circulation"],
-                "hi": ["प्रतिरोधी किस्में उगाएं", "गिरे पत्ते हटाएं", "वायु संचार के लिए छंटाई करें"],
-                "mr": ["प्रतिरोधक जाती वापरा", "पडलेली पाने काढा", "हवा परिसंचरणासाठी छाटणी"]
-            },
-            "organicSolution": {
-                "en": ["Sulfur dust @ 3g/L weekly", "Neem oil @ 5ml/L"],
-                "hi": ["सल्फर डस्ट @ 3g/L साप्ताहिक", "नीम तेल @ 5ml/L"],
-                "mr": ["सल्फर डस्ट @ 3g/L साप्ताहिक", "कडुलिंबाचे तेल @ 5ml/L"]
-            }
-        },
-        "Black_rot": {
-            "name": {"en": "Black Rot", "hi": "ब्लैक रॉट", "mr": "ब्लॅक रॉट"},
-            "description": {
-                "en": "Fungal disease causing fruit rot and leaf spots",
-                "hi": "फल सड़न और पत्ती धब्बे पैदा करने वाला कवक रोग",
-                "mr": "फळे कुजणे आणि पानांवर ठिपके बनवणारा बुरशीजन्य रोग"
-            },
-            "severity": "Moderate to High",
-            "affectedParts": ["Fruits", "Leaves", "Branches"],
-            "treatment": {
-                "en": ["Remove mummified fruits", "Spray Copper fungicide @ 2.5g/L", "Prune infected branches"],
-                "hi": ["सूखे फल हटाएं", "कॉपर फंगीसाइड @ 2.5g/L छिड़कें", "संक्रमित शाखाएं काटें"],
-                "mr": ["वाळलेली फळे काढा", "कॉपर बुरशीनाशक @ 2.5g/L", "संक्रमित फांद्या छाटा"]
-            },
-            "prevention": {
-                "en": ["Remove mummies before spring", "Prune dead wood", "Maintain tree vigor"],
-                "hi": ["वसंत से पहले सूखे फल हटाएं", "मृत लकड़ी काटें", "पेड़ की ताकत बनाए रखें"],
-                "mr": ["वसंत ऋतूपूर्वी वाळलेली फळे काढा", "मृत लाकूड छाटा", "झाडाची शक्ती राखा"]
-            },
-            "organicSolution": {
-                "en": ["Bordeaux mixture 1%", "Copper hydroxide @ 3g/L"],
-                "hi": ["बोर्डो मिश्रण 1%", "कॉपर हाइड्रॉक्साइड @ 3g/L"],
-                "mr": ["बोर्डो मिश्रण 1%", "कॉपर हायड्रॉक्साईड @ 3g/L"]
-            }
-        },
-        "Cedar_apple_rust": {
-            "name": {"en": "Cedar Apple Rust", "hi": "सीडर सेब रस्ट", "mr": "सीडर सफरचंद रस्ट"},
-            "description": {
-                "en": "Fungal disease with orange spots on leaves",
-                "hi": "पत्तियों पर नारंगी धब्बे वाला कवक रोग",
-                "mr": "पानांवर केशरी ठिपके असलेला बुरशीजन्य रोग"
-            },
-            "severity": "Moderate",
-            "affectedParts": ["Leaves", "Fruits (rare)"],
-            "treatment": {
-                "en": ["Remove nearby cedar trees if possible", "Spray fungicide @ 2g/L", "Apply in spring"],
-                "hi": ["संभव हो तो पास के देवदार के पेड़ हटाएं", "फंगीसाइड @ 2g/L छिड़कें", "वसंत में लगाएं"],
-                "mr": ["शक्य असल्यास जवळची देवदार झाडे काढा", "बुरशीनाशक @ 2g/L", "वसंत ऋतूत लावा"]
-            },
-            "prevention": {
-                "en": ["Plant resistant varieties", "Remove alternate hosts (cedar)", "Fungicide sprays in spring"],
-                "hi": ["प्रतिरोधी किस्में लगाएं", "वैकल्पिक मेजबान (देवदार) हटाएं", "वसंत में फंगीसाइड छिड़काव"],
-                "mr": ["प्रतिरोधक जाती लावा", "पर्यायी यजमान (देवदार) काढा", "वसंत ऋतूत बुरशीनाशक फवारणी"]
-            },
-            "organicSolution": {
-                "en": ["Sulfur spray @ 3g/L", "Neem oil @ 5ml/L"],
-                "hi": ["सल्फर स्प्रे @ 3g/L", "नीम तेल @ 5ml/L"],
-                "mr": ["सल्फर फवारणी @ 3g/L", "कडुलिंबाचे तेल @ 5ml/L"]
-            }
-        }
-    },
-    
-    "Cherry_(including_sour)": {
-        "healthy": healthy_template("cherry", "चेरी", "चेरी"),
-        "Powdery_mildew": {
-            "name": {"en": "Powdery Mildew", "hi": "पाउडरी मिल्ड्यू", "mr": "पावडरी मिल्ड्यू"},
-            "description": {
-                "en": "White powdery fungal growth on leaves and shoots",
-                "hi": "पत्तियों और टहनियों पर सफेद पाउडर जैसी कवक वृद्धि",
-                "mr": "पानांवर आणि कोंबांवर पांढरी पावडरसारखी बुरशी"
-            },
-            "severity": "Moderate",
-            "affectedParts": ["Leaves", "Shoots", "Fruits"],
-            "treatment": {
-                "en": ["Spray Sulfur @ 3g/L", "Apply every 7-10 days", "Remove heavily infected parts"],
-                "hi": ["सल्फर @ 3g/L छिड़कें", "7-10 दिन में लगाएं", "भारी संक्रमित भाग हटाएं"],
-                "mr": ["सल्फर @ 3g/L फवारणी", "7-10 दिवसांनी लावा", "जास्त संक्रमित भाग काढा"]
-            },
-            "prevention": {
-                "en": ["Plant in full sun", "Ensure good air flow", "Avoid overhead watering", "Prune regularly"],
-                "hi": ["पूर्ण धूप में लगाएं", "अच्छी हवा का प्रवाह सुनिश्चित करें", "ऊपर से पानी देने से बचें", "नियमित छंटाई करें"],
-                "mr": ["पूर्ण सूर्यप्रकाशात लावा", "चांगला हवा प्रवाह सुनिश्चित करा", "वरून पाणी देणे टाळा", "नियमित छाटणी करा"]
-            },
-            "organicSolution": {
-                "en": ["Sulfur dust @ 3g/L weekly", "Baking soda: 2 tbsp + 1L water", "Neem oil @ 5ml/L"],
-                "hi": ["सल्फर डस्ट @ 3g/L साप्ताहिक", "बेकिंग सोडा: 2 चम्मच + 1L पानी", "नीम तेल @ 5ml/L"],
-                "mr": ["सल्फर डस्ट @ 3g/L साप्ताहिक", "बेकिंग सोडा: 2 चमचे + 1L पाणी", "कडुलिंबाचे तेल @ 5ml/L"]
-            }
-        }
-    },
-    
-    "Corn_(maize)": {
-        "healthy": healthy_template("corn", "मक्का", "मका"),
-        "Common_rust_": {
-            "name": {"en": "Common Rust", "hi": "कॉमन रस्ट", "mr": "कॉमन रस्ट"},
-            "description": {
-                "en": "Fungal disease with brown pustules on leaves",
-                "hi": "पत्तियों पर भूरे फुंसी वाला कवक रोग",
-                "mr": "पानांवर तपकिरी पुस्ट्युल्स असलेला बुरशीजन्य रोग"
-            },
-            "severity": "Moderate",
-            "affectedParts": ["Leaves"],
-            "treatment": {
-                "en": ["Spray Mancozeb @ 2.5g/L", "Apply at first sign", "Repeat every 7-10 days"],
-                "hi": ["मैनकोजेब @ 2.5g/L छिड़कें", "पहले लक्षण पर लगाएं", "7-10 दिन में दोहराएं"],
-                "mr": ["मॅनकोझेब @ 2.5g/L फवारणी", "पहिल्या लक्षणावर लावा", "7-10 दिवसांनी पुन्हा"]
-            },
-            "prevention": {
-                "en": ["Plant resistant hybrids", "Maintain balanced fertilization", "Avoid late planting"],
-                "hi": ["प्रतिरोधी संकर लगाएं", "संतुलित उर्वरक बनाए रखें", "देर से रोपण से बचें"],
-                "mr": ["प्रतिरोधक संकर लावा", "संतुलित खत राखा", "उशीरा लागवड टाळा"]
-            },
-            "organicSolution": {
-                "en": ["Sulfur spray @ 3g/L", "Neem oil @ 5ml/L"],
-                "hi": ["सल्फर स्प्रे @ 3g/L", "नीम तेल @ 5ml/L"],
-                "mr": ["सल्फर फवारणी @ 3g/L", "कडुलिंबाचे तेल @ 5ml/L"]
-            }
-        },
-        "Northern_Leaf_Blight": {
-            "name": {"en": "Northern Leaf Blight", "hi": "नॉर्दर्न लीफ ब्लाइट", "mr": "नॉर्दर्न लीफ ब्लाइट"},
-            "description": {
-                "en": "Gray-green lesions on lower leaves spreading upward",
-                "hi": "निचली पत्तियों पर भूरे-हरे घाव ऊपर की ओर फैलते हैं",
-                "mr": "खालच्या पानांवर राखाडी-हिरवे जखम वर पसरतात"
-            },
-            "severity": "High",
-            "affectedParts": ["Leaves"],
-            "treatment": {
-                "en": ["Spray Mancozeb @ 2.5g/L", "Apply fungicide early", "Remove infected debris"],
-                "hi": ["मैनकोजेब @ 2.5g/L छिड़कें", "फंगीसाइड जल्दी लगाएं", "संक्रमित अवशेष हटाएं"],
-                "mr": ["मॅनकोझेब @ 2.5g/L फवारणी", "बुरशीनाशक लवकर लावा", "संक्रमित अवशेष काढा"]
-            },
-            "prevention": {
-                "en": ["Use resistant hybrids", "Crop rotation (2-3 years)", "Plow under debris after harvest"],
-                "hi": ["प्रतिरोधी संकर उगाएं", "फसल चक्र (2-3 साल)", "कटाई के बाद अवशेष जोतें"],
-                "mr": ["प्रतिरोधक संकर वापरा", "पीक आवर्तन (2-3 वर्षे)", "कापणीनंतर अवशेष नांगरा"]
-            },
-            "organicSolution": {
-                "en": ["Neem oil @ 5ml/L", "Copper fungicide @ 2.5g/L"],
-                "hi": ["नीम तेल @ 5ml/L", "कॉपर फंगीसाइड @ 2.5g/L"],
-                "mr": ["कडुलिंबाचे तेल @ 5ml/L", "कॉपर बुरशीनाशक @ 2.5g/L"]
-            }
-        },
-        "Cercospora_leaf_spot Gray_leaf_spot": {
-            "name": {"en": "Gray Leaf Spot", "hi": "ग्रे लीफ स्पॉट", "mr": "ग्रे लीफ स्पॉट"},
-            "description": {
-                "en": "Rectangular lesions between leaf veins",
-                "hi": "पत्ती की नसों के बीच आयताकार घाव",
-                "mr": "पानाच्या नसांमध्ये आयताकृती जखम"
-            },
-            "severity": "Moderate to High",
-            "affectedParts": ["Leaves"],
-            "treatment": {
-                "en": ["Apply Azoxystrobin @ 1ml/L", "Spray at tasseling stage", "Repeat if needed"],
-                "hi": ["एजोक्सीस्ट्रोबिन @ 1ml/L लगाएं", "टैसलिंग चरण में छिड़कें", "जरूरत पड़ने पर दोहराएं"],
-                "mr": ["अझोक्सिस्ट्रोबिन @ 1ml/L लावा", "टॅसलिंग अवस्थेत फवारणी", "गरज पडल्यास पुन्हा"]
-            },
-            "prevention": {
-                "en": ["Plant resistant hybrids", "Rotate crops", "Tillage to bury residue"],
-                "hi": ["प्रतिरोधी संकर लगाएं", "फसल चक्र अपनाएं", "अवशेष दबाने के लिए जुताई करें"],
-                "mr": ["प्रतिरोधक संकर लावा", "पीक आवर्तन करा", "अवशेष दाबण्यासाठी नांगरणी"]
-            },
-            "organicSolution": {
-                "en": ["Copper fungicide @ 2.5g/L", "Neem oil @ 5ml/L"],
-                "hi": ["कॉपर फंगीसाइड @ 2.5g/L", "नीम तेल @ 5ml/L"],
-                "mr": ["कॉपर बुरशीनाशक @ 2.5g/L", "कडुलिंबाचे तेल @ 5ml/L"]
-            }
-        }
-    },
-    
-    "Grape": {
-        "healthy": healthy_template("grape", "अंगूर", "द्राक्ष"),
-        "Black_rot": {
-            "name": {"en": "Black Rot", "hi": "ब्लैक रॉट", "mr": "ब्लॅक रॉट"},
-            "description": {
-                "en": "Fungal disease causing fruit mummification",
-                "hi": "फल सूखने का कारण बनने वाला कवक रोग",
-                "mr": "फळे वाळवणारा बुरशीजन्य रोग"
-            },
-            "severity": "High",
-            "affectedParts": ["Fruits", "Leaves", "Shoots"],
-            "treatment": {
-                "en": ["Remove mummies", "Spray Mancozeb @ 2.5g/L", "Apply every 10-14 days during wet weather"],
-                "hi": ["सूखे फल हटाएं", "मैनकोजेब @ 2.5g/L छिड़कें", "गीले मौसम में 10-14 दिन में लगाएं"],
-                "mr": ["वाळलेली फळे काढा", "मॅनकोझेब @ 2.5g/L", "ओल्या हवामानात 10-14 दिवसांनी"]
-            },
-            "prevention": {
-                "en": ["Prune for air circulation", "Remove mummified berries", "Fungicide sprays from bloom"],
-                "hi": ["हवा संचार के लिए छंटाई", "सूखे बेरीज हटाएं", "फूल से फंगीसाइड छिड़काव"],
-                "mr": ["हवा परिसंचरणासाठी छाटणी", "वाळलेली बेरी काढा", "फुलांपासून बुरशीनाशक"]
-            },
-            "organicSolution": {
-                "en": ["Copper fungicide @ 2.5g/L", "Sulfur @ 3g/L"],
-                "hi": ["कॉपर फंगीसाइड @ 2.5g/L", "सल्फर @ 3g/L"],
-                "mr": ["कॉपर बुरशीनाशक @ 2.5g/L", "सल्फर @ 3g/L"]
-            }
-        },
-        "Esca_(Black_Measles)": {
-            "name": {"en": "Esca (Black Measles)", "hi": "एस्का (ब्लैक मीजल्स)", "mr": "एस्का (ब्लॅक मीझल्स)"},
-            "description": {
-                "en": "Wood disease causing leaf discoloration and berry spots",
-                "hi": "पत्ती मलिनकिरण और बेरी धब्बे पैदा करने वाला लकड़ी रोग",
-                "mr": "पान मलिनीकरण आणि बेरी ठिपके बनवणारा लाकूड रोग"
-            },
-            "severity": "Very High",
-            "affectedParts": ["Wood", "Leaves", "Fruits"],
-            "treatment": {
-                "en": ["Remove infected wood", "No cure available", "Prune in dry weather", "Disinfect tools"],
-                "hi": ["संक्रमित लकड़ी हटाएं", "कोई इलाज उपलब्ध नहीं", "सूखे मौसम में छंटाई", "औजार कीटाणुरहित करें"],
-                "mr": ["संक्रमित लाकूड काढा", "कोणताही उपचार नाही", "कोरड्या हवामानात छाटणी", "साधने निर्जंतुक करा"]
-            },
-            "prevention": {
-                "en": ["Use clean planting material", "Avoid large pruning cuts", "Maintain vine health"],
-                "hi": ["स्वच्छ रोपण सामग्री का उपयोग करें", "बड़े छंटाई कट से बचें", "बेल स्वास्थ्य बनाए रखें"],
-                "mr": ["स्वच्छ लागवड साहित्य वापरा", "मोठे छाटणी कट टाळा", "वेलीचे आरोग्य राखा"]
-            },
-            "organicSolution": {
-                "en": ["Prevention only", "Good cultural practices", "Proper nutrition"],
-                "hi": ["केवल रोकथाम", "अच्छी खेती प्रथाएं", "उचित पोषण"],
-                "mr": ["फक्त प्रतिबंध", "चांगल्या शेती पद्धती", "योग्य पोषण"]
-            },
-            "emergencyContact": {
-                "en": "Contact grape specialist immediately - no cure available",
-                "hi": "तुरंत अंगूर विशेषज्ञ से संपर्क करें - कोई इलाज उपलब्ध नहीं",
-                "mr": "तात्काळ द्राक्ष तज्ञाशी संपर्क साधा - कोणताही उपचार नाही"
-            }
-        },
-        "Leaf_blight_(Isariopsis_Leaf_Spot)": {
-            "name": {"en": "Leaf Blight", "hi": "लीफ ब्लाइट", "mr": "लीफ ब्लाइट"},
-            "description": {
-                "en": "Brown leaf spots leading to defoliation",
-                "hi": "भूरे पत्ती धब्बे जो पत्ती गिरने की ओर ले जाते हैं",
-                "mr": "तपकिरी पान ठिपके जे पाने गळणे कारणीभूत"
-            },
-            "severity": "Moderate",
-            "affectedParts": ["Leaves"],
-            "treatment": {
-                "en": ["Spray Copper oxychloride @ 2.5g/L", "Apply at 15-day intervals", "Remove infected leaves"],
-                "hi": ["कॉपर ऑक्सीक्लोराइड @ 2.5g/L छिड़कें", "15 दिन के अंतराल पर लगाएं", "संक्रमित पत्ते हटाएं"],
-                "mr": ["कॉपर ऑक्सिक्लोराईड @ 2.5g/L", "15 दिवसांच्या अंतराने", "संक्रमित पाने काढा"]
-            },
-            "prevention": {
-                "en": ["Improve air circulation", "Avoid overhead irrigation", "Fungicide sprays"],
-                "hi": ["हवा संचार सुधारें", "ऊपर से सिंचाई से बचें", "फंगीसाइड छिड़काव"],
-                "mr": ["हवा परिसंचरण सुधारा", "वरून सिंचन टाळा", "बुरशीनाशक फवारणी"]
-            },
-            "organicSolution": {
-                "en": ["Bordeaux mixture 1%", "Neem oil @ 5ml/L"],
-                "hi": ["बोर्डो मिश्रण 1%", "नीम तेल @ 5ml/L"],
-                "mr": ["बोर्डो मिश्रण 1%", "कडुलिंबाचे तेल @ 5ml/L"]
-            }
-        }
-    },
-    
-    "Peach": {
-        "healthy": healthy_template("peach", "आड़ू", "पीच"),
-        "Bacterial_spot": {
-            "name": {"en": "Bacterial Spot", "hi": "बैक्टीरियल स्पॉट", "mr": "बॅक्टेरियल स्पॉट"},
-            "description": {
-                "en": "Bacterial disease with dark spots on leaves and fruits",
-                "hi": "पत्तियों और फलों पर काले धब्बे वाला बैक्टीरियल रोग",
-                "mr": "पानांवर आणि फळांवर गडद ठिपके असलेला जिवाणूजन्य रोग"
-            },
-            "severity": "Moderate to High",
-            "affectedParts": ["Leaves", "Fruits", "Twigs"],
-            "treatment": {
-                "en": ["Spray Copper compounds @ 2.5g/L", "Apply Streptomycin @ 0.5g/L", "Repeat every 10 days"],
-                "hi": ["कॉपर यौगिक @ 2.5g/L छिड़कें", "स्ट्रेप्टोमाइसिन @ 0.5g/L लगाएं", "10 दिन में दोहराएं"],
-                "mr": ["कॉपर संयुगे @ 2.5g/L", "स्ट्रेप्टोमायसिन @ 0.5g/L", "10 दिवसांनी पुन्हा"]
-            },
-            "prevention": {
-                "en": ["Plant resistant varieties", "Prune to improve air flow", "Avoid overhead irrigation", "Remove infected material"],
-                "hi": ["प्रतिरोधी किस्में लगाएं", "हवा प्रवाह सुधारने के लिए छंटाई", "ऊपर से सिंचाई से बचें", "संक्रमित सामग्री हटाएं"],
-                "mr": ["प्रतिरोधक जाती लावा", "हवा प्रवाह सुधारण्यासाठी छाटणी", "वरून सिंचन टाळा", "संक्रमित साहित्य काढा"]
-            },
-            "organicSolution": {
-                "en": ["Copper hydroxide @ 2.5g/L", "Bordeaux mixture preventively"],
-                "hi": ["कॉपर हाइड्रॉक्साइड @ 2.5g/L", "बोर्डो मिश्रण निवारक रूप से"],
-                "mr": ["कॉपर हायड्रॉक्साईड @ 2.5g/L", "बोर्डो मिश्रण प्रतिबंधात्मक"]
-            }
-        }
-    },
-    
-    "Pepper_bell": {
-        "healthy": healthy_template("pepper", "शिमला मिर्च", "ढोबळी मिरची"),
-        "Bacterial_spot": {
-            "name": {"en": "Bacterial Spot", "hi": "बैक्टीरियल स्पॉट", "mr": "बॅक्टेरियल स्पॉट"},
-            "description": {
-                "en": "Bacterial disease with dark spots on leaves and fruits",
-                "hi": "पत्तियों और फलों पर काले धब्बे वाला बैक्टीरियल रोग",
-                "mr": "पानांवर आणि फळांवर गडद ठिपके असलेला जिवाणूजन्य रोग"
-            },
-            "severity": "Moderate",
-            "affectedParts": ["Leaves", "Fruits", "Stems"],
-            "treatment": {
-                "en": ["Remove infected plants", "Spray Copper compounds @ 2.5g/L", "Rotate with non-solanaceous crops"],
-                "hi": ["संक्रमित पौधे हटाएं", "कॉपर यौगिक @ 2.5g/L छिड़कें", "गैर-सोलानेसियस फसलों के साथ चक्र"],
-                "mr": ["संक्रमित रोपे काढा", "कॉपर संयुगे @ 2.5g/L", "गैर-सोलॅनेशियस पिकांसह आवर्तन"]
-            },
-            "prevention": {
-                "en": ["Use disease-free seeds", "Drip irrigation instead of overhead", "Maintain 60cm spacing", "Crop rotation"],
-                "hi": ["रोगमुक्त बीज का उपयोग करें", "ऊपर के बजाय ड्रिप सिंचाई", "60 सेमी दूरी बनाए रखें", "फसल चक्र"],
-                "mr": ["रोगमुक्त बियाणे वापरा", "वरून ऐवजी ठिबक सिंचन", "60 सेमी अंतर राखा", "पीक आवर्तन"]
-            },
-            "organicSolution": {
-                "en": ["Copper hydroxide @ 2.5g/L", "Neem oil @ 5ml/L"],
-                "hi": ["कॉपर हाइड्रॉक्साइड @ 2.5g/L", "नीम तेल @ 5ml/L"],
-                "mr": ["कॉपर हायड्रॉक्साईड @ 2.5g/L", "कडुलिंबाचे तेल @ 5ml/L"]
-            }
-        }
-    },
-    
-    "Strawberry": {
-        "healthy": healthy_template("strawberry", "स्ट्रॉबेरी", "स्ट्रॉबेरी"),
-        "Leaf_scorch": {
-            "name": {"en": "Leaf Scorch", "hi": "लीफ स्कॉर्च", "mr": "लीफ स्कॉर्च"},
-            "description": {
-                "en": "Fungal disease with purple spots turning brown",
-                "hi": "बैंगनी धब्बे भूरे होने वाला कवक रोग",
-                "mr": "जांभळे ठिपके तपकिरी होणारा बुरशीजन्य रोग"
-            },
-            "severity": "Moderate",
-            "affectedParts": ["Leaves"],
-            "treatment": {
-                "en": ["Remove old leaves", "Spray Captan @ 2.5g/L", "Apply at 7-10 day intervals"],
-                "hi": ["पुरानी पत्तियां हटाएं", "कैप्टन @ 2.5g/L छिड़कें", "7-10 दिन के अंतराल पर लगाएं"],
-                "mr": ["जुनी पाने काढा", "कॅप्टन @ 2.5g/L फवारणी", "7-10 दिवसांच्या अंतराने"]
-            },
-            "prevention": {
-                "en": ["Use resistant varieties", "Maintain row spacing", "Drip irrigation", "Remove old foliage after harvest"],
-                "hi": ["प्रतिरोधी किस्में उगाएं", "पंक्ति दूरी बनाए रखें", "ड्रिप सिंचाई", "कटाई के बाद पुरानी पत्तियां हटाएं"],
-                "mr": ["प्रतिरोधक जाती वापरा", "ओळीतील अंतर राखा", "ठिबक सिंचन", "कापणीनंतर जुनी पाने काढा"]
-            },
-            "organicSolution": {
-                "en": ["Copper fungicide @ 2.5g/L", "Sulfur spray @ 3g/L"],
-                "hi": ["कॉपर फंगीसाइड @ 2.5g/L", "सल्फर स्प्रे @ 3g/L"],
-                "mr": ["कॉपर बुरशीनाशक @ 2.5g/L", "सल्फर फवारणी @ 3g/L"]
-            }
-        }
-    }
-}
-
-# Merge new data with existing
-for crop, diseases in new_data.items():
-    if crop not in database:
-        database[crop] = {}
-    database[crop].update(diseases)
-
-# Save updated database
-with open(DB_PATH, 'w', encoding='utf-8') as f:
-    json.dump(database, f, indent=2, ensure_ascii=False)
-
-print("\n" + "="*60)
-print("✅ Disease Database Updated Successfully!")
-print("="*60)
-print(f"\n📊 Total Crops: {len(database)}")
-for crop in sorted(database.keys()):
-    print(f"   🌾 {crop}: {len(database[crop])} disease classes")
-
-print("\n📚 Treatment information added for:")
-print("   - Apple (4 classes)")
-print("   - Cherry (2 classes)")
-print("   - Corn (4 classes)")
-print("   - Grape (4 classes)")
-print("   - Peach (2 classes)")
-print("   - Pepper (2 classes)")
-print("   - Strawberry (2 classes)")
-
-print("\n🌐 All treatments available in:")
-print("   - English")
-print("   - Hindi (हिन्दी)")
-print("   - Marathi (मराठी)")
-
-print("\n✨ Database ready for use!")
-print("="*60)
-
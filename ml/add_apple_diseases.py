@@ -1,192 +0,0 @@
-#!/usr/bin/env python3
-"""
-Script to add comprehensive disease information for all crops
-Appends to existing disease_database.json
-"""
-
-import json
-import os
-
-# Path to disease database
-DB_PATH = os.path.join(os.path.dirname(__file__), "disease_database.json")
-
-# Load existing database
-with open(DB_PATH, 'r', encoding='utf-8') as f:
-    database = json.load(f)
-
-# NEW CROPS DATA - Comprehensive treatment information
-
-new_crops_data = {
-    "Apple": {
-        "healthy": {
-            "name": {"en": "Healthy Plant", "hi": "स्वस्थ पौधा", "mr": "निरोगी रोप"},
-            "description": {
-                "en": "Your apple tree is healthy! Maintain regular care.",
-                "hi": "आपका सेब का पेड़ स्वस्थ है! नियमित देखभाल जारी रखें।",
-                "mr": "तुमचे सफरचंदाचे झाड निरोगी आहे! नियमित काळजी चालू ठेवा।"
-            },
-            "severity": "None",
-            "affectedParts": [],
-            "treatment": {
-                "en": ["No treatment needed", "Continue regular watering", "Maintain proper pruning"],
-                "hi": ["कोई उपचार की आवश्यकता नहीं", "नियमित पानी देना जारी रखें", "उचित छंटाई बनाए रखें"],
-                "mr": ["उपचाराची गरज नाही", "नियमित पाणी देणे चालू ठेवा", "योग्य छाटणी राखा"]
-            },
-            "prevention": {
-                "en": ["Use disease-resistant varieties", "Ensure good air circulation", "Remove fallen leaves and fruits"],
-                "hi": ["प्रतिरोधी किस्मों का उपयोग करें", "अच्छा वायु संचार सुनिश्चित करें", "गिरे हुए पत्ते और फल हटाएं"],
-                "mr": ["प्रतिरोधक जाती वापरा", "चांगला हवेचा परिसंचरण सुनिश्चित करा", "पडलेली पाने आणि फळे काढा"]
-            },
-            "organicSolution": {
-                "en": ["Apply neem oil spray monthly", "Use compost for natural nutrients"],
-                "hi": ["मासिक नीम तेल का छिड़काव करें", "प्राकृतिक पोषक तत्वों के लिए खाद का उपयोग करें"],
-                "mr": ["मासिक कडुलिंबाच्या तेलाची फवारणी करा", "नैसर्गिक पोषक घटकांसाठी कंपोस्ट वापरा"]
-            }
-        },
-        "Apple_scab": {
-            "name": {"en": "Apple Scab", "hi": "सेब का स्कैब", "mr": "सफरचंद स्कॅब"},
-            "description": {
-                "en": "Fungal disease causing dark, velvety spots on leaves and fruits. Most serious apple disease.",
-                "hi": "कवक रोग जो पत्तियों और फलों पर गहरे, मखमली धब्बे पैदा करता है। सबसे गंभीर सेब रोग।",
-                "mr": "बुरशीजन्य रोग जो पानांवर आणि फळांवर गडद, मखमली ठिपके बनवतो। सर्वात गंभीर सफरचंद रोग।"
-            },
-            "severity": "High",
-            "affectedParts": ["Leaves", "Fruits", "Young shoots"],
-            "causes": {
-                "en": ["Fungus Venturia inaequalis", "High humidity and rainfall", "Temperature 15-25°C", "Poor air circulation"],
-                "hi": ["कवक वेंचुरिया इनएक्वालिस", "उच्च आर्द्रता और वर्षा", "तापमान 15-25°C", "खराब वायु संचार"],
-                "mr": ["व्हेंचुरिया इनएक्वालिस बुरशी", "जास्त आर्द्रता आणि पाऊस", "तापमान 15-25°C", "खराब हवा परिसंचरण"]
-            },
-            "treatment": {
-                "en": [
-                    "Remove and destroy infected leaves and fruits",
-                    "Spray Mancozeb 75% WP @ 2.5g per liter",
-                    "Alternative: Captan @ 2.5g per liter",
-                    "Apply at 10-14 day intervals during wet weather",
-                    "Ensure good coverage on both leaf surfaces",
-                    "Continue sprays until 2 weeks before harvest"
-                ],
-                "hi": [
-                    "संक्रमित पत्तियों और फलों को हटाकर नष्ट करें",
-                    "मैनकोजेब 75% WP @ 2.5 ग्राम प्रति लीटर छिड़कें",
-                    "विकल्प: कैप्टन @ 2.5 ग्राम प्रति लीटर",
-                    "गीले मौसम में 10-14 दिन के अंतराल पर लगाएं",
-                    "पत्ती की दोनों सतहों पर अच्छी कवरेज सुनिश्चित करें",
-                    "कटाई से 2 सप्ताह पहले तक छिड़काव जारी रखें"
-                ],
-                "mr": [
-                    "संक्रमित पाने आणि फळे काढून नष्ट करा",
-                    "मॅनकोझेब 75% WP @ 2.5 ग्रॅम प्रति लिटर फवारणी करा",
-                    "पर्याय: कॅप्टन @ 2.5 ग्रॅम प्रति लिटर",
-                    "ओल्या हवामानात 10-14 दिवसांच्या अंतराने लावा",
-                    "पानाच्या दोन्ही पृष्ठभागांवर चांगले व्याप्ती सुनिश्चित करा",
-                    "कापणीच्या 2 आठवडे आधी फवारणी चालू ठेवा"
-                ]
-            },
-            "prevention": {
-                "en": [
-                    "Plant scab-resistant varieties like Liberty, Enterprise",
-                    "Maintain 4-5 meter spacing between trees",
-                    "Prune to improve air circulation",
-                    "Remove fallen leaves in autumn (harbor fungus over winter)",
-                    "Apply dormant spray of lime sulfur before bud break",
-                    "Avoid overhead irrigation"
-                ],
-                "hi": [
-                    "लिबर्टी, एंटरप्राइज जैसी स्कैब-प्रतिरोधी किस्में लगाएं",
-                    "पेड़ों के बीच 4-5 मीटर की दूरी बनाए रखें",
-                    "वायु संचार सुधारने के लिए छंटाई करें",
-                    "शरद ऋतु में गिरे हुए पत्ते हटाएं (सर्दियों में कवक को आश्रय देते हैं)",
-                    "कली फूटने से पहले लाइम सल्फर का डॉर्मेंट स्प्रे लगाएं",
-                    "ओवरहेड सिंचाई से बचें"
-                ],
-                "mr": [
-                    "लिबर्टी, एंटरप्राइज सारख्या स्कॅब-प्रतिरोधक जाती लावा",
-                    "झाडांमध्ये 4-5 मीटर अंतर राखा",
-                    "हवा परिसंचरण सुधारण्यासाठी छाटणी करा",
-                    "शरद ऋतूत पडलेली पाने काढा (हिवाळ्यात बुरशीला आश्रय देतात)",
-                    "कळी फुटण्यापूर्वी लाईम सल्फरचे डॉर्मंट फवारणी लावा",
-                    "ओव्हरहेड सिंचन टाळा"
-                ]
-            },
-            "organicSolution": {
-                "en": [
-                    "Sulfur dust @ 3g per liter (apply weekly during wet weather)",
-                    "Copper fungicide @ 2.5g per liter",
-                    "Neem oil @ 5ml per liter (preventive)",
-                    "Baking soda: 2 tablespoons + 1 liter water + few drops oil"
-                ],
-                "hi": [
-                    "सल्फर डस्ट @ 3 ग्राम प्रति लीटर (गीले मौसम में साप्ताहिक लगाएं)",
-                    "कॉपर फंगीसाइड @ 2.5 ग्राम प्रति लीटर",
-                    "नीम तेल @ 5 मिली प्रति लीटर (निवारक)",
-                    "बेकिंग सोडा: 2 चम्मच + 1 लीटर पानी + कुछ बूंद तेल"
-                ],
-                "mr": [
-                    "सल्फर डस्ट @ 3 ग्रॅम प्रति लिटर (ओल्या हवामानात साप्ताहिक लावा)",
-                    "कॉपर बुरशीनाशक @ 2.5 ग्रॅम प्रति लिटर",
-                    "कडुलिंबाचे तेल @ 5 मिली प्रति लिटर (प्रतिबंधक)",
-                    "बेकिंग सोडा: 2 चमचे + 1 लिटर पाणी + काही थेंब तेल"
-                ]
-            },
-            "doAndDont": {
-                "do": {
-                    "en": [
-                        "✓ Start preventive sprays at pink bud stage",
-                        "✓ Rake and compost fallen leaves with other materials",
-                        "✓ Water at base of tree, not on foliage",
-                        "✓ Thin fruit to reduce disease spread"
-                    ],
-                    "hi": [
-                        "✓ गुलाबी कली चरण में निवारक छिड़काव शुरू करें",
-                        "✓ गिरे पत्तों को अन्य सामग्री के साथ खाद बनाएं",
-                        "✓ पेड़ के आधार पर पानी दें, पत्तियों पर नहीं",
-                        "✓ रोग फैलाव कम करने के लिए फल कम करें"
-                    ],
-                    "mr": [
-                        "✓ गुलाबी कळीच्या अवस्थेत प्रतिबंधक फवारणी सुरू करा",
-                        "✓ पडलेली पाने इतर सामग्रीसह कंपोस्ट करा",
-                        "✓ झाडाच्या पायथ्याशी पाणी द्या, पानांवर नाही",
-                        "✓ रोगाचा प्रसार कमी करण्यासाठी फळे कमी करा"
-                    ]
-                },
-                "dont": {
-                    "en": [
-                        "✗ Don't leave infected fruit on tree or ground",
-                        "✗ Don't plant in poorly drained areas",
-                        "✗ Don't use excessive nitrogen fertilizer",
-                        "✗ Don't delay spring sprays"
-                    ],
-                    "hi": [
-                        "✗ संक्रमित फल को पेड़ या जमीन पर न छोड़ें",
-                        "✗ खराब जल निकासी वाले क्षेत्रों में न लगाएं",
-                        "✗ अधिक नाइट्रोजन उर्वरक का उपयोग न करें",
-                        "✗ वसंत छिड़काव में देरी न करें"
-                    ],
-                    "mr": [
-                        "✗ संक्रमित फळ झाडावर किंवा जमिनीवर सोडू नका",
-                        "✗ खराब निचरा असलेल्या भागात लावू नका",
-                        "✗ जास्त नायट्रोजन खत वापरू नका",
-                        "✗ वसंत ऋतूच्या फवारणीला उशीर करू नका"
-                    ]
-                }
-            }
-        }
-    }
-}
-
-# Add the new data
-for crop, diseases in new_crops_data.items():
-    if crop not in database:
-        database[crop] = {}
-    database[crop].update(diseases)
-
-# Save back
-with open(DB_PATH, 'w', encoding='utf-8') as f:
-    json.dump(database, f, indent=2, ensure_ascii=False)
-
-print(f"✅ Database updated successfully!")
-print(f"📊 Total crops: {len(database)}")
-for crop in database:
-    print(f"   - {crop}: {len(database[crop])} disease classes")
-
@@ -0,0 +1,131 @@
+"""
+Admission control for the inference services
+
+Inference runs on a bounded thread pool. At most `max_in_flight` requests run
+at once and at most `max_queue` more may wait; anything beyond that is
+rejected immediately with Overloaded (HTTP 429 + Retry-After) instead of
+piling up until clients time out. While the service is not ready (starting up
+or draining) requests get 503.
+
+Configuration (environment):
+    MAX_IN_FLIGHT  Concurrent inferences (default: number of CPUs)
+    MAX_QUEUE      Requests allowed to wait for a slot (default 2 x MAX_IN_FLIGHT)
+"""
+
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    """Request rejected by admission control."""
+
+    def __init__(self, message, status=429, retry_after=1):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    def to_dict(self):
+        return {"error": str(self), "retryAfter": self.retry_after}
+
+
+class AdmissionController:
+    """
+    Bounded executor with an in-flight limit and a queue-depth limit
+
+    Args:
+        max_in_flight (int): Requests executing concurrently
+        max_queue (int): Requests allowed to wait for a free slot
+    """
+
+    def __init__(self, max_in_flight=None, max_queue=None):
+        self.max_in_flight = max(1, int(max_in_flight or os.cpu_count() or 1))
+        self.max_queue = max(0, int(self.max_in_flight * 2 if max_queue is None else max_queue))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="inference")
+
+        self.ready = True
+        self._lock = threading.Lock()
+        self._admitted = 0  # running + queued
+        self._running = 0
+        self._service_seconds = 0.1  # moving average, used for Retry-After
+        self._counters = {"admitted": 0, "rejected": 0, "unavailable": 0, "completed": 0, "failed": 0}
+
+    @classmethod
+    def from_env(cls):
+        max_in_flight = os.environ.get("MAX_IN_FLIGHT")
+        max_queue = os.environ.get("MAX_QUEUE")
+        return cls(
+            max_in_flight=int(max_in_flight) if max_in_flight else None,
+            max_queue=int(max_queue) if max_queue else None,
+        )
+
+    def _retry_after(self):
+        # Seconds until the current backlog should have drained, at least 1
+        backlog = self._admitted / self.max_in_flight
+        return max(1, math.ceil(backlog * self._service_seconds))
+
+    def _admit(self):
+        with self._lock:
+            if not self.ready:
+                self._counters["unavailable"] += 1
+                raise Overloaded("Service unavailable, try again shortly", status=503, retry_after=5)
+            if self._admitted >= self.max_in_flight + self.max_queue:
+                self._counters["rejected"] += 1
+                raise Overloaded("Server busy, too many requests in progress", retry_after=self._retry_after())
+            self._admitted += 1
+            self._counters["admitted"] += 1
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self._running += 1
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._running -= 1
+                self._admitted -= 1
+                self._service_seconds = 0.9 * self._service_seconds + 0.1 * elapsed
+                self._counters["completed" if ok else "failed"] += 1
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn on the inference pool. Raises Overloaded when the queue is full."""
+        self._admit()
+        try:
+            return self.executor.submit(self._run, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._admitted -= 1
+            raise
+
+    def call(self, fn, *args, **kwargs):
+        """submit() and wait for the result (for synchronous request handlers)."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "maxInFlight": self.max_in_flight,
+                "maxQueue": self.max_queue,
+                "running": self._running,
+                "queued": self._admitted - self._running,
+                "avgServiceMs": round(self._service_seconds * 1000, 2),
+                **self._counters,
+            }
+
+    def collect_metrics(self):
+        """Gauges for metrics.register_collector (see metrics.py)."""
+        stats = self.stats()
+        yield "farmai_admission_running", "Requests currently running inference.", {(): stats["running"]}
+        yield "farmai_admission_queued", "Admitted requests waiting for an inference slot.", {(): stats["queued"]}
+        yield "farmai_admission_requests", "Admission outcomes since start.", {
+            (("outcome", name),): stats[name]
+            for name in ("admitted", "rejected", "unavailable", "completed", "failed")
+        }
@@ -0,0 +1,351 @@
+"""
+Async (ASGI) front end for the inference endpoints
+
+Request bodies are read on the event loop, so a slow upload never holds an
+inference thread, and inference runs on the bounded pool from admission.py.
+When MAX_IN_FLIGHT + MAX_QUEUE requests are already admitted, new requests
+get an immediate 429 with Retry-After instead of waiting and timing out.
+
+Endpoints (same contracts as the Flask apps):
+    POST /predict               {"imagePath": ..., "crop": ...} -> {"prediction": ...}   (ml/server.py)
+    POST /api/predict/<crop>    multipart "image" field or raw image body             (backend/app.py)
+    POST /api/predict/batch     multipart "images" or x-image-batch framing (see plot_predict.py)
+    POST /api/predict/tiled     one large image, multipart "image" or raw body, ?crop=&stride= (see tiling.py)
+    GET  /api/disease-info/<crop>/<disease>?lang=   treatment info with ETag (see disease_info.py)
+    GET  /stats, /healthz, /metrics (Prometheus text, see metrics.py)
+    GET/POST /admin/profile     on-demand profiling (see profiling.py)
+
+Run with any ASGI server; uvicorn is pinned in requirements.txt:
+    python ml/async_server.py --port 6000
+"""
+
+import asyncio
+import io
+import json
+import os
+import time
+from urllib.parse import parse_qs
+
+from werkzeug.formparser import parse_form_data
+
+import metrics
+from admission import AdmissionController, Overloaded
+from batching import MicroBatcher
+from plot_predict import FRAMED_CONTENT_TYPE, BatchRequestError, parse_framed, parse_multipart, predict_plot
+from disease_info import CONTENT_TYPE as DISEASE_INFO_CONTENT_TYPE, DiseaseInfoNotFound, not_modified
+from predict import SUPPORTED_CROPS, cascade_policy, disease_index, disease_info_for, predict_batch, \
+    predict_image, prediction_cache, registry
+from profiling import Profiler
+from tiling import options_from_params, predict_tiles
+
+MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10MB, same limit as backend/app.py
+BATCH_MAX_CONTENT_LENGTH = int(os.environ.get("BATCH_MAX_CONTENT_LENGTH", str(50 * 1024 * 1024)))
+
+batcher = MicroBatcher.from_env(predict_batch)
+admission = AdmissionController.from_env()
+metrics.register_collector(admission.collect_metrics)
+profiler = Profiler.from_env()
+
+
+class HTTPError(Exception):
+    def __init__(self, status, payload, headers=None):
+        super().__init__(payload.get("error"))
+        self.status = status
+        self.payload = payload
+        self.headers = headers or {}
+
+
+async def read_body(receive, limit=MAX_CONTENT_LENGTH):
+    started = time.perf_counter()
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(400, {"error": "Client disconnected"})
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise HTTPError(413, {"error": "Request body too large"})
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            metrics.observe_stage("upload", time.perf_counter() - started)
+            return b"".join(chunks)
+
+
+async def send_json(send, status, payload, headers=None):
+    body = json.dumps(payload).encode("utf-8")
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode("latin-1"), str(value).encode("latin-1")))
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_text(send, status, text, content_type):
+    await send_bytes(send, status, text.encode("utf-8"), content_type)
+
+
+async def send_bytes(send, status, body, content_type=None, headers=None):
+    raw_headers = [(b"content-length", str(len(body)).encode())]
+    if content_type:
+        raw_headers.append((b"content-type", content_type.encode("latin-1")))
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode("latin-1"), str(value).encode("latin-1")))
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def run_inference(fn, *args, **kwargs):
+    """Run fn on the bounded inference pool; Overloaded propagates as 429/503."""
+    return await asyncio.wrap_future(admission.submit(fn, *args, **kwargs))
+
+
+async def run_profiled(scope, headers, label, fn, *args, **kwargs):
+    """
+    run_inference, through the profiler when the request is picked (see profiling.py)
+
+    Profiled calls skip the micro-batcher and the prediction cache so the
+    forward pass runs on the profiled thread. The dump's name is added to
+    `headers` as X-Profile-File.
+    """
+    profile = profiler.claim(label, _header(scope, "x-profile"), _header(scope, "x-profile-token") or None)
+    if profile is None:
+        return await run_inference(fn, *args, **kwargs)
+
+    kwargs.pop("batcher", None)
+    if fn is predict_image:
+        kwargs["use_cache"] = False
+    result = await run_inference(profile.run, fn, *args, **kwargs)
+    if profile.name:
+        headers["X-Profile-File"] = profile.name
+    return result
+
+
+def _header(scope, name):
+    for key, value in scope.get("headers", []):
+        if key.decode("latin-1").lower() == name:
+            return value.decode("latin-1")
+    return ""
+
+
+def _parse_multipart(content_type, body):
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "CONTENT_TYPE": content_type,
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+    }
+    _, form, files = parse_form_data(environ)
+    return form, files
+
+
+def extract_image(scope, body):
+    """Image bytes from a multipart "image" field, or the raw body itself."""
+    content_type = _header(scope, "content-type")
+    if not content_type.startswith("multipart/form-data"):
+        return body
+
+    _, files = _parse_multipart(content_type, body)
+    file = files.get("image")
+    if file is None:
+        raise HTTPError(400, {"error": "No image provided"})
+    if file.filename == "":
+        raise HTTPError(400, {"error": "Empty filename"})
+    return file.read()
+
+
+async def handle_predict_path(scope, receive, headers):
+    try:
+        data = json.loads(await read_body(receive) or b"{}")
+    except ValueError:
+        raise HTTPError(400, {"error": "Invalid JSON body"})
+
+    img_path = data.get("imagePath")
+    if not img_path:
+        return 200, {"prediction": None}
+
+    crop = data.get("crop", "tomato")
+    result = await run_profiled(scope, headers, crop, predict_image, img_path, crop, batcher=batcher)
+    if "error" in result:
+        return result.get("status", 500), {"prediction": None, "error": result["error"]}
+    payload = {"prediction": result["disease"]}
+    if data.get("includeInfo"):
+        payload["diseaseInfo"] = disease_info_for(crop, result["disease"], data.get("lang"))
+    return 200, payload
+
+
+async def handle_predict_upload(scope, receive, headers, crop):
+    if crop not in SUPPORTED_CROPS:
+        raise HTTPError(400, {"error": f"Unsupported crop: {crop}", "supportedCrops": SUPPORTED_CROPS})
+
+    image_bytes = extract_image(scope, await read_body(receive))
+    if not image_bytes:
+        raise HTTPError(400, {"error": "No image provided"})
+
+    result = await run_profiled(scope, headers, crop, predict_image, image_bytes, crop=crop, batcher=batcher)
+    if "error" in result:
+        # 413 / 400 for oversized or undecodable images
+        return result.get("status", 500), result
+    payload = {"disease": result["disease"], "confidence": result["confidence"] / 100}
+    if (_query_param(scope, "includeInfo") or "0") not in ("0", "false"):
+        payload["diseaseInfo"] = disease_info_for(crop, result["disease"], _query_param(scope, "lang"))
+    return 200, payload
+
+
+def _query_param(scope, name):
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get(name)
+    return values[0] if values else None
+
+
+async def handle_predict_plot(scope, receive, headers):
+    body = await read_body(receive, limit=BATCH_MAX_CONTENT_LENGTH)
+    content_type = _header(scope, "content-type")
+    default_crop = _query_param(scope, "crop")
+    try:
+        if content_type.startswith(FRAMED_CONTENT_TYPE):
+            items = parse_framed(body, default_crop=default_crop)
+        else:
+            form, files = _parse_multipart(content_type, body)
+            items = parse_multipart(files, form, default_crop=default_crop)
+        return 200, await run_profiled(scope, headers, "batch", predict_plot, items)
+    except BatchRequestError as e:
+        raise HTTPError(400, {"error": str(e)})
+
+
+async def handle_profile_admin(scope, receive, method):
+    # {"requests": N, "tfTrace": true} profiles the next N prediction requests
+    if not profiler.enabled:
+        raise HTTPError(404, {"error": "Not found"})
+    if not profiler.authorized(_header(scope, "x-profile-token") or None):
+        raise HTTPError(403, {"error": "Forbidden"})
+    if method == "POST":
+        try:
+            data = json.loads(await read_body(receive) or b"{}")
+        except ValueError:
+            raise HTTPError(400, {"error": "Invalid JSON body"})
+        try:
+            return 200, profiler.arm(data.get("requests", 1), data.get("tfTrace", False))
+        except ValueError as e:
+            raise HTTPError(400, {"error": str(e)})
+    return 200, profiler.status()
+
+
+async def handle_predict_tiled(scope, receive):
+    params = {name: _query_param(scope, name) for name in ("crop", "stride", "backgroundStd")}
+    try:
+        options = options_from_params(params)
+    except ValueError as e:
+        raise HTTPError(400, {"error": str(e)})
+
+    image_bytes = extract_image(scope, await read_body(receive, limit=BATCH_MAX_CONTENT_LENGTH))
+    if not image_bytes:
+        raise HTTPError(400, {"error": "No image provided"})
+
+    result = await run_inference(predict_tiles, image_bytes, **options)
+    return (result.get("status", 500) if "error" in result else 200), result
+
+
+async def send_disease_info(scope, send, path):
+    parts = path.split("/")[3:]  # ASGI paths arrive percent-decoded
+    if not parts:
+        await send_json(send, 200, {"crops": disease_index.crops()})
+        return
+    if len(parts) != 2:
+        await send_json(send, 404, {"error": "Not found"})
+        return
+
+    try:
+        entry = disease_index.lookup(parts[0], parts[1], _query_param(scope, "lang") or "en")
+    except DiseaseInfoNotFound as e:
+        await send_json(send, 404, e.payload)
+        return
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if not_modified(_header(scope, "if-none-match"), entry.etag):
+        await send_bytes(send, 304, b"", headers=headers)
+    else:
+        await send_bytes(send, 200, entry.body, DISEASE_INFO_CONTENT_TYPE, headers)
+
+
+def stats():
+    return {
+        "batching": batcher.stats(),
+        "models": registry.stats(),
+        "cache": prediction_cache.stats(),
+        "admission": admission.stats(),
+        "diseaseInfo": disease_index.stats(),
+        "cascade": cascade_policy.stats(),
+    }
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                admission.ready = False
+                await asyncio.get_running_loop().run_in_executor(None, registry.prewarm_from_env, ["tomato"])
+                admission.ready = True
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                admission.ready = False
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    method, path = scope["method"], scope["path"].rstrip("/")
+    if method == "GET" and path == "/metrics":
+        await send_text(send, 200, metrics.render(), metrics.CONTENT_TYPE)
+        return
+    if method == "GET" and (path == "/api/disease-info" or path.startswith("/api/disease-info/")):
+        await send_disease_info(scope, send, path)
+        return
+
+    started = time.perf_counter()
+    headers = {}
+    try:
+        if method == "POST" and path == "/predict":
+            status, payload = await handle_predict_path(scope, receive, headers)
+        elif method == "POST" and path in ("/predict/batch", "/api/predict/batch"):
+            status, payload = await handle_predict_plot(scope, receive, headers)
+        elif method == "POST" and path in ("/predict/tiled", "/api/predict/tiled"):
+            status, payload = await handle_predict_tiled(scope, receive)
+        elif method == "POST" and path.startswith("/api/predict/"):
+            status, payload = await handle_predict_upload(scope, receive, headers, path.rsplit("/", 1)[-1].lower())
+        elif method in ("GET", "POST") and path == "/admin/profile":
+            status, payload = await handle_profile_admin(scope, receive, method)
+        elif method == "GET" and path in ("/stats", "/api/predict/stats"):
+            status, payload = 200, stats()
+        elif method == "GET" and path == "/healthz":
+            status, payload = (200 if admission.ready else 503), {"ready": admission.ready}
+        else:
+            status, payload = 404, {"error": "Not found"}
+        await send_json(send, status, payload, headers)
+        if status != 404:
+            # Label by route, not by path, so crop names don't multiply the series
+            endpoint = "/api/predict/<crop>" if path.startswith("/api/predict/") and path not in (
+                "/api/predict/batch", "/api/predict/tiled", "/api/predict/stats") else path
+            metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    except Overloaded as e:
+        await send_json(send, e.status, e.to_dict(), {"Retry-After": e.retry_after})
+    except HTTPError as e:
+        await send_json(send, e.status, e.payload, e.headers)
+    except Exception as e:
+        await send_json(send, 500, {"error": str(e)})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Async inference server")
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "6000")))
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is required for the async server: pip install -r requirements.txt")
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="info")
@@ -0,0 +1,223 @@
+"""
+Bulk/offline batch prediction
+
+Processes a whole field survey in one run: images come from a directory, a
+glob or a CSV/JSONL manifest (with an optional per-row crop). Images are
+decoded in a worker pool while the previous batch runs through the model, and
+one JSON line per image is written as soon as its batch completes. A model
+that fails to load or a batch that fails only turns those images into error
+lines; the rest of the survey still runs. Re-running with --resume skips
+(image, crop) pairs that already have a successful line in the output file,
+so failed images are retried (the last line for a pair wins).
+
+    python ml/batch_predict.py --input-dir survey/ --crop tomato --output results.jsonl
+    python ml/batch_predict.py --manifest survey.csv --output results.jsonl --resume
+"""
+
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from predict import check_model_files, format_prediction, load_crop_model, load_image_array, predict_batch
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff")
+
+
+def collect_inputs(input_dir=None, pattern=None, manifest=None, crop="tomato"):
+    """
+    Build the list of (image_path, crop) pairs to process
+
+    Args:
+        input_dir (str): Directory scanned recursively for images
+        pattern (str): Glob pattern (supports **)
+        manifest (str): CSV (columns: image[, crop]) or JSONL ({"image": ..., "crop": ...});
+            relative paths are resolved against the manifest's folder
+        crop (str): Crop used when a manifest row does not name one
+    """
+    items = []
+
+    if input_dir:
+        for root, _, files in sorted(os.walk(input_dir)):
+            for filename in sorted(files):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    items.append((os.path.join(root, filename), crop))
+
+    if pattern:
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            if os.path.isfile(path):
+                items.append((path, crop))
+
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r", newline="", encoding="utf-8") as f:
+            if manifest.lower().endswith((".jsonl", ".json")):
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                rows = list(csv.DictReader(f))
+
+        for row in rows:
+            path = row.get("image") or row.get("path")
+            if not path:
+                continue
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            items.append((path, row.get("crop") or crop))
+
+    return [(path, item_crop.lower()) for path, item_crop in items]
+
+
+def completed_images(output_path):
+    """
+    (image, crop) pairs that already have a successful result line in the
+    output file; error lines do not count, so those images are retried. A
+    partially written last line (interrupted run) is cut off so appending
+    stays valid JSONL.
+    """
+    if not output_path or not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+            data = data[:end]
+
+    done = set()
+    for line in data.splitlines():
+        try:
+            result = json.loads(line)
+        except ValueError:
+            continue
+        if "image" in result and "crop" in result and "error" not in result:
+            # Result lines carry the display name ("Tomato"), inputs the lowercase key
+            done.add((result["image"], result["crop"].lower()))
+    return done
+
+
+def _decode(path):
+    try:
+        return load_image_array(path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run(items, output_path=None, batch_size=64, workers=4, resume=False):
+    """
+    Predict every (image_path, crop) pair, streaming JSON lines to output_path (or stdout)
+
+    Returns:
+        dict with processed / skipped / errors counts and images per second
+    """
+    skipped = 0
+    if resume:
+        done = completed_images(output_path)
+        remaining = [item for item in items if item not in done]
+        skipped = len(items) - len(remaining)
+        items = remaining
+
+    # Group by crop so every batch goes through a single model
+    by_crop = {}
+    for path, crop in items:
+        by_crop.setdefault(crop, []).append(path)
+
+    out = open(output_path, "a", encoding="utf-8") if output_path else sys.stdout
+    processed = errors = 0
+    started = time.perf_counter()
+
+    def emit(line):
+        out.write(json.dumps(line) + "\n")
+
+    def fail(paths, crop, payload):
+        for path in paths:
+            emit({"image": path, "crop": crop, **payload})
+        out.flush()
+        return len(paths)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for crop, paths in by_crop.items():
+                missing = check_model_files(crop)
+                if missing:
+                    errors += fail(paths, crop, missing)
+                    continue
+
+                try:
+                    _, class_names = load_crop_model(crop)
+                except Exception as e:
+                    errors += fail(paths, crop, {"error": f"Failed to load model: {str(e)}"})
+                    continue
+                chunks = list(_chunks(paths, batch_size))
+
+                # Decode the next chunk in the pool while the current one is in the model
+                pending = [pool.submit(_decode, path) for path in chunks[0]] if chunks else []
+                for index, chunk in enumerate(chunks):
+                    decoded = [future.result() for future in pending]
+                    if index + 1 < len(chunks):
+                        pending = [pool.submit(_decode, path) for path in chunks[index + 1]]
+
+                    ok = [(path, x) for path, (x, err) in zip(chunk, decoded) if err is None]
+                    try:
+                        preds = predict_batch(crop, np.stack([x for _, x in ok])) if ok else []
+                    except Exception as e:
+                        errors += fail(chunk, crop, {"error": f"Prediction failed: {str(e)}"})
+                        continue
+                    results = {path: format_prediction(row, class_names, crop) for (path, _), row in zip(ok, preds)}
+
+                    for path, (_, err) in zip(chunk, decoded):
+                        if err is not None:
+                            emit({"image": path, "crop": crop, "error": f"Prediction failed: {err}"})
+                            errors += 1
+                        else:
+                            emit({"image": path, **results[path]})
+                            processed += 1
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "processed": processed,
+        "errors": errors,
+        "skipped": skipped,
+        "seconds": round(elapsed, 2),
+        "imagesPerSecond": round((processed + errors) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Predict a whole survey of images to a JSON-lines file")
+    parser.add_argument("--input-dir", type=str, help="Predict every image in this directory")
+    parser.add_argument("--glob", type=str, help="Predict every image matching this pattern")
+    parser.add_argument("--manifest", type=str, help="CSV (image,crop columns) or JSONL manifest of images")
+    parser.add_argument("--crop", type=str, default="tomato", help="Crop for images without one in the manifest")
+    parser.add_argument("--output", type=str, help="JSON-lines output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Images per forward pass")
+    parser.add_argument("--workers", type=int, default=4, help="Image decoding threads")
+    parser.add_argument("--resume", action="store_true", help="Skip images already predicted in --output")
+    args = parser.parse_args()
+
+    if not (args.input_dir or args.glob or args.manifest):
+        parser.error("one of --input-dir, --glob or --manifest is required")
+
+    items = collect_inputs(args.input_dir, args.glob, args.manifest, args.crop)
+    summary = run(items, args.output, batch_size=args.batch_size, workers=args.workers, resume=args.resume)
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Dynamic micro-batching for the Flask inference services
+
+Concurrent requests for the same crop are collected for up to `max_wait_ms`
+(or until `max_batch_size` images are waiting) and scored with a single
+batched forward pass, instead of running the model at batch size 1 for every
+HTTP request. Each caller gets back its own row of scores.
+"""
+
+import collections
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+import metrics
+
+
+class _Pending:
+    __slots__ = ("x", "future", "enqueued_at")
+
+    def __init__(self, x):
+        self.x = x
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Collect single-image requests per key (crop) and run them as one batch
+
+    Args:
+        predict_fn (callable): predict_fn(key, batch) -> array of per-row scores
+        max_batch_size (int): Run as soon as this many requests are waiting
+        max_wait_ms (float): Longest time the oldest request waits for company
+        stats_window (int): Number of recent batches kept for the latency stats
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0, stats_window=1000):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queues = collections.OrderedDict()  # key -> deque of _Pending
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Stats
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._size_counts = collections.Counter()
+        self._recent = collections.deque(maxlen=stats_window)  # (size, wait_ms, infer_ms)
+
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_env(cls, predict_fn):
+        """Build a batcher configured by BATCH_MAX_SIZE / BATCH_MAX_WAIT_MS."""
+        return cls(
+            predict_fn,
+            max_batch_size=int(os.environ.get("BATCH_MAX_SIZE", "16")),
+            max_wait_ms=float(os.environ.get("BATCH_MAX_WAIT_MS", "5")),
+        )
+
+    def submit(self, key, x):
+        """Queue one (H, W, C) input for `key` and return a Future for its scores."""
+        pending = _Pending(x)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queues.setdefault(key, collections.deque()).append(pending)
+            self._cond.notify()
+        return pending.future
+
+    def predict(self, key, x, timeout=None):
+        """Queue one input and block until its scores are ready."""
+        return self.submit(key, x).result(timeout=timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    def _next_batch(self):
+        """Wait until some key has a full batch or its oldest request has waited long enough."""
+        with self._cond:
+            while True:
+                if self._closed and not self._queues:
+                    return None, None
+
+                if not self._queues:
+                    self._cond.wait()
+                    continue
+
+                # Serve the key whose oldest request has been waiting longest
+                key, queue = min(self._queues.items(), key=lambda kv: kv[1][0].enqueued_at)
+                deadline = queue[0].enqueued_at + self.max_wait
+                remaining = deadline - time.perf_counter()
+
+                if len(queue) >= self.max_batch_size or remaining <= 0 or self._closed:
+                    items = [queue.popleft() for _ in range(min(len(queue), self.max_batch_size))]
+                    if not queue:
+                        del self._queues[key]
+                    return key, items
+
+                self._cond.wait(remaining)
+
+    def _run(self):
+        while True:
+            key, items = self._next_batch()
+            if items is None:
+                return
+
+            started = time.perf_counter()
+            wait_ms = (started - items[0].enqueued_at) * 1000
+            try:
+                preds = self.predict_fn(key, np.stack([item.x for item in items]))
+                if len(preds) != len(items):
+                    # zip would silently leave the extra callers waiting forever
+                    raise RuntimeError(f"predict_fn returned {len(preds)} rows for a batch of {len(items)}")
+            except Exception as e:
+                for item in items:
+                    item.future.set_exception(e)
+                with self._stats_lock:
+                    self._errors += 1
+                continue
+            infer_ms = (time.perf_counter() - started) * 1000
+
+            for item, row in zip(items, preds):
+                item.future.set_result(row)
+
+            metrics.BATCH_SIZE.observe(len(items), crop=key)
+            for item in items:
+                metrics.BATCH_QUEUE_WAIT_SECONDS.observe(started - item.enqueued_at)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(items)
+                self._size_counts[len(items)] += 1
+                self._recent.append((len(items), wait_ms, infer_ms))
+
+    def stats(self):
+        """Batch size and latency stats, for tuning max_wait_ms / max_batch_size."""
+        with self._stats_lock:
+            recent = list(self._recent)
+            stats = {
+                "maxBatchSize": self.max_batch_size,
+                "maxWaitMs": self.max_wait * 1000,
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avgBatchSize": round(self._items / self._batches, 2) if self._batches else 0,
+                "batchSizeCounts": dict(sorted(self._size_counts.items())),
+            }
+
+        if recent:
+            sizes, waits, infers = (np.array(col, dtype=float) for col in zip(*recent))
+            stats["recent"] = {
+                "batches": len(recent),
+                "avgBatchSize": round(float(sizes.mean()), 2),
+                "queueWaitMs": _percentiles(waits),
+                "inferenceMs": _percentiles(infers),
+                "inferenceMsPerItem": round(float(infers.sum() / sizes.sum()), 3),
+            }
+        return stats
+
+
+def _percentiles(values):
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(values.max()), 3),
+    }
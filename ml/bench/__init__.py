@@ -0,0 +1,12 @@
+"""
+Serving benchmarks for predict_image, ml/server.py and backend/app.py
+
+    images.py   synthetic leaf JPEGs at phone camera resolutions
+    stages.py   single-image latency split into read / decode / preprocess / inference / postprocess
+    load.py     closed- and open-loop HTTP load against locally started servers
+    report.py   percentiles, the JSON report and the report diff
+
+Run with:
+    python ml/bench run --output bench/report.json
+    python ml/bench compare before.json after.json
+"""
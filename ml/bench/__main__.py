@@ -0,0 +1,165 @@
+"""
+Benchmark command line
+
+    python ml/bench images                              # generate the synthetic JPEGs
+    python ml/bench run --output bench/report.json      # stages + load against ml/server.py
+    python ml/bench run --targets ml backend --concurrency 1 2 4 8 --rates 1 2 5
+    python ml/bench run --no-stages --url ml=http://10.0.0.5:6000
+    python ml/bench compare before.json after.json --threshold 5
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Run as `python ml/bench`: make ml/ importable (predict.py, image_io.py, bench.*)
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ML_DIR not in sys.path:
+    sys.path.insert(0, ML_DIR)
+
+from bench import images as bench_images  # noqa: E402
+from bench.report import compare, environment, write_report  # noqa: E402
+
+DEFAULT_IMAGE_DIR = os.path.join(ML_DIR, "cache", "bench", "images")
+TARGET_NAMES = ("ml", "backend")  # see bench.load.TARGETS (imported lazily, it needs requests)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def cmd_images(args):
+    generated = bench_images.generate(args.image_dir, args.per_resolution, args.resolutions)
+    for resolution, paths in generated.items():
+        print(f"   {resolution}: {len(paths)} images")
+    print(f"💾 Benchmark images in: {args.image_dir}")
+
+
+def cmd_run(args):
+    from bench import load
+
+    # Build the targets first, so an unsupported crop fails before any measuring
+    urls = dict(item.split("=", 1) for item in args.url)
+    try:
+        targets = [
+            load.TARGETS[name](crop=args.crop, **({"url": urls[name]} if name in urls else {}))
+            for name in args.targets
+        ]
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+
+    images = bench_images.generate(args.image_dir, args.per_resolution, args.resolutions)
+    report = {
+        "environment": environment(),
+        "config": {
+            "crop": args.crop,
+            "backend": args.backend,
+            "resolutions": list(images),
+            "imagesPerResolution": args.per_resolution,
+            "concurrency": args.concurrency,
+            "rates": args.rates,
+            "durationSeconds": args.duration,
+        },
+        "results": {},
+    }
+
+    if not args.no_stages:
+        from bench import stages
+
+        print(f"🔧 Measuring single-image stages ({args.crop})...", flush=True)
+        report["results"]["stages"] = stages.measure(images, args.crop, args.repeats, args.backend)
+        for resolution, result in report["results"]["stages"].items():
+            if isinstance(result, dict):
+                print(f"   {resolution}: " + ", ".join(
+                    f"{stage} {result[stage]['p50']:.1f}" for stage in stages.STAGES
+                ) + " ms (p50)", flush=True)
+
+    upload_images = [
+        (path, _read(path))
+        for resolution in images for path in images[resolution]
+    ]
+    for name, target in zip(args.targets, targets):
+        proc = None
+        if name not in urls:
+            print(f"🔧 Starting {name} server...", flush=True)
+            proc = load.start_server(target)
+        try:
+            report["results"][name] = load.run(target, upload_images, args.concurrency, args.rates, args.duration)
+        finally:
+            if proc is not None:
+                load.stop_server(proc)
+
+    if args.output:
+        write_report(report, args.output)
+        print(f"💾 Report saved to: {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def cmd_compare(args):
+    with open(args.before, "r") as f:
+        before = json.load(f)
+    with open(args.after, "r") as f:
+        after = json.load(f)
+
+    rows = compare(before, after, args.threshold)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        width = max((len(row["metric"]) for row in rows), default=10)
+        print(f"{'metric':<{width}}  {'before':>12}  {'after':>12}  {'change':>8}")
+        for row in rows:
+            marker = {"better": "✅", "worse": "❌"}.get(row["verdict"], "  ")
+            print(f"{row['metric']:<{width}}  {row['before']:>12}  {row['after']:>12}  "
+                  f"{row['changePercent']:>+7.1f}% {marker}")
+
+    if args.fail_on_regression and any(row["verdict"] == "worse" for row in rows):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python ml/bench", description="Serving benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_image_args(p):
+        p.add_argument("--image-dir", type=str, default=DEFAULT_IMAGE_DIR)
+        p.add_argument("--per-resolution", type=int, default=4)
+        p.add_argument("--resolutions", nargs="*", choices=list(bench_images.PHONE_RESOLUTIONS),
+                       help="Phone resolutions to generate (default: all)")
+
+    p = sub.add_parser("images", help="Generate synthetic leaf JPEGs")
+    add_image_args(p)
+    p.set_defaults(func=cmd_images)
+
+    p = sub.add_parser("run", help="Run the benchmarks and write a report")
+    add_image_args(p)
+    p.add_argument("--crop", type=str, default="tomato")
+    p.add_argument("--backend", type=str, default=None, help="Model backend for the stage benchmark")
+    p.add_argument("--repeats", type=int, default=5, help="Stage benchmark passes per resolution")
+    p.add_argument("--no-stages", action="store_true", help="Skip the in-process stage benchmark")
+    p.add_argument("--targets", nargs="*", default=["ml"], choices=TARGET_NAMES,
+                   help="Servers to load (default: ml)")
+    p.add_argument("--url", action="append", default=[],
+                   help="target=URL of an already running server, instead of starting one")
+    p.add_argument("--concurrency", nargs="*", type=int, default=[1, 2, 4, 8])
+    p.add_argument("--rates", nargs="*", type=float, default=[1, 2, 5], help="Open-loop requests/sec")
+    p.add_argument("--duration", type=float, default=10.0, help="Seconds per load level")
+    p.add_argument("--output", type=str, help="Report path (default: print to stdout)")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("compare", help="Diff two reports")
+    p.add_argument("before")
+    p.add_argument("after")
+    p.add_argument("--threshold", type=float, default=5.0, help="%% change reported as better/worse")
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any metric got worse")
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Synthetic leaf photos for benchmarking
+
+The images only need to cost what a real upload costs: phone camera
+resolution, JPEG entropy from texture and noise, and a leaf-like subject.
+They are generated deterministically from a seed, so every run (and every
+commit being compared) decodes the same bytes.
+"""
+
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+# Typical sizes of field photos we receive: 12 MP and 8 MP phone cameras,
+# then the re-encoded sizes messaging apps produce
+PHONE_RESOLUTIONS = {
+    "12mp": (4032, 3024),
+    "8mp": (3264, 2448),
+    "2mp": (1600, 1200),
+    "messaging": (1280, 960),
+}
+
+
+def synthetic_leaf(width, height, seed=0):
+    """A green leaf with veins and brown lesions on a soil-coloured background."""
+    rng = np.random.default_rng(seed)
+
+    # Soil background with a vertical gradient
+    gradient = np.linspace(0.8, 1.1, height, dtype=np.float32)[:, None, None]
+    background = np.array([96, 72, 48], dtype=np.float32) * gradient * np.ones((1, width, 1), dtype=np.float32)
+    img = Image.fromarray(np.clip(background, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+
+    # Leaf body, slightly off-centre
+    cx = width * rng.uniform(0.4, 0.6)
+    cy = height * rng.uniform(0.4, 0.6)
+    rx, ry = width * rng.uniform(0.28, 0.36), height * rng.uniform(0.3, 0.4)
+    draw.ellipse((cx - rx, cy - ry, cx + rx, cy + ry), fill=(52, 128, 44))
+
+    # Midrib and side veins
+    line_width = max(2, width // 400)
+    draw.line((cx - rx * 0.95, cy, cx + rx * 0.95, cy), fill=(120, 170, 90), width=line_width * 2)
+    for t in np.linspace(-0.8, 0.8, 9):
+        x = cx + rx * t
+        draw.line((x, cy, x + rx * 0.25, cy - ry * 0.7), fill=(100, 160, 80), width=line_width)
+        draw.line((x, cy, x + rx * 0.25, cy + ry * 0.7), fill=(100, 160, 80), width=line_width)
+
+    # Lesions: brown spots with a yellow halo
+    for _ in range(int(rng.integers(3, 15))):
+        angle = rng.uniform(0, 2 * np.pi)
+        distance = rng.uniform(0, 0.8)
+        lx = cx + np.cos(angle) * rx * distance
+        ly = cy + np.sin(angle) * ry * distance
+        r = min(width, height) * rng.uniform(0.01, 0.04)
+        draw.ellipse((lx - r * 1.5, ly - r * 1.5, lx + r * 1.5, ly + r * 1.5), fill=(190, 180, 60))
+        draw.ellipse((lx - r, ly - r, lx + r, ly + r), fill=(110, 70, 30))
+
+    img = img.filter(ImageFilter.GaussianBlur(radius=max(1, width // 1500)))
+
+    # Sensor noise gives the JPEG realistic entropy (flat colours compress unrealistically well)
+    pixels = np.asarray(img, dtype=np.int16)
+    pixels = pixels + rng.integers(-12, 13, size=pixels.shape, dtype=np.int16)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def generate(out_dir, per_resolution=4, resolutions=None, quality=90):
+    """
+    Write (or reuse) the benchmark JPEGs
+
+    Args:
+        out_dir (str): Output folder
+        per_resolution (int): Images per resolution
+        resolutions (list): Keys of PHONE_RESOLUTIONS (default: all)
+        quality (int): JPEG quality, phone cameras save at roughly 85-95
+
+    Returns:
+        {resolution: [paths]}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    images = {}
+    for name in resolutions or PHONE_RESOLUTIONS:
+        width, height = PHONE_RESOLUTIONS[name]
+        paths = []
+        for i in range(per_resolution):
+            path = os.path.join(out_dir, f"leaf_{name}_{i}.jpg")
+            if not os.path.exists(path):
+                tmp_path = path + ".tmp"
+                synthetic_leaf(width, height, seed=i).save(tmp_path, format="JPEG", quality=quality)
+                os.replace(tmp_path, path)
+            paths.append(path)
+        images[name] = paths
+    return images
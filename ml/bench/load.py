@@ -0,0 +1,226 @@
+"""
+HTTP load against the inference servers
+
+    closed loop   N clients, each sending its next request as soon as the
+                  previous one returns: peak throughput at a given concurrency
+    open loop     requests arrive on a Poisson schedule at a fixed rate,
+                  independent of how fast the server answers; latency is
+                  measured from the scheduled arrival, so a slow server
+                  can't hide its queueing (no coordinated omission)
+
+Servers are started locally (with the prediction cache off, so repeated
+benchmark images still hit the model) unless a URL is given.
+"""
+
+import abc
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench.report import percentiles
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(os.path.dirname(ML_DIR), "backend")
+
+
+class Target(abc.ABC):
+    """An endpoint to load: how to start it and how to send one image."""
+
+    # Crops the server has a route for (None = any supported crop)
+    crops = None
+
+    def __init__(self, name, script, url, ready_path, crop="tomato"):
+        if self.crops is not None and crop not in self.crops:
+            raise ValueError(f"The {name} target only serves {', '.join(self.crops)}, not {crop}")
+        self.name = name
+        self.script = script
+        self.url = url
+        self.ready_path = ready_path
+        self.crop = crop
+
+    @abc.abstractmethod
+    def send(self, session, path, image_bytes, timeout):
+        """POST one image and return the requests.Response."""
+
+
+class MLServerTarget(Target):
+    """ml/server.py: JSON body with a path on the server's filesystem."""
+
+    def __init__(self, url="http://127.0.0.1:6000", crop="tomato"):
+        super().__init__("ml", os.path.join(ML_DIR, "server.py"), url, "/stats", crop)
+
+    def send(self, session, path, image_bytes, timeout):
+        return session.post(f"{self.url}/predict", json={"imagePath": path, "crop": self.crop}, timeout=timeout)
+
+
+class BackendTarget(Target):
+    """backend/app.py: multipart upload of the image bytes."""
+
+    # backend/app.py only has /api/predict/tomato; other crops would benchmark 404s
+    crops = ("tomato",)
+
+    def __init__(self, url="http://127.0.0.1:5000", crop="tomato"):
+        super().__init__("backend", os.path.join(BACKEND_DIR, "app.py"), url, "/api/predict/stats", crop)
+
+    def send(self, session, path, image_bytes, timeout):
+        files = {"image": (os.path.basename(path), image_bytes, "image/jpeg")}
+        return session.post(f"{self.url}/api/predict/{self.crop}", files=files, timeout=timeout)
+
+
+TARGETS = {"ml": MLServerTarget, "backend": BackendTarget}
+
+
+def start_server(target, startup_timeout=300):
+    """Start the target's server in its own process group and wait until it answers."""
+    env = dict(os.environ, PREDICTION_CACHE_SIZE="0", PYTHONUNBUFFERED="1")
+    proc = subprocess.Popen(
+        [sys.executable, target.script], cwd=os.path.dirname(target.script), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{target.name} server exited with status {proc.returncode}")
+        try:
+            if requests.get(target.url + target.ready_path, timeout=2).ok:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    stop_server(proc)
+    raise RuntimeError(f"{target.name} server did not become ready in {startup_timeout}s")
+
+
+def stop_server(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=10)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+class _Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+
+    def record(self, latency_ms, status):
+        with self.lock:
+            if status == 200:
+                self.latencies.append(latency_ms)
+            if status is None:
+                self.errors += 1
+            else:
+                self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+
+    def result(self, elapsed):
+        return {
+            "seconds": round(elapsed, 2),
+            "ok": len(self.latencies),
+            "statuses": self.statuses,
+            "transportErrors": self.errors,
+            "throughput": round(len(self.latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latencyMs": percentiles(self.latencies),
+        }
+
+
+def _send(target, session, image, timeout):
+    try:
+        return target.send(session, image[0], image[1], timeout).status_code
+    except requests.RequestException:
+        return None
+
+
+def closed_loop(target, images, concurrency, duration, timeout=60):
+    """`concurrency` clients sending back to back for `duration` seconds."""
+    recorder = _Recorder()
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        session = requests.Session()
+        i = index
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = _send(target, session, images[i % len(images)], timeout)
+            recorder.record((time.perf_counter() - started) * 1000, status)
+            i += concurrency
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.result(time.perf_counter() - started)
+
+
+def open_loop(target, images, rate, duration, max_outstanding=256, timeout=60, seed=0):
+    """Poisson arrivals at `rate` requests/sec for `duration` seconds."""
+    recorder = _Recorder()
+    rng = random.Random(seed)
+    local = threading.local()
+    dropped = 0
+
+    def fire(image, scheduled):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        status = _send(target, local.session, image, timeout)
+        recorder.record((time.perf_counter() - scheduled) * 1000, status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_outstanding) as pool:
+        scheduled, i = started, 0
+        outstanding = []
+        while scheduled < started + duration:
+            now = time.perf_counter()
+            if scheduled > now:
+                time.sleep(scheduled - now)
+            outstanding = [f for f in outstanding if not f.done()]
+            if len(outstanding) >= max_outstanding:
+                dropped += 1  # client saturated: count it instead of silently slowing the schedule
+            else:
+                outstanding.append(pool.submit(fire, images[i % len(images)], scheduled))
+            i += 1
+            scheduled += rng.expovariate(rate)
+
+    result = recorder.result(time.perf_counter() - started)
+    result["offeredRate"] = rate
+    result["clientDropped"] = dropped
+    return result
+
+
+def run(target, images, concurrency_levels, rates, duration):
+    """
+    Throughput curves for one target
+
+    Returns:
+        {"closedLoop": {"c<N>": result}, "openLoop": {"r<rate>": result}}
+    """
+    # Warm up (model load, first inference) before measuring
+    session = requests.Session()
+    for image in images[:3]:
+        _send(target, session, image, timeout=300)
+
+    results = {"closedLoop": {}, "openLoop": {}}
+    for concurrency in concurrency_levels:
+        result = closed_loop(target, images, concurrency, duration)
+        results["closedLoop"][f"c{concurrency}"] = result
+        print(f"   {target.name} closed loop c={concurrency}: {result['throughput']} req/s, "
+              f"p99 {result['latencyMs'].get('p99', '-')} ms", flush=True)
+    for rate in rates:
+        result = open_loop(target, images, rate, duration)
+        results["openLoop"][f"r{rate:g}"] = result
+        print(f"   {target.name} open loop {rate:g} req/s: {result['throughput']} req/s, "
+              f"p99 {result['latencyMs'].get('p99', '-')} ms", flush=True)
+    return results
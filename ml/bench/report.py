@@ -0,0 +1,121 @@
+"""
+Benchmark report: percentiles, environment, JSON output and diffing
+
+Reports are plain JSON with nested dicts keyed by stage / target /
+concurrency, so two reports from different commits can be compared leaf by
+leaf with `python ml/bench compare before.json after.json`.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configuration knobs recorded with every report, so diffs explain themselves
+ENV_KNOBS = (
+    "MODEL_FORMAT", "TFLITE_VARIANT", "TFLITE_NUM_THREADS", "BATCH_MAX_SIZE", "BATCH_MAX_WAIT_MS",
+    "MAX_IN_FLIGHT", "MAX_QUEUE", "MODEL_BUDGET_MB", "IMAGE_DRAFT_DECODE", "PREDICTION_CACHE_SIZE",
+)
+
+
+def percentiles(values):
+    """count / mean / p50 / p95 / p99 / max of a list of latencies (ms)."""
+    if not values:
+        return {"count": 0}
+    values = np.asarray(values, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(values.size),
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=SCRIPT_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {
+        "gitCommit": _git("rev-parse", "--short", "HEAD"),
+        "gitDirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "env": {name: os.environ[name] for name in ENV_KNOBS if name in os.environ},
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def flatten(report, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1}, numeric leaves only."""
+    flat = {}
+    for key, value in report.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def _higher_is_better(path):
+    leaf = path.rsplit(".", 1)[-1]
+    return leaf == "throughput" or "PerSecond" in leaf
+
+
+def _comparable(path):
+    # Latency and throughput figures; counts and config values are not worth diffing
+    leaf = path.rsplit(".", 1)[-1]
+    return leaf in ("mean", "p50", "p95", "p99", "max", "throughput", "coldStartMs") or "PerSecond" in leaf
+
+
+def compare(before, after, threshold=5.0):
+    """
+    Diff two reports
+
+    Args:
+        threshold (float): % change counted as a regression / improvement
+
+    Returns:
+        list of {metric, before, after, changePercent, verdict} for metrics in both reports
+    """
+    old, new = flatten(before.get("results", before)), flatten(after.get("results", after))
+    rows = []
+    for path in sorted(set(old) & set(new)):
+        if not _comparable(path) or not old[path]:
+            continue
+        change = (new[path] - old[path]) / abs(old[path]) * 100
+        better = change > 0 if _higher_is_better(path) else change < 0
+        verdict = "same"
+        if abs(change) >= threshold:
+            verdict = "better" if better else "worse"
+        rows.append({
+            "metric": path,
+            "before": old[path],
+            "after": new[path],
+            "changePercent": round(change, 1),
+            "verdict": verdict,
+        })
+    return rows
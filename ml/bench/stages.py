@@ -0,0 +1,74 @@
+"""
+Single-image latency, stage by stage
+
+Runs the same steps as predict_image (without the prediction cache or the
+micro-batcher, which would hide the per-image cost) and times each:
+
+    read         file -> bytes
+    decode       JPEG decode (scale-on-decode when enabled, see image_io.py)
+    preprocess   RGB conversion, resize, uint8 array, batch dimension
+    inference    model forward pass
+    postprocess  scores -> {disease, confidence, severity} payload
+"""
+
+import time
+
+import numpy as np
+
+from image_io import load_image
+from predict import format_prediction, get_registry, load_crop_model, predict_batch
+from bench.report import percentiles
+
+STAGES = ("read", "decode", "preprocess", "inference", "postprocess", "total")
+
+
+def _run_once(path, crop, class_names, backend=None):
+    timings = {}
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        image_bytes = f.read()
+    timings["read"] = (time.perf_counter() - started) * 1000
+
+    x = load_image(image_bytes, timings=timings)
+    batch_started = time.perf_counter()
+    batch = np.expand_dims(x, axis=0)
+    timings["preprocess"] += (time.perf_counter() - batch_started) * 1000
+
+    t = time.perf_counter()
+    preds = predict_batch(crop, batch, backend)
+    timings["inference"] = (time.perf_counter() - t) * 1000
+
+    t = time.perf_counter()
+    format_prediction(preds[0], class_names, crop)
+    timings["postprocess"] = (time.perf_counter() - t) * 1000
+
+    timings["total"] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def measure(images, crop="tomato", repeats=5, backend=None):
+    """
+    Time every stage for each image resolution
+
+    Args:
+        images (dict): {resolution: [paths]} from images.generate
+        repeats (int): Passes over each resolution's images
+
+    Returns:
+        {"coldStartMs": ..., resolution: {stage: percentiles}}
+    """
+    get_registry(backend).evict(crop)
+    started = time.perf_counter()
+    _, class_names = load_crop_model(crop, backend)
+    first_path = next(iter(images.values()))[0]
+    _run_once(first_path, crop, class_names, backend)
+    results = {"coldStartMs": round((time.perf_counter() - started) * 1000, 1)}
+
+    for resolution, paths in images.items():
+        samples = {stage: [] for stage in STAGES}
+        for _ in range(repeats):
+            for path in paths:
+                for stage, ms in _run_once(path, crop, class_names, backend).items():
+                    samples[stage].append(ms)
+        results[resolution] = {stage: percentiles(values) for stage, values in samples.items()}
+    return results
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Disease database builder
+
+The treatment database is edited as one source shard per crop and published
+as build artifacts:
+
+    ml/disease_db/src/<crop>.json     source shards: {"crop": "Tomato", "diseases": {...}}
+    ml/disease_db/crops/<crop>.json   published per-crop file, for consumers that only need one crop
+    ml/disease_database.json          published combined database (backend/routes/diseaseInfo.js,
+                                      disease_info.py)
+    ml/disease_db/manifest.json       shard and output hashes from the last build
+
+Every disease must have name, description, treatment, prevention and
+organicSolution in every language (LANGUAGES); optional fields are type-checked.
+Only shards whose hash changed since the last build are validated and their
+per-crop file rewritten. Every file is published with write-to-temp plus
+os.replace, so readers see either the old or the new file, never a partial
+one. A shard that fails validation stops the build before anything is
+published.
+
+Usage:
+    python ml/build_disease_db.py             # incremental build
+    python ml/build_disease_db.py --check     # validate every shard, publish nothing
+    python ml/build_disease_db.py --force     # rebuild every shard
+    python ml/build_disease_db.py --split     # create source shards from the current disease_database.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+from disease_info import normalize_key
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_DIR = os.path.join(SCRIPT_DIR, "disease_db")
+SRC_DIR = os.path.join(DB_DIR, "src")
+CROPS_DIR = os.path.join(DB_DIR, "crops")
+MANIFEST_PATH = os.path.join(DB_DIR, "manifest.json")
+COMBINED_PATH = os.path.join(SCRIPT_DIR, "disease_database.json")
+
+FORMAT_VERSION = 1
+LANGUAGES = ("en", "hi", "mr")
+
+# Field -> expected value type in each language ("text" = non-empty string, "list" = non-empty list of strings)
+REQUIRED_LOCALIZED = {
+    "name": "text",
+    "description": "text",
+    "treatment": "list",
+    "prevention": "list",
+    "organicSolution": "list",
+}
+OPTIONAL_LOCALIZED = {
+    "causes": "list",
+    "treatmentSources": "list",
+    "emergencyContact": "text",
+}
+
+
+def shard_name(crop):
+    """'Cherry_(including_sour)' -> 'cherry_including_sour' (the disease_info.py lookup key)."""
+    return normalize_key(crop)
+
+
+def _check_value(value, kind):
+    if kind == "text":
+        return isinstance(value, str) and value.strip() != ""
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(v, str) and v.strip() for v in value)
+
+
+def _check_localized(errors, where, field, value, kind):
+    if not isinstance(value, dict):
+        errors.append(f"{where}: {field} must map language -> {kind}")
+        return
+    for lang in LANGUAGES:
+        if lang not in value:
+            errors.append(f"{where}: {field}.{lang} missing")
+        elif not _check_value(value[lang], kind):
+            errors.append(f"{where}: {field}.{lang} must be a non-empty {'string' if kind == 'text' else 'list of strings'}")
+
+
+def validate_disease(where, entry):
+    """Schema errors for one disease entry (empty list when valid)."""
+    if not isinstance(entry, dict):
+        return [f"{where}: entry must be an object"]
+
+    errors = []
+    for field, kind in REQUIRED_LOCALIZED.items():
+        if field not in entry:
+            errors.append(f"{where}: {field} missing")
+        else:
+            _check_localized(errors, where, field, entry[field], kind)
+
+    for field, kind in OPTIONAL_LOCALIZED.items():
+        if field in entry:
+            _check_localized(errors, where, field, entry[field], kind)
+
+    if "severity" in entry and not isinstance(entry["severity"], str):
+        errors.append(f"{where}: severity must be a string")
+    if "affectedParts" in entry and not (
+        isinstance(entry["affectedParts"], list) and all(isinstance(p, str) for p in entry["affectedParts"])
+    ):
+        errors.append(f"{where}: affectedParts must be a list of strings")
+
+    if "doAndDont" in entry:
+        do_and_dont = entry["doAndDont"]
+        if not isinstance(do_and_dont, dict) or set(do_and_dont) != {"do", "dont"}:
+            errors.append(f"{where}: doAndDont must have exactly 'do' and 'dont'")
+        else:
+            for part in ("do", "dont"):
+                _check_localized(errors, where, f"doAndDont.{part}", do_and_dont[part], "list")
+
+    # diseaseInfo.js pairs treatment[i] with treatmentSources[i]
+    sources, treatment = entry.get("treatmentSources"), entry.get("treatment")
+    if isinstance(sources, dict) and isinstance(treatment, dict):
+        for lang in LANGUAGES:
+            if isinstance(sources.get(lang), list) and isinstance(treatment.get(lang), list) \
+                    and len(sources[lang]) > len(treatment[lang]):
+                errors.append(f"{where}: treatmentSources.{lang} has more entries than treatment.{lang}")
+
+    return errors
+
+
+def validate_shard(shard, file_name):
+    """Schema errors for one parsed source shard."""
+    if not isinstance(shard, dict) or not isinstance(shard.get("crop"), str) \
+            or not isinstance(shard.get("diseases"), dict):
+        return [f"{file_name}: shard must be {{\"crop\": str, \"diseases\": {{...}}}}"]
+    if shard_name(shard["crop"]) + ".json" != file_name:
+        return [f"{file_name}: crop {shard['crop']!r} belongs in {shard_name(shard['crop'])}.json"]
+    if not shard["diseases"]:
+        return [f"{file_name}: no diseases"]
+
+    errors, seen = [], {}
+    for disease, entry in shard["diseases"].items():
+        key = shard_name(disease)
+        if key in seen:
+            errors.append(f"{shard['crop']}: {disease!r} and {seen[key]!r} collide after normalization")
+        seen[key] = disease
+        errors.extend(validate_disease(f"{shard['crop']}/{disease}", entry))
+    return errors
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _dump(data, compact=False):
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return (json.dumps(data, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
+def atomic_write(path, data):
+    """Write bytes to path via a temp file in the same folder and os.replace."""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _file_sha256(path):
+    try:
+        with open(path, "rb") as f:
+            return _sha256(f.read())
+    except OSError:
+        return None
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"shards": {}}
+    if manifest.get("formatVersion") != FORMAT_VERSION or list(manifest.get("languages", [])) != list(LANGUAGES):
+        return {"shards": {}}  # schema changed: everything is stale
+    return manifest
+
+
+def build(force=False, check_only=False):
+    """
+    Validate changed shards and publish the per-crop and combined files
+
+    Args:
+        force (bool): Treat every shard as changed
+        check_only (bool): Validate every shard and publish nothing
+
+    Returns:
+        summary dict (built / unchanged / removed crops, errors)
+    """
+    manifest = {"shards": {}} if force or check_only else load_manifest()
+    previous = manifest.get("shards", {})
+
+    files = sorted(f for f in os.listdir(SRC_DIR) if f.endswith(".json")) if os.path.isdir(SRC_DIR) else []
+    if not files:
+        return {"errors": [f"No source shards in {SRC_DIR} (run with --split to create them)"]}
+
+    shards, changed, errors = {}, [], []
+    for file_name in files:
+        name = file_name[:-len(".json")]
+        with open(os.path.join(SRC_DIR, file_name), "rb") as f:
+            raw = f.read()
+        digest = _sha256(raw)
+        output_path = os.path.join(CROPS_DIR, file_name)
+
+        entry = previous.get(name)
+        unchanged = entry is not None and entry.get("sha256") == digest \
+            and _file_sha256(output_path) == entry.get("outputSha256")
+
+        try:
+            shard = json.loads(raw.decode("utf-8"))
+        except ValueError as e:
+            errors.append(f"{file_name}: invalid JSON ({e})")
+            continue
+        if not unchanged:
+            shard_errors = validate_shard(shard, file_name)
+            if shard_errors:
+                errors.extend(shard_errors)
+                continue
+            changed.append(name)
+        shards[name] = (shard, digest)
+
+    crops = {}
+    for name, (shard, _) in shards.items():
+        if shard["crop"] in crops:
+            errors.append(f"{name}.json: crop {shard['crop']!r} defined twice")
+        crops[shard["crop"]] = name
+
+    removed = sorted(set(previous) - set(shards))
+    summary = {"built": changed, "unchanged": sorted(set(shards) - set(changed)), "removed": removed, "errors": errors}
+    if errors or check_only:
+        return summary
+
+    new_manifest = {"formatVersion": FORMAT_VERSION, "languages": list(LANGUAGES), "shards": {}}
+    for name, (shard, digest) in shards.items():
+        output_path = os.path.join(CROPS_DIR, name + ".json")
+        if name in changed:
+            body = _dump({shard["crop"]: shard["diseases"]}, compact=True)
+            atomic_write(output_path, body)
+            output_digest = _sha256(body)
+        else:
+            output_digest = previous[name]["outputSha256"]
+        new_manifest["shards"][name] = {
+            "crop": shard["crop"],
+            "diseases": len(shard["diseases"]),
+            "sha256": digest,
+            "outputSha256": output_digest,
+        }
+
+    for name in removed:
+        try:
+            os.remove(os.path.join(CROPS_DIR, name + ".json"))
+        except OSError:
+            pass
+
+    # Shards are sorted by file name, so the combined file is deterministic
+    combined = _dump({shard["crop"]: shard["diseases"] for shard, _ in shards.values()})
+    combined_digest = _sha256(combined)
+    if _file_sha256(COMBINED_PATH) != combined_digest:
+        atomic_write(COMBINED_PATH, combined)
+        summary["combinedWritten"] = True
+    new_manifest["combinedSha256"] = combined_digest
+
+    # Manifest last: if the build dies before this, the next run redoes the work
+    atomic_write(MANIFEST_PATH, _dump(new_manifest))
+    return summary
+
+
+def split(force=False):
+    """Create source shards from the current combined database (one-off migration)."""
+    with open(COMBINED_PATH, "r", encoding="utf-8") as f:
+        database = json.load(f)
+
+    written = []
+    for crop, diseases in database.items():
+        path = os.path.join(SRC_DIR, shard_name(crop) + ".json")
+        if os.path.exists(path) and not force:
+            continue
+        atomic_write(path, _dump({"crop": crop, "diseases": diseases}))
+        written.append(os.path.basename(path))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the disease database from per-crop shards")
+    parser.add_argument("--check", action="store_true", help="Validate every shard without publishing")
+    parser.add_argument("--force", action="store_true", help="Rebuild every shard (with --split: overwrite shards)")
+    parser.add_argument("--split", action="store_true",
+                        help="Create source shards from the current disease_database.json")
+    args = parser.parse_args()
+
+    if args.split:
+        written = split(force=args.force)
+        print(f"✅ Wrote {len(written)} shard(s) to {SRC_DIR}")
+        for file_name in written:
+            print(f"   🌾 {file_name}")
+        return
+
+    summary = build(force=args.force, check_only=args.check)
+    if summary["errors"]:
+        print(f"❌ {len(summary['errors'])} problem(s), nothing published:", file=sys.stderr)
+        for error in summary["errors"]:
+            print(f"   - {error}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.check:
+        print(f"✅ {len(summary['built'])} shard(s) valid")
+        return
+
+    print(f"✅ Disease database built: {len(summary['built'])} rebuilt, "
+          f"{len(summary['unchanged'])} unchanged, {len(summary['removed'])} removed")
+    for name in summary["built"]:
+        print(f"   🌾 {name}")
+    if summary.get("combinedWritten"):
+        print(f"📦 Published {COMBINED_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Confidence-gated model cascade
+
+Most uploads are clear-cut, and the distilled student (distill.py) reaches
+the same answer as the full crop model at a fraction of the cost. With the
+cascade on, predict_image runs the student first. Only when the student's
+top-1 confidence is below the crop's threshold does the request escalate to
+the full model (the teacher), which then answers.
+
+The student's confidences also drive `severity` (85 / 70 cut-offs in
+format_prediction), so they must mean what the teacher's mean. Calibration
+splits each crop's test folder into a calibration half and a held-out half:
+
+    1. on the calibration half, fit a temperature for the student's
+       probabilities (minimum NLL), so its confidences are calibrated
+       before they gate or grade anything
+    2. on the calibration half, sweep the threshold and keep the lowest one
+       whose cascade accuracy is within --max-drop points of the teacher
+       alone, i.e. the cheapest operating point that costs (almost) no
+       accuracy; if none qualifies, the crop always escalates (threshold
+       100) and the report says the bound was not met
+    3. on the held-out half, measure the accuracy / escalation rate /
+       expected latency at that threshold and the whole trade-off curve,
+       and record them in models/<crop>_cascade.json, which the servers read
+
+    python ml/cascade.py --crop tomato potato --max-drop 0.5
+    python ml/cascade.py --show
+
+Configuration (environment):
+    CASCADE_ENABLED    "1" to cascade by default in predict_image (default off)
+    CASCADE_THRESHOLD  Threshold (%) for crops without a calibration file (default 90)
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
+
+# Temperatures tried when calibrating the student (1.0 = unchanged)
+TEMPERATURES = np.round(np.arange(0.5, 5.01, 0.05), 2)
+# Thresholds (top-1 %) swept when calibrating
+THRESHOLDS = np.round(np.arange(50.0, 99.91, 0.1), 1)
+# Threshold that sends every request to the full model
+ALWAYS_ESCALATE = 100.0
+# Share of the test images used to fit the temperature and pick the threshold
+CALIBRATION_FRACTION = 0.5
+
+
+def cascade_path(crop):
+    return os.path.join(MODELS_DIR, f"{crop.lower()}_cascade.json")
+
+
+def apply_temperature(probs, temperature):
+    """Rescale softmax probabilities as if the logits were divided by temperature."""
+    if temperature == 1.0:
+        return probs
+    logits = np.log(np.clip(probs, 1e-12, 1.0)) / temperature
+    logits -= logits.max(axis=-1, keepdims=True)
+    scaled = np.exp(logits)
+    return scaled / scaled.sum(axis=-1, keepdims=True)
+
+
+class CascadePolicy:
+    """
+    Per-crop thresholds and temperatures plus escalation counters
+
+    Args:
+        enabled (bool): Cascade by default in predict_image
+        default_threshold (float): Top-1 % below which uncalibrated crops escalate
+    """
+
+    def __init__(self, enabled=False, default_threshold=90.0):
+        self.enabled = enabled
+        self.default_threshold = default_threshold
+        self._lock = threading.Lock()
+        self._configs = {}
+        self._counts = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.environ.get("CASCADE_ENABLED", "0") == "1",
+            default_threshold=float(os.environ.get("CASCADE_THRESHOLD", "90")),
+        )
+
+    def config(self, crop):
+        """(threshold, temperature) for a crop, re-read when its calibration file changes."""
+        path = cascade_path(crop)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        cached = self._configs.get(crop)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        config = (self.default_threshold, 1.0)
+        if mtime is not None:
+            try:
+                with open(path, "r") as f:
+                    report = json.load(f)
+                config = (float(report["threshold"]), float(report.get("temperature", 1.0)))
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        with self._lock:
+            self._configs[crop] = (mtime, config)
+        return config
+
+    def version(self, crop):
+        """Part of the prediction cache key, so recalibrating never serves stale answers."""
+        threshold, temperature = self.config(crop)
+        return f"cascade:{threshold}:{temperature}"
+
+    def gate(self, crop, student_scores):
+        """
+        Calibrate the student's scores and decide whether to escalate
+
+        Returns:
+            (calibrated scores, escalate)
+        """
+        threshold, temperature = self.config(crop)
+        scores = apply_temperature(np.asarray(student_scores, dtype=np.float64), temperature)
+        escalate = threshold >= ALWAYS_ESCALATE or float(scores.max()) * 100 < threshold
+        with self._lock:
+            counts = self._counts.setdefault(crop, {"requests": 0, "escalations": 0})
+            counts["requests"] += 1
+            counts["escalations"] += int(escalate)
+        return scores, escalate
+
+    def stats(self):
+        with self._lock:
+            counts = {crop: dict(c) for crop, c in self._counts.items()}
+        crops = {}
+        for crop, c in counts.items():
+            threshold, temperature = self.config(crop)
+            crops[crop] = {
+                **c,
+                "escalationRate": round(c["escalations"] / c["requests"], 4) if c["requests"] else None,
+                "threshold": threshold,
+                "temperature": temperature,
+                "calibrated": os.path.exists(cascade_path(crop)),
+            }
+        return {"enabled": self.enabled, "defaultThreshold": self.default_threshold, "crops": crops}
+
+    def collect_metrics(self):
+        """Gauges for metrics.register_collector."""
+        with self._lock:
+            counts = {crop: dict(c) for crop, c in self._counts.items()}
+        yield ("farmai_cascade_requests", "Requests answered through the cascade, per crop.",
+               {(("crop", crop),): c["requests"] for crop, c in counts.items()})
+        yield ("farmai_cascade_escalations", "Cascade requests escalated to the full model, per crop.",
+               {(("crop", crop),): c["escalations"] for crop, c in counts.items()})
+
+
+def fit_temperature(probs, labels):
+    """Temperature from TEMPERATURES with the lowest negative log-likelihood on (probs, labels)."""
+    best, best_nll = 1.0, float("inf")
+    for temperature in TEMPERATURES:
+        scaled = apply_temperature(probs, float(temperature))
+        nll = -np.mean(np.log(np.clip(scaled[np.arange(len(labels)), labels], 1e-12, 1.0)))
+        if nll < best_nll:
+            best, best_nll = float(temperature), nll
+    return best
+
+
+def expected_calibration_error(probs, labels, bins=10):
+    """Gap between confidence and accuracy, averaged over confidence bins (0-1)."""
+    confidence = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    edges = np.linspace(0, 1, bins + 1)
+    error = 0.0
+    for low, high in zip(edges[:-1], edges[1:]):
+        in_bin = (confidence > low) & (confidence <= high)
+        if in_bin.any():
+            error += in_bin.mean() * abs(correct[in_bin].mean() - confidence[in_bin].mean())
+    return float(error)
+
+
+def accuracy(probs, labels):
+    """Top-1 accuracy in percent."""
+    return round(float(np.mean(probs.argmax(axis=1) == labels)) * 100, 2)
+
+
+def sweep(student_probs, teacher_probs, labels, student_ms, teacher_ms, thresholds=THRESHOLDS):
+    """Accuracy, escalation rate and expected latency of the cascade at each threshold."""
+    student_pred = student_probs.argmax(axis=1)
+    teacher_pred = teacher_probs.argmax(axis=1)
+    confidence = student_probs.max(axis=1) * 100
+
+    curve = []
+    for threshold in thresholds:
+        escalate = confidence < threshold if threshold < ALWAYS_ESCALATE else np.ones(len(labels), dtype=bool)
+        pred = np.where(escalate, teacher_pred, student_pred)
+        rate = float(escalate.mean())
+        curve.append({
+            "threshold": float(threshold),
+            "accuracy": round(float(np.mean(pred == labels)) * 100, 2),
+            "escalationRate": round(rate, 4),
+            # Every request pays for the student; escalated ones also pay for the teacher
+            "latencyMs": round(student_ms + rate * teacher_ms, 2),
+        })
+    return curve
+
+
+def _single_image_ms(predict, sample, runs=20):
+    predict(sample)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        predict(sample)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.median(timings))
+
+
+def calibrate(crop, max_drop=0.5, limit=None, data_crop=None, batch_size=32):
+    """
+    Calibrate one crop's cascade on its test split and write models/<crop>_cascade.json
+
+    The temperature and threshold are fitted on CALIBRATION_FRACTION of the
+    test images; every reported number comes from the other, held-out images.
+
+    Args:
+        max_drop (float): Largest cascade accuracy loss vs the teacher (percentage points)
+        limit (int): Use at most this many test images
+
+    Returns:
+        the report dict
+    """
+    import random
+
+    from image_io import load_image
+    from predict import MODEL_FORMAT, check_model_files, load_crop_model, predict_batch
+    from utils.preprocess import _list_images, get_data_dirs
+
+    crop = crop.lower()
+    teacher_backend = "h5" if MODEL_FORMAT == "student" else MODEL_FORMAT
+    for backend in (teacher_backend, "student"):
+        missing = check_model_files(crop, backend)
+        if missing:
+            raise FileNotFoundError(missing["error"])
+
+    _, test_dir = get_data_dirs(data_crop or crop.capitalize())
+    filepaths, folder_labels, folder_indices = _list_images(test_dir)
+    # Shuffled once, so the calibration / held-out halves mix every class
+    order = random.Random(0).sample(range(len(filepaths)), min(limit or len(filepaths), len(filepaths)))
+    filepaths = [filepaths[i] for i in order]
+    folder_labels = [folder_labels[i] for i in order]
+    split = int(len(filepaths) * CALIBRATION_FRACTION)
+    if split < 1 or split == len(filepaths):
+        raise ValueError(f"Need at least 2 test images to calibrate, found {len(filepaths)}")
+
+    # Test folders and class_indices.json are both sorted class names, but map by name to be safe
+    _, class_names = load_crop_model(crop, teacher_backend)
+    model_index = {name: index for index, name in class_names.items()}
+    folder_names = {index: name for name, index in folder_indices.items()}
+    labels = np.asarray([model_index[folder_names[label]] for label in folder_labels])
+
+    student_scores, teacher_scores = [], []
+    for start in range(0, len(filepaths), batch_size):
+        batch = np.stack([load_image(p) for p in filepaths[start:start + batch_size]])
+        student_scores.append(predict_batch(crop, batch, "student"))
+        teacher_scores.append(predict_batch(crop, batch, teacher_backend))
+    student_raw = np.concatenate(student_scores).astype(np.float64)
+    teacher_probs = np.concatenate(teacher_scores).astype(np.float64)
+
+    sample = np.expand_dims(load_image(filepaths[0]), axis=0)
+    student_ms = _single_image_ms(lambda x: predict_batch(crop, x, "student"), sample)
+    teacher_ms = _single_image_ms(lambda x: predict_batch(crop, x, teacher_backend), sample)
+
+    # Fit on the calibration half...
+    fit, held = slice(0, split), slice(split, None)
+    temperature = fit_temperature(student_raw[fit], labels[fit])
+    student_probs = apply_temperature(student_raw, temperature)
+    fit_curve = sweep(student_probs[fit], teacher_probs[fit], labels[fit], student_ms, teacher_ms)
+    teacher_fit_accuracy = accuracy(teacher_probs[fit], labels[fit])
+
+    # Lowest threshold (least escalation) that keeps accuracy within max_drop of the teacher;
+    # if even the highest one does not, escalate everything rather than break the bound
+    threshold = next(
+        (p["threshold"] for p in fit_curve if p["accuracy"] >= teacher_fit_accuracy - max_drop), None
+    )
+    bound_met = threshold is not None
+    if not bound_met:
+        threshold = ALWAYS_ESCALATE
+
+    # ...and report on the held-out half
+    held_args = (student_probs[held], teacher_probs[held], labels[held], student_ms, teacher_ms)
+    chosen = sweep(*held_args, thresholds=[threshold])[0]
+    teacher_accuracy = accuracy(teacher_probs[held], labels[held])
+
+    report = {
+        "crop": crop,
+        "threshold": threshold,
+        "temperature": temperature,
+        "boundMet": bound_met,
+        "teacherBackend": teacher_backend,
+        "maxAccuracyDrop": max_drop,
+        "calibrationImages": split,
+        "testImages": len(labels) - split,
+        "accuracy": {
+            "student": accuracy(student_probs[held], labels[held]),
+            "teacher": teacher_accuracy,
+            "cascade": chosen["accuracy"],
+        },
+        "accuracyDrop": round(teacher_accuracy - chosen["accuracy"], 2),
+        "escalationRate": chosen["escalationRate"],
+        "latencyMs": {"student": round(student_ms, 2), "teacher": round(teacher_ms, 2),
+                      "cascade": chosen["latencyMs"]},
+        "speedup": round(teacher_ms / chosen["latencyMs"], 2) if chosen["latencyMs"] else None,
+        "calibrationError": {
+            "studentBefore": round(expected_calibration_error(student_raw[held], labels[held]), 4),
+            "studentAfter": round(expected_calibration_error(student_probs[held], labels[held]), 4),
+            "teacher": round(expected_calibration_error(teacher_probs[held], labels[held]), 4),
+        },
+        # Held-out trade-off; whole-percent points are enough to plot it
+        "curve": sweep(*held_args, thresholds=[t for t in THRESHOLDS if float(t).is_integer()]),
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+    with open(cascade_path(crop), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def _print_report(report):
+    accuracy, latency = report["accuracy"], report["latencyMs"]
+    print(f"   Threshold {report['threshold']:.1f}%  (student temperature {report['temperature']:.2f})")
+    print(f"   Accuracy  teacher {accuracy['teacher']:.2f}%  student {accuracy['student']:.2f}%  "
+          f"cascade {accuracy['cascade']:.2f}%")
+    print(f"   Latency   teacher {latency['teacher']:.1f} ms  student {latency['student']:.1f} ms  "
+          f"cascade {latency['cascade']:.1f} ms ({report['speedup']}x)")
+    print(f"   Escalation rate {report['escalationRate'] * 100:.1f}% on {report['testImages']} held-out test images")
+    if not report.get("boundMet", True):
+        print(f"   ⚠️ No threshold kept accuracy within {report['maxAccuracyDrop']} points of the full model: "
+              f"every request escalates, so the cascade only adds the student's latency")
+
+
+def main():
+    from predict import SUPPORTED_CROPS
+
+    parser = argparse.ArgumentParser(description="Calibrate the student -> full model cascade per crop")
+    parser.add_argument("--crop", nargs="*", default=SUPPORTED_CROPS,
+                        help="Crops to calibrate (default: every supported crop with a student model)")
+    parser.add_argument("--max-drop", type=float, default=0.5,
+                        help="Largest cascade accuracy loss vs the full model (percentage points)")
+    parser.add_argument("--limit", type=int, help="Calibrate on at most N test images")
+    parser.add_argument("--data-crop", type=str, help="Data folder name if it isn't the capitalized crop name")
+    parser.add_argument("--show", action="store_true", help="Print the saved calibration reports and exit")
+    args = parser.parse_args()
+
+    failed = False
+    for crop in args.crop:
+        crop = crop.lower()
+        if args.show:
+            if os.path.exists(cascade_path(crop)):
+                with open(cascade_path(crop), "r") as f:
+                    print(f"📊 {crop}")
+                    _print_report(json.load(f))
+            continue
+
+        if not os.path.exists(os.path.join(MODELS_DIR, f"{crop}_student.h5")):
+            print(f"   Skipped {crop}: no student model (train one with ml/distill.py)")
+            continue
+
+        print(f"🎚️ Calibrating cascade for {crop}...")
+        try:
+            report = calibrate(crop, args.max_drop, args.limit, args.data_crop)
+        except (FileNotFoundError, ValueError) as e:
+            failed = True
+            print(f"❌ {crop}: {e}")
+            continue
+        _print_report(report)
+        print(f"💾 Saved to: {cascade_path(crop)}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
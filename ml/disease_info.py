@@ -0,0 +1,242 @@
+"""
+Compiled disease-info index
+
+disease_database.json is compiled once into a dict keyed by normalized
+(crop, disease) names, holding one ready-to-send JSON payload per language.
+A lookup is two dict hits and returns bytes plus an ETag, instead of parsing
+the database and scanning its keys for each request.
+
+Payloads have the same shape as GET /api/disease-info/:crop/:disease in
+backend/routes/diseaseInfo.js, including its per-field fallback to English.
+That lets the inference services return the prediction and its treatment info
+in one response (see with_disease_info in predict.py), so backend/routes/predict.js
+no longer needs a loopback HTTP call per detection.
+
+The database file is re-read when its mtime or size changes, so a rebuilt
+database is picked up without restarting the servers.
+
+Configuration (environment):
+    DISEASE_DB_PATH  Database file (default ml/disease_database.json)
+"""
+
+import collections
+import hashlib
+import json
+import os
+import re
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(SCRIPT_DIR, "disease_database.json")
+
+DEFAULT_LANG = "en"
+CONTENT_TYPE = "application/json; charset=utf-8"
+
+# What backend/routes/predict.js answered with when the lookup failed
+FALLBACK_INFO = {
+    "description": "Disease detected. Consult local agricultural expert for treatment.",
+    "treatment": ["Consult agricultural expert"],
+    "prevention": ["Follow standard crop management practices"],
+}
+
+
+def normalize_key(name):
+    """'Corn_(maize)' -> 'corn_maize', 'Common_rust_' -> 'common_rust'."""
+    return re.sub(r"[^0-9a-z]+", "_", str(name).lower()).strip("_")
+
+
+def _localized(field, lang):
+    # Same as `field[lang] || field.en` in diseaseInfo.js
+    value = field.get(lang)
+    if value is None or value == "":
+        return field.get(DEFAULT_LANG)
+    return value
+
+
+def format_info(crop, disease, entry, lang=DEFAULT_LANG):
+    """One database entry in the diseaseInfo.js response format, for one language."""
+    treatments = _localized(entry["treatment"], lang)
+    sources = _localized(entry["treatmentSources"], lang) if entry.get("treatmentSources") else None
+    do_and_dont = entry.get("doAndDont")
+
+    return {
+        "crop": crop,
+        "disease": disease,
+        "name": _localized(entry["name"], lang),
+        "description": _localized(entry["description"], lang),
+        "severity": entry.get("severity"),
+        "affectedParts": entry.get("affectedParts") or [],
+        "causes": _localized(entry["causes"], lang) if entry.get("causes") else [],
+        "treatment": treatments,
+        "treatmentWithSources": [
+            {"text": text, "source": (sources[i] if sources and i < len(sources) and sources[i] else None)}
+            for i, text in enumerate(treatments)
+        ],
+        "prevention": _localized(entry["prevention"], lang),
+        "organicSolution": _localized(entry["organicSolution"], lang) if entry.get("organicSolution") else [],
+        "doAndDont": {
+            "do": _localized(do_and_dont["do"], lang),
+            "dont": _localized(do_and_dont["dont"], lang),
+        } if do_and_dont else None,
+        "emergencyContact": _localized(entry["emergencyContact"], lang) if entry.get("emergencyContact") else None,
+    }
+
+
+CompiledInfo = collections.namedtuple("CompiledInfo", ["info", "body", "etag"])
+
+
+class DiseaseInfoNotFound(LookupError):
+    """Unknown crop or disease; `payload` is the 404 body diseaseInfo.js would send."""
+
+    def __init__(self, payload):
+        super().__init__(payload["error"])
+        self.payload = payload
+
+
+def _compile_entry(crop, disease, entry, lang):
+    info = format_info(crop, disease, entry, lang)
+    body = json.dumps(info, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+    return CompiledInfo(info, body, etag)
+
+
+def compile_database(database):
+    """
+    Build the lookup tables for a parsed database
+
+    Returns:
+        (crops, entries): crops maps a normalized crop to (crop name,
+        {normalized disease: disease name}); entries maps
+        (normalized crop, normalized disease) to {lang: CompiledInfo}
+    """
+    crops, entries = {}, {}
+    for crop, diseases in database.items():
+        crop_key = normalize_key(crop)
+        names = {}
+        for disease, entry in diseases.items():
+            disease_key = normalize_key(disease)
+            languages = set(entry["name"]) | {DEFAULT_LANG}
+            entries[(crop_key, disease_key)] = {
+                lang: _compile_entry(crop, disease, entry, lang) for lang in sorted(languages)
+            }
+            names[disease_key] = disease
+        crops[crop_key] = (crop, names)
+    return crops, entries
+
+
+def not_modified(if_none_match, etag):
+    """True if an If-None-Match header value matches etag."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == "*" or tag == etag:
+            return True
+    return False
+
+
+class DiseaseInfoIndex:
+    """
+    Lazily compiled, reload-on-change view of the disease database
+
+    Args:
+        path (str): disease_database.json to compile
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._crops = {}
+        self._entries = {}
+        self._body_bytes = 0
+        self._loads = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(path=os.environ.get("DISEASE_DB_PATH") or DEFAULT_DB_PATH)
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return  # keep serving the last good database
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return
+
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    database = json.load(f)
+                crops, entries = compile_database(database)
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                # Half-written or malformed file: keep the previous index
+                return
+            self._crops, self._entries = crops, entries
+            self._body_bytes = sum(len(c.body) for langs in entries.values() for c in langs.values())
+            self._signature = signature
+            self._loads += 1
+
+    def lookup(self, crop, disease, lang=DEFAULT_LANG):
+        """
+        Compiled info for one disease
+
+        Args:
+            crop (str): Crop name, any case / separator style ('corn_(maize)', 'Corn_(maize)')
+            disease (str): Disease (class) name as predicted, e.g. 'Early_Blight'
+            lang (str): Language code; unknown languages get the English payload
+
+        Returns:
+            CompiledInfo (info dict, serialized body, ETag)
+
+        Raises:
+            DiseaseInfoNotFound: crop or disease not in the database
+        """
+        self._refresh()
+        crop_key = normalize_key(crop)
+        crop_entry = self._crops.get(crop_key)
+        if crop_entry is None:
+            raise DiseaseInfoNotFound({
+                "error": "Crop not found",
+                "requestedCrop": crop,
+                "availableCrops": [name for name, _ in self._crops.values()],
+            })
+
+        languages = self._entries.get((crop_key, normalize_key(disease)))
+        if languages is None:
+            crop_name, diseases = crop_entry
+            raise DiseaseInfoNotFound({
+                "error": "Disease not found for this crop",
+                "requestedDisease": disease,
+                "crop": crop_name,
+                "availableDiseases": list(diseases.values()),
+            })
+        return languages.get(lang) or languages[DEFAULT_LANG]
+
+    def info_for(self, crop, disease, lang=DEFAULT_LANG):
+        """Info dict for a prediction, or the generic fallback when it isn't in the database."""
+        try:
+            return self.lookup(crop, disease, lang).info
+        except DiseaseInfoNotFound:
+            return {"name": disease, **FALLBACK_INFO}
+
+    def crops(self):
+        """[{name, diseases}] as listed by GET /api/disease-info."""
+        self._refresh()
+        return [{"name": name, "diseases": list(diseases.values())} for name, diseases in self._crops.values()]
+
+    def stats(self):
+        self._refresh()
+        return {
+            "path": self.path,
+            "crops": len(self._crops),
+            "diseases": len(self._entries),
+            "payloads": sum(len(langs) for langs in self._entries.values()),
+            "payloadBytes": self._body_bytes,
+            "loads": self._loads,
+        }
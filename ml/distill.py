@@ -0,0 +1,255 @@
+"""
+Knowledge distillation of compact student models
+
+Trains a much smaller student to match a trained crop model's (the
+teacher's) soft outputs, for edge boxes where MobileNetV2 at alpha=1.0 is
+too slow. Students are trained from scratch, so no weight download is needed:
+
+    mobilenet   MobileNetV2 with a reduced width multiplier (--alpha, default 0.35)
+    tiny        a small 4-block depthwise-separable CNN
+
+Loss: alpha_ce * cross-entropy(labels) + (1 - alpha_ce) * T^2 * KL(teacher_T || student_T),
+with both distributions softened by temperature T.
+
+Uses the same load_data pipeline as train_model.py. Writes:
+
+    models/<crop>_student.h5              student with a softmax output, same
+                                          input/output contract as the teacher
+    models/<crop>_student_report.json     latency, parameter count and test
+                                          accuracy of student vs teacher
+
+    python ml/distill.py --crop Tomato --student mobilenet --epochs 30
+
+Serve with MODEL_FORMAT=student (see predict.py).
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers
+from tensorflow.keras.models import Model
+
+from utils.preprocess import load_data
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
+STUDENTS = ("mobilenet", "tiny")
+
+
+def student_path(crop):
+    return os.path.join(MODELS_DIR, f"{crop.lower()}_student.h5")
+
+
+def student_report_path(crop):
+    return os.path.join(MODELS_DIR, f"{crop.lower()}_student_report.json")
+
+
+def build_student(kind, num_classes, img_size=(224, 224), alpha=0.35):
+    """Student network that outputs logits (softmax is added when saving)."""
+    if kind == "mobilenet":
+        base = tf.keras.applications.MobileNetV2(
+            input_shape=(*img_size, 3),
+            alpha=alpha,
+            include_top=False,
+            weights=None
+        )
+        x = layers.GlobalAveragePooling2D()(base.output)
+        x = layers.Dropout(0.2)(x)
+        logits = layers.Dense(num_classes)(x)
+        return Model(inputs=base.input, outputs=logits, name=f"student_mobilenet_{alpha}")
+
+    if kind == "tiny":
+        inputs = layers.Input(shape=(*img_size, 3))
+        x = layers.Conv2D(16, 3, strides=2, padding="same", use_bias=False)(inputs)
+        x = layers.BatchNormalization()(x)
+        x = layers.ReLU(6.0)(x)
+        for filters in (32, 64, 128, 256):
+            x = layers.SeparableConv2D(filters, 3, strides=2, padding="same", use_bias=False)(x)
+            x = layers.BatchNormalization()(x)
+            x = layers.ReLU(6.0)(x)
+        x = layers.GlobalAveragePooling2D()(x)
+        x = layers.Dropout(0.2)(x)
+        logits = layers.Dense(num_classes)(x)
+        return Model(inputs=inputs, outputs=logits, name="student_tiny")
+
+    raise ValueError(f"Unknown student: {kind}")
+
+
+def with_softmax(student):
+    """The servable student: logits -> probabilities, like the teacher's output layer."""
+    return Model(inputs=student.input, outputs=layers.Softmax()(student.output), name=student.name)
+
+
+def distillation_loss(labels, teacher_probs, student_logits, temperature, alpha_ce):
+    # The teacher ends in softmax; log-probabilities are its logits up to a constant,
+    # which the tempered softmax ignores
+    teacher_logits = tf.math.log(tf.clip_by_value(teacher_probs, 1e-7, 1.0))
+    soft_targets = tf.nn.softmax(teacher_logits / temperature)
+    soft_student = tf.nn.log_softmax(student_logits / temperature)
+    kd = tf.reduce_mean(tf.reduce_sum(
+        soft_targets * (tf.math.log(tf.clip_by_value(soft_targets, 1e-7, 1.0)) - soft_student), axis=-1
+    ))
+    ce = tf.reduce_mean(tf.keras.losses.categorical_crossentropy(labels, student_logits, from_logits=True))
+    return alpha_ce * ce + (1 - alpha_ce) * (temperature ** 2) * kd
+
+
+def top1_accuracy(model, data, steps):
+    """Top-1 accuracy (%) over `steps` batches of a load_data split."""
+    correct = total = 0
+    for _, (x, y) in zip(range(steps), data):
+        preds = model(x, training=False)
+        correct += int(np.sum(np.argmax(preds, axis=1) == np.argmax(y, axis=1)))
+        total += len(y)
+    return 100.0 * correct / max(total, 1)
+
+
+def measure_latency(model, img_size=(224, 224), runs=30):
+    """Median single-image model.predict latency in ms (what one request pays)."""
+    x = np.random.rand(1, *img_size, 3).astype(np.float32)
+    model.predict(x, verbose=0)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        model.predict(x, verbose=0)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.median(timings))
+
+
+def distill(teacher, student, train_data, train_steps, test_data, test_steps,
+            epochs=30, learning_rate=1e-3, temperature=4.0, alpha_ce=0.1, patience=5):
+    """
+    Train the student against the teacher's soft outputs
+
+    Returns:
+        best test accuracy (%) reached; the student keeps the best weights
+    """
+    optimizer = tf.keras.optimizers.Adam(learning_rate=learning_rate)
+
+    @tf.function
+    def train_step(x, y):
+        teacher_probs = teacher(x, training=False)
+        with tf.GradientTape() as tape:
+            student_logits = student(x, training=True)
+            loss = distillation_loss(y, teacher_probs, student_logits, temperature, alpha_ce)
+        grads = tape.gradient(loss, student.trainable_variables)
+        optimizer.apply_gradients(zip(grads, student.trainable_variables))
+        return loss
+
+    best_accuracy, best_weights, stale = -1.0, None, 0
+    for epoch in range(1, epochs + 1):
+        started = time.perf_counter()
+        losses = []
+        for _, (x, y) in zip(range(train_steps), train_data):
+            losses.append(float(train_step(tf.convert_to_tensor(x), tf.convert_to_tensor(y))))
+
+        accuracy = top1_accuracy(student, test_data, test_steps)
+        print(f"   Epoch {epoch}/{epochs}: loss {np.mean(losses):.4f}, "
+              f"test accuracy {accuracy:.2f}% ({time.perf_counter() - started:.0f}s)", flush=True)
+
+        if accuracy > best_accuracy:
+            best_accuracy, best_weights, stale = accuracy, student.get_weights(), 0
+        else:
+            stale += 1
+            if stale >= patience:
+                print(f"   Early stopping, best test accuracy {best_accuracy:.2f}%")
+                break
+
+    if best_weights is not None:
+        student.set_weights(best_weights)
+    return best_accuracy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill a compact student model from a trained crop model")
+    parser.add_argument("--crop", type=str, default="Tomato", help="Crop name (e.g., Tomato, Potato, Rice)")
+    parser.add_argument("--student", choices=STUDENTS, default="mobilenet")
+    parser.add_argument("--alpha", type=float, default=0.35, help="Width multiplier for --student mobilenet")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--temperature", type=float, default=4.0, help="Softmax temperature for the soft targets")
+    parser.add_argument("--alpha-ce", type=float, default=0.1,
+                        help="Weight of the hard-label loss (the rest goes to matching the teacher)")
+    parser.add_argument("--loader", type=str, default="generator", choices=["generator", "tfdata"])
+    parser.add_argument("--tf-cache", type=str, default=None,
+                        help="With --loader tfdata: directory for the on-disk cache of decoded images")
+    args = parser.parse_args()
+
+    crop = args.crop
+    teacher_path = os.path.join(MODELS_DIR, f"{crop.lower()}_model.h5")
+    if not os.path.exists(teacher_path):
+        raise SystemExit(f"❌ Teacher model not found: {teacher_path} (train it with ml/train_model.py first)")
+
+    print(f"=" * 60)
+    print(f"Distilling {args.student} student for: {crop}")
+    print(f"=" * 60)
+
+    train_generator, test_generator = load_data(
+        crop=crop, batch_size=args.batch_size, loader=args.loader, cache=args.tf_cache
+    )
+    train_data = getattr(train_generator, "dataset", train_generator)
+    test_data = getattr(test_generator, "dataset", test_generator)
+    train_steps, test_steps = len(train_generator), len(test_generator)
+
+    teacher = tf.keras.models.load_model(teacher_path)
+    teacher.trainable = False
+    student = build_student(args.student, train_generator.num_classes, alpha=args.alpha)
+    print(f"   Teacher parameters: {teacher.count_params():,}")
+    print(f"   Student parameters: {student.count_params():,}")
+
+    print(f"\n Starting distillation...")
+    distill(
+        teacher, student, train_data, train_steps, test_data, test_steps,
+        epochs=args.epochs, learning_rate=args.learning_rate,
+        temperature=args.temperature, alpha_ce=args.alpha_ce
+    )
+
+    servable = with_softmax(student)
+    output_path = student_path(crop)
+    servable.save(output_path)
+
+    print(f"\n Evaluating student vs teacher...")
+    report = {
+        "crop": crop.lower(),
+        "architecture": args.student,
+        "alpha": args.alpha if args.student == "mobilenet" else None,
+        "temperature": args.temperature,
+        "alphaCe": args.alpha_ce,
+        "testImages": test_generator.samples,
+        "teacher": {
+            "model": os.path.basename(teacher_path),
+            "params": int(teacher.count_params()),
+            "testAccuracy": round(top1_accuracy(teacher, test_data, test_steps), 2),
+            "latencyMs": round(measure_latency(teacher), 2),
+        },
+        "student": {
+            "model": os.path.basename(output_path),
+            "params": int(servable.count_params()),
+            "testAccuracy": round(top1_accuracy(servable, test_data, test_steps), 2),
+            "latencyMs": round(measure_latency(servable), 2),
+        },
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    report["accuracyGap"] = round(report["teacher"]["testAccuracy"] - report["student"]["testAccuracy"], 2)
+    report["speedup"] = round(report["teacher"]["latencyMs"] / report["student"]["latencyMs"], 2)
+    with open(student_report_path(crop), "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n" + "=" * 60)
+    print(f" Distillation completed!")
+    print(f" Student saved to: {output_path}")
+    print(f"   Teacher: {report['teacher']['testAccuracy']:.2f}%, {report['teacher']['params']:,} params, "
+          f"{report['teacher']['latencyMs']:.1f} ms")
+    print(f"   Student: {report['student']['testAccuracy']:.2f}%, {report['student']['params']:,} params, "
+          f"{report['student']['latencyMs']:.1f} ms ({report['speedup']}x faster)")
+    print(f"=" * 60)
+    print(f"💾 Report saved to: {student_report_path(crop)}")
+    print(f"To serve: MODEL_FORMAT=student python ml/predict.py --image <image_path> --crop {crop.lower()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Image decoding for the inference path
+
+Images can come from a file path (CLI, daemon) or straight from memory (raw
+bytes or a file-like upload stream), so uploads never need a temporary file.
+
+Phone photos (12-48 MP) are decoded with JPEG scale-on-decode (Pillow draft
+mode): the decoder skips straight to 1/2, 1/4 or 1/8 resolution, as long as
+the result stays at least DRAFT_MARGIN times the target size, instead of
+decoding every pixel only to throw most of them away. Oversized images are
+rejected from their header before any pixel is decoded.
+
+Check that reduced decoding stays within tolerance of a full decode:
+    python ml/image_io.py photos/*.jpg --crop tomato
+"""
+
+import contextlib
+import io
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from utils.preprocessing import IMG_SIZE
+
+# Largest image we agree to decode (48 MP phones plus headroom)
+MAX_IMAGE_PIXELS = int(os.environ.get("MAX_IMAGE_PIXELS", str(64 * 1000 * 1000)))
+
+# Reduced decode keeps at least this many times the target resolution before the final resize
+DRAFT_MARGIN = 2
+
+# Set IMAGE_DRAFT_DECODE=0 to always decode at full resolution
+DRAFT_DECODE = os.environ.get("IMAGE_DRAFT_DECODE", "1") != "0"
+
+
+class ImageTooLargeError(ValueError):
+    status = 413
+
+
+class ImageDecodeError(ValueError):
+    """The upload is not an image Pillow can decode (or is truncated)."""
+
+    status = 400
+
+
+def open_image(source):
+    """
+    Open an image from a path, raw bytes or a file-like object
+
+    Args:
+        source: str/PathLike path, bytes/bytearray/memoryview, or a readable file object
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+
+def check_dimensions(img):
+    """Reject decompression-bomb sized images using only the header."""
+    width, height = img.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(
+            f"Image is {width}x{height} ({width * height / 1e6:.1f} MP), "
+            f"larger than the {MAX_IMAGE_PIXELS / 1e6:.0f} MP limit"
+        )
+
+
+@contextlib.contextmanager
+def decoded_image(source):
+    """
+    open_image + check_dimensions, with decoder failures inside the block
+    raised as ImageDecodeError / ImageTooLargeError (missing files still
+    raise FileNotFoundError)
+    """
+    try:
+        with open_image(source) as img:
+            check_dimensions(img)
+            yield img
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeError(str(e)) from e
+    except FileNotFoundError:
+        raise
+    except (OSError, SyntaxError) as e:
+        # UnidentifiedImageError and "image file is truncated" are OSErrors
+        raise ImageDecodeError(f"Could not decode image: {e}") from e
+
+
+def load_image(source, target_size=IMG_SIZE, draft=None, timings=None):
+    """
+    Decode an image to an RGB uint8 array of shape (height, width, 3)
+
+    Matches tensorflow.keras.preprocessing.image.load_img: RGB conversion,
+    then a nearest-neighbour resize to target_size (height, width).
+
+    Args:
+        source: Path, bytes or file-like object (see open_image)
+        target_size (tuple): Output (height, width)
+        draft (bool): Use JPEG scale-on-decode (default: DRAFT_DECODE)
+        timings (dict): If given, receives "decode" and "preprocess" durations in ms
+    """
+    if draft is None:
+        draft = DRAFT_DECODE
+
+    started = time.perf_counter()
+    with decoded_image(source) as img:
+        width_height = (target_size[1], target_size[0])
+
+        if draft and img.format == "JPEG":
+            img.draft("RGB", (width_height[0] * DRAFT_MARGIN, width_height[1] * DRAFT_MARGIN))
+
+        if timings is not None:
+            img.load()
+            decoded = time.perf_counter()
+            timings["decode"] = (decoded - started) * 1000
+
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        if img.size != width_height:
+            img = img.resize(width_height, Image.NEAREST)
+        x = np.asarray(img, dtype=np.uint8)
+
+    if timings is not None:
+        timings["preprocess"] = (time.perf_counter() - decoded) * 1000
+    return x
+
+
+def compare_decoders(paths, target_size=IMG_SIZE):
+    """
+    Compare reduced and full-resolution decoding
+
+    Returns:
+        list of (path, reduced array, full array, mean abs pixel difference)
+    """
+    rows = []
+    for path in paths:
+        reduced = load_image(path, target_size, draft=True)
+        full = load_image(path, target_size, draft=False)
+        diff = float(np.abs(reduced.astype(np.int16) - full.astype(np.int16)).mean())
+        rows.append((path, reduced, full, diff))
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Check reduced JPEG decoding against a full decode")
+    parser.add_argument("images", nargs="+", help="Image files to compare")
+    parser.add_argument("--crop", type=str, help="Also compare model predictions for this crop")
+    parser.add_argument("--max-pixel-diff", type=float, default=12.0,
+                        help="Largest allowed mean abs pixel difference (0-255) per image")
+    parser.add_argument("--max-confidence-diff", type=float, default=5.0,
+                        help="Largest allowed confidence difference in percentage points")
+    args = parser.parse_args()
+
+    for mode in (True, False):
+        started = time.perf_counter()
+        for path in args.images:
+            load_image(path, draft=mode)
+        elapsed = (time.perf_counter() - started) * 1000 / len(args.images)
+        print(f"   {'reduced' if mode else 'full':>7} decode: {elapsed:.1f} ms/image")
+
+    rows = compare_decoders(args.images)
+    failures = [path for path, _, _, diff in rows if diff > args.max_pixel_diff]
+    print(f"   Mean abs pixel diff: {np.mean([r[3] for r in rows]):.2f} (max {max(r[3] for r in rows):.2f})")
+
+    if args.crop:
+        from predict import format_prediction, load_crop_model, predict_batch
+
+        _, class_names = load_crop_model(args.crop)
+        reduced = predict_batch(args.crop, np.stack([r[1] for r in rows]))
+        full = predict_batch(args.crop, np.stack([r[2] for r in rows]))
+
+        for (path, _, _, _), a, b in zip(rows, reduced, full):
+            pa = format_prediction(a, class_names, args.crop)
+            pb = format_prediction(b, class_names, args.crop)
+            if pa["disease"] != pb["disease"] or abs(pa["confidence"] - pb["confidence"]) > args.max_confidence_diff:
+                failures.append(path)
+                print(f"   ✗ {path}: {pa['disease']} {pa['confidence']}% vs {pb['disease']} {pb['confidence']}%")
+
+    if failures:
+        print(f"❌ {len(set(failures))}/{len(rows)} images outside tolerance")
+        sys.exit(1)
+    print(f"✅ All {len(rows)} images within tolerance")
@@ -0,0 +1,197 @@
+"""
+Prometheus-style metrics for the inference path
+
+Counters and histograms live in process memory; an observation is a lock,
+a bisect into the bucket bounds and two additions, so leaving metrics on
+costs next to nothing when nobody scrapes. Text rendering only happens when
+/metrics is requested (backend/app.py, ml/server.py, ml/async_server.py).
+
+    farmai_stage_seconds{stage}                upload, model_load, decode, preprocess,
+                                               inference, postprocess, disease_info
+    farmai_requests_total{crop}                predictions requested per crop
+    farmai_request_errors_total{crop}          predictions that returned an error
+    farmai_http_request_seconds{endpoint}      end-to-end HTTP latency
+    farmai_batch_size{crop}                    micro-batch sizes (see batching.py)
+    farmai_batch_queue_wait_seconds            time a request waited for its batch
+    farmai_model_load_seconds{crop}            model load time (see model_registry.py)
+
+Collectors registered with register_collector() add gauges computed at
+scrape time (resident models, cache hits, admission queue).
+
+Set METRICS_ENABLED=0 to turn every observation into a no-op.
+"""
+
+import bisect
+import os
+import threading
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from sub-millisecond postprocessing up to slow cold model loads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+            lines.extend(self._render_children(children))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def _render_children(self, children):
+        for key, value in children:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                child = self._children[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            child[0][index] += 1
+            child[1] += value
+            child[2] += 1
+
+    def _render_children(self, children):
+        for key, (counts, total, count) in children:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+_metrics = []
+_collectors = []
+
+
+def _register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collect):
+    """
+    Add gauges computed at scrape time
+
+    Args:
+        collect (callable): collect() -> iterable of (name, documentation, {labels tuple or (): value})
+    """
+    _collectors.append(collect)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        try:
+            gauges = list(collect())
+        except Exception:
+            continue
+        for name, documentation, samples in gauges:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples.items():
+                label_text = _format_labels([k for k, _ in labels], [v for _, v in labels])
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = _register(Histogram(
+    "farmai_stage_seconds", "Time spent in each stage of a prediction request.", ["stage"]
+))
+REQUESTS = _register(Counter(
+    "farmai_requests_total", "Prediction requests per crop.", ["crop"]
+))
+REQUEST_ERRORS = _register(Counter(
+    "farmai_request_errors_total", "Prediction requests that returned an error, per crop.", ["crop"]
+))
+HTTP_REQUEST_SECONDS = _register(Histogram(
+    "farmai_http_request_seconds", "End-to-end HTTP request latency.", ["endpoint"]
+))
+BATCH_SIZE = _register(Histogram(
+    "farmai_batch_size", "Images per batched forward pass.", ["crop"], buckets=BATCH_SIZE_BUCKETS
+))
+BATCH_QUEUE_WAIT_SECONDS = _register(Histogram(
+    "farmai_batch_queue_wait_seconds", "Time a request waited in the micro-batch queue."
+))
+MODEL_LOAD_SECONDS = _register(Histogram(
+    "farmai_model_load_seconds", "Time to load a crop model into memory.", ["crop"]
+))
+
+
+def observe_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def observe_stages_ms(timings):
+    """Record a {stage: milliseconds} dict (the shape image_io / Server-Timing use)."""
+    if not ENABLED:
+        return
+    for stage, ms in timings.items():
+        STAGE_SECONDS.observe(ms / 1000.0, stage=stage)
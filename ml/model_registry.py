@@ -0,0 +1,283 @@
+"""
+Lazy per-crop model registry with LRU eviction and a memory budget
+
+A single process serving every crop in SUPPORTED_CROPS does not need all nine
+models resident at once. The registry loads a crop's model and class indices
+on first use, keeps them in LRU order and evicts the least recently used crop
+whenever the configured budget is exceeded.
+
+Configuration (environment):
+    MODEL_BUDGET_MB      Memory budget for resident models (unset = unlimited)
+    MODEL_BUDGET_METRIC  "params" (weight bytes, default) or "rss" (measured
+                         resident-set growth while loading the model; approximate
+                         when several crops load at once)
+    MODEL_PREWARM        Number of most-requested crops to load at startup, or
+                         a comma-separated list of crops
+"""
+
+import collections
+import gc
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import metrics
+
+# Persist request counts every N recorded requests so pre-warming survives restarts
+_COUNTS_SAVE_EVERY = 100
+
+
+def current_rss_bytes():
+    """Resident set size of this process in bytes, or None if it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def model_param_bytes(model):
+    """Bytes held by a model's weights."""
+    if getattr(model, "param_bytes", None) is not None:
+        return int(model.param_bytes)
+    try:
+        return int(sum(int(w.numpy().nbytes) for w in model.weights))
+    except Exception:
+        return int(model.count_params()) * 4
+
+
+class _Entry:
+    __slots__ = ("model", "class_names", "param_bytes", "rss_bytes", "load_seconds", "loaded_at")
+
+    def __init__(self, model, class_names, param_bytes, rss_bytes, load_seconds):
+        self.model = model
+        self.class_names = class_names
+        self.param_bytes = param_bytes
+        self.rss_bytes = rss_bytes
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+
+class ModelRegistry:
+    """
+    Cache of loaded crop models
+
+    Args:
+        loader (callable): loader(crop) -> (model, class_names)
+        budget_mb (float): Evict LRU crops once resident models exceed this (None = no limit)
+        budget_metric (str): "params" or "rss", which size to charge against the budget
+        counts_path (str): JSON file used to persist per-crop request counts
+    """
+
+    def __init__(self, loader, budget_mb=None, budget_metric="params", counts_path=None):
+        if budget_metric not in ("params", "rss"):
+            raise ValueError(f"Unknown budget metric: {budget_metric}")
+
+        self.loader = loader
+        self.budget_bytes = int(budget_mb * 1024 * 1024) if budget_mb else None
+        self.budget_metric = budget_metric
+        self.counts_path = counts_path
+
+        self._entries = collections.OrderedDict()  # crop -> _Entry, LRU first
+        self._lock = threading.RLock()  # guards the bookkeeping only, never held while loading
+        self._loading = collections.defaultdict(threading.Lock)  # crop -> lock held while it loads
+        self._loads = collections.Counter()
+        self._evictions = collections.Counter()
+        self._requests = collections.Counter(self._read_counts())
+        self._unsaved_requests = 0
+
+    @classmethod
+    def from_env(cls, loader, counts_path=None):
+        budget = os.environ.get("MODEL_BUDGET_MB")
+        return cls(
+            loader,
+            budget_mb=float(budget) if budget else None,
+            budget_metric=os.environ.get("MODEL_BUDGET_METRIC", "params"),
+            counts_path=counts_path,
+        )
+
+    def get(self, crop):
+        """Return (model, class_names) for a crop, loading it if needed."""
+        crop = crop.lower()
+        entry = self._lookup(crop)
+        if entry is not None:
+            return entry.model, entry.class_names
+
+        # A cold load takes seconds: only requests for this crop wait for it
+        with self._lock:
+            loading = self._loading[crop]
+        with loading:
+            entry = self._lookup(crop)
+            if entry is None:
+                entry = self._load(crop)
+                with self._lock:
+                    self._entries[crop] = entry
+                    self._enforce_budget(keep=crop)
+        return entry.model, entry.class_names
+
+    def _lookup(self, crop):
+        with self._lock:
+            entry = self._entries.get(crop)
+            if entry is not None:
+                self._entries.move_to_end(crop)
+            return entry
+
+    def is_loaded(self, crop):
+        with self._lock:
+            return crop.lower() in self._entries
+
+    def evict(self, crop):
+        """Drop a crop's model from memory. Returns True if it was loaded."""
+        crop = crop.lower()
+        with self._lock:
+            entry = self._entries.pop(crop, None)
+            if entry is None:
+                return False
+            self._evictions[crop] += 1
+        del entry
+        gc.collect()
+        return True
+
+    def record_request(self, crop):
+        """Count a prediction request for a crop (used to pick crops to pre-warm)."""
+        crop = crop.lower()
+        with self._lock:
+            self._requests[crop] += 1
+            self._unsaved_requests += 1
+            due = self._unsaved_requests >= _COUNTS_SAVE_EVERY
+            if due:
+                self._unsaved_requests = 0
+        if due:
+            self.save_counts()
+
+    def most_requested(self, n):
+        with self._lock:
+            return [crop for crop, _ in self._requests.most_common(n)]
+
+    def prewarm(self, crops=None, top_n=None):
+        """
+        Load crops ahead of the first request
+
+        Args:
+            crops (list): Crops to load explicitly
+            top_n (int): Otherwise, load the N most requested crops seen so far
+
+        Returns:
+            list of crops that were loaded
+        """
+        if crops is None:
+            crops = self.most_requested(top_n) if top_n else []
+
+        loaded = []
+        for crop in crops:
+            try:
+                self.get(crop)
+                loaded.append(crop.lower())
+            except Exception as e:
+                print(f"Pre-warm skipped {crop}: {e}", file=sys.stderr)
+        return loaded
+
+    def prewarm_from_env(self, default_crops=None):
+        """Pre-warm according to MODEL_PREWARM (a count or a list of crops)."""
+        setting = os.environ.get("MODEL_PREWARM", "").strip()
+        if not setting:
+            return self.prewarm(crops=default_crops) if default_crops else []
+        if setting.isdigit():
+            return self.prewarm(top_n=int(setting))
+        return self.prewarm(crops=[c.strip() for c in setting.split(",") if c.strip()])
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(self._charge(entry) for entry in self._entries.values())
+
+    def stats(self):
+        """Load/evict counts and per-crop resident memory."""
+        with self._lock:
+            crops = {
+                crop: {
+                    "paramBytes": entry.param_bytes,
+                    "rssBytes": entry.rss_bytes,
+                    "loadSeconds": round(entry.load_seconds, 3),
+                }
+                for crop, entry in self._entries.items()
+            }
+            return {
+                "budgetBytes": self.budget_bytes,
+                "budgetMetric": self.budget_metric,
+                "residentBytes": self.resident_bytes(),
+                "processRssBytes": current_rss_bytes(),
+                "loaded": list(self._entries.keys()),
+                "crops": crops,
+                "loads": dict(self._loads),
+                "evictions": dict(self._evictions),
+                "requests": dict(self._requests),
+            }
+
+    def save_counts(self):
+        if not self.counts_path:
+            return
+        with self._lock:
+            counts = dict(self._requests)
+            self._unsaved_requests = 0
+        # Unique temp name: prefork workers share the counts file
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.counts_path)),
+                prefix="." + os.path.basename(self.counts_path) + ".", suffix=".tmp"
+            )
+            with os.fdopen(fd, "w") as f:
+                json.dump(counts, f, indent=2)
+            os.replace(tmp_path, self.counts_path)
+        except OSError as e:
+            print(f"Could not save request counts: {e}", file=sys.stderr)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _read_counts(self):
+        if not self.counts_path or not os.path.exists(self.counts_path):
+            return {}
+        try:
+            with open(self.counts_path, "r") as f:
+                return {k: int(v) for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self, crop):
+        rss_before = current_rss_bytes()
+        started = time.perf_counter()
+        model, class_names = self.loader(crop)
+        load_seconds = time.perf_counter() - started
+        rss_after = current_rss_bytes()
+
+        rss_bytes = None
+        if rss_before is not None and rss_after is not None:
+            rss_bytes = max(0, rss_after - rss_before)
+
+        with self._lock:
+            self._loads[crop] += 1
+        metrics.MODEL_LOAD_SECONDS.observe(load_seconds, crop=crop)
+        return _Entry(model, class_names, model_param_bytes(model), rss_bytes, load_seconds)
+
+    def _charge(self, entry):
+        if self.budget_metric == "rss" and entry.rss_bytes is not None:
+            return entry.rss_bytes
+        return entry.param_bytes
+
+    def _enforce_budget(self, keep):
+        if self.budget_bytes is None:
+            return
+        evicted = False
+        while len(self._entries) > 1 and self.resident_bytes() > self.budget_bytes:
+            crop = next(iter(self._entries))
+            if crop == keep:
+                break
+            self._entries.pop(crop)
+            self._evictions[crop] += 1
+            evicted = True
+        if evicted:
+            gc.collect()
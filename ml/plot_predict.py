@@ -0,0 +1,205 @@
+"""
+Multi-image (plot-level) prediction
+
+A farmer photographing ten leaves from one plot sends them in one request.
+The images are decoded in parallel, grouped by crop and run through one
+batched forward pass per crop, and the response carries per-image results
+plus a plot-level summary (dominant disease, fraction of leaves affected).
+
+Request formats, shared by backend/app.py, ml/server.py and ml/async_server.py:
+
+    multipart/form-data   one or more "images" files; "crop" for all of them or
+                          "crops" (one per image, repeated fields or comma-separated)
+    application/x-image-batch
+                          compact binary framing, one record per image:
+                              u8   crop name length (0 = use the request's crop)
+                              ...  crop name (ASCII)
+                              u32  image length (big-endian)
+                              ...  image bytes
+
+Configuration (environment):
+    BATCH_MAX_IMAGES   Largest number of images accepted per request (default 32)
+    DECODE_WORKERS     Threads decoding the images of a request (default 4)
+"""
+
+import collections
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import metrics
+from predict import SUPPORTED_CROPS, check_model_files, format_prediction, load_crop_model, load_image_array, \
+    predict_batch, registry
+
+FRAMED_CONTENT_TYPE = "application/x-image-batch"
+MAX_IMAGES = int(os.environ.get("BATCH_MAX_IMAGES", "32"))
+
+_decode_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("DECODE_WORKERS", "4")), thread_name_prefix="plot-decode"
+)
+
+
+class BatchRequestError(ValueError):
+    """Malformed batch request (reported to the client as a 400)."""
+
+
+def parse_framed(body, default_crop=None):
+    """
+    Split an application/x-image-batch body into (image_bytes, crop) pairs
+
+    Records are sliced with memoryview, so no image is copied while parsing.
+    """
+    view = memoryview(body)
+    items, offset = [], 0
+    while offset < len(view):
+        crop_length = view[offset]
+        offset += 1
+        crop = bytes(view[offset:offset + crop_length]).decode("ascii", "replace") or default_crop
+        offset += crop_length
+        if offset + 4 > len(view):
+            raise BatchRequestError("Truncated image batch: missing image length")
+        (image_length,) = struct.unpack_from(">I", view, offset)
+        offset += 4
+        if offset + image_length > len(view):
+            raise BatchRequestError("Truncated image batch: image shorter than its declared length")
+        items.append((view[offset:offset + image_length], crop))
+        offset += image_length
+    return items
+
+
+def parse_multipart(files, form, default_crop=None):
+    """(image_bytes, crop) pairs from werkzeug multipart files/form MultiDicts."""
+    uploads = [f for f in files.getlist("images") if f.filename != ""]
+    crop = form.get("crop") or default_crop
+
+    crops = []
+    for value in form.getlist("crops"):
+        crops.extend(c.strip() for c in value.split(",") if c.strip())
+    if crops and len(crops) != len(uploads):
+        raise BatchRequestError(f"Got {len(crops)} crops for {len(uploads)} images")
+
+    return [(upload.read(), crops[i] if crops else crop) for i, upload in enumerate(uploads)]
+
+
+def validate(items):
+    """Check image count and crops before any decoding work. Raises BatchRequestError."""
+    if not items:
+        raise BatchRequestError("No images provided")
+    if len(items) > MAX_IMAGES:
+        raise BatchRequestError(f"Too many images: {len(items)} (limit {MAX_IMAGES})")
+    for _, crop in items:
+        if not crop:
+            raise BatchRequestError("No crop given (set crop, or crops with one per image)")
+        if not isinstance(crop, str):
+            raise BatchRequestError(f"Crop must be a string, got {crop!r}")
+        if crop.lower() not in SUPPORTED_CROPS:
+            raise BatchRequestError(f"Unsupported crop: {crop}")
+
+
+def _decode(source):
+    try:
+        return load_image_array(source), None
+    except Exception as e:
+        return None, str(e)
+
+
+def predict_many(items):
+    """
+    Predict a list of (image, crop) pairs with one forward pass per crop
+
+    Args:
+        items (list): (image bytes / path / file-like, crop) pairs
+
+    Returns:
+        list of predict_image-style payloads, in request order (failed images
+        get an {"error": ...} entry and don't stop the others)
+    """
+    crops = [crop.lower() for _, crop in items]
+    decoded = list(_decode_pool.map(_decode, [source for source, _ in items]))
+    results = [None] * len(items)
+
+    by_crop = collections.defaultdict(list)
+    for index, (crop, (x, error)) in enumerate(zip(crops, decoded)):
+        if error is not None:
+            results[index] = {"crop": crop.capitalize(), "error": f"Prediction failed: {error}"}
+        else:
+            by_crop[crop].append(index)
+
+    for crop, indices in by_crop.items():
+        missing = check_model_files(crop)
+        if missing:
+            for index in indices:
+                results[index] = {"crop": crop.capitalize(), **missing}
+            continue
+
+        try:
+            _, class_names = load_crop_model(crop)
+            started = time.perf_counter()
+            preds = predict_batch(crop, np.stack([decoded[i][0] for i in indices]))
+            metrics.observe_stage("inference", time.perf_counter() - started)
+            metrics.BATCH_SIZE.observe(len(indices), crop=crop)
+        except Exception as e:
+            for index in indices:
+                results[index] = {"crop": crop.capitalize(), "error": f"Prediction failed: {str(e)}"}
+            continue
+
+        for index, row in zip(indices, preds):
+            registry.record_request(crop)
+            results[index] = format_prediction(row, class_names, crop)
+
+    for crop, result in zip(crops, results):
+        metrics.REQUESTS.inc(crop=crop)
+        if "error" in result:
+            metrics.REQUEST_ERRORS.inc(crop=crop)
+    return results
+
+
+def summarize(results):
+    """
+    Plot-level summary of per-image results
+
+    Returns:
+        dict with image counts, fraction of leaves affected, the dominant disease
+        (most frequent among affected leaves, ties broken by mean confidence)
+        and per-disease counts
+    """
+    analyzed = [r for r in results if "error" not in r]
+    affected = [r for r in analyzed if r["severity"] != "None"]
+
+    diseases = {}
+    for r in affected:
+        entry = diseases.setdefault(r["disease"], {"count": 0, "confidenceSum": 0.0, "severity": collections.Counter()})
+        entry["count"] += 1
+        entry["confidenceSum"] += r["confidence"]
+        entry["severity"][r["severity"]] += 1
+
+    by_disease = {
+        name: {
+            "count": entry["count"],
+            "meanConfidence": round(entry["confidenceSum"] / entry["count"], 2),
+            "severity": dict(entry["severity"]),
+        }
+        for name, entry in diseases.items()
+    }
+    dominant = max(by_disease, key=lambda d: (by_disease[d]["count"], by_disease[d]["meanConfidence"]), default=None)
+
+    return {
+        "images": len(results),
+        "analyzed": len(analyzed),
+        "failed": len(results) - len(analyzed),
+        "healthy": len(analyzed) - len(affected),
+        "affected": len(affected),
+        "fractionAffected": round(len(affected) / len(analyzed), 3) if analyzed else None,
+        "dominantDisease": dominant,
+        "diseases": by_disease,
+    }
+
+
+def predict_plot(items):
+    """Validate, predict and summarize a batch. Returns {"results": [...], "summary": {...}}."""
+    validate(items)
+    results = predict_many(items)
+    return {"results": results, "summary": summarize(results)}
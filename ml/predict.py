@@ -2,98 +2,568 @@ import json
 import os
 import sys
 import argparse
+import atexit
+import functools
+import hashlib
+import threading
+import time
+
+_import_started = time.perf_counter()
 import tensorflow as tf
-from tensorflow.keras.preprocessing import image # type: ignore
+TF_IMPORT_SECONDS = time.perf_counter() - _import_started
 import numpy as np
 
-# Parse command line arguments
-parser = argparse.ArgumentParser()
-parser.add_argument("--image", type=str, help="Path to image file")
-parser.add_argument("--crop", type=str, default="tomato", help="Crop type (tomato, potato, etc.)")
-args = parser.parse_args()
+import serving_bundle
+import shared_backbone
+import metrics
+from cascade import CascadePolicy
+from disease_info import DEFAULT_LANG, DiseaseInfoIndex
+from image_io import ImageDecodeError, ImageTooLargeError, load_image
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache, cache_key
+from tflite_model import TFLiteModel
+from utils.preprocessing import IMG_SIZE, with_normalization
 
-# Determine model and class indices paths based on crop
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-crop = args.crop.lower()
-MODEL_PATH = os.path.join(SCRIPT_DIR, "models", f"{crop}_model.h5")
-CLASS_INDICES_PATH = os.path.join(SCRIPT_DIR, "models", f"{crop}_class_indices.json")
-
-# Check if model exists
-if not os.path.exists(MODEL_PATH):
-    print(json.dumps({
-        "error": f"Model for {crop} not found. Please train the model first.",
-        "modelPath": MODEL_PATH
-    }))
-    sys.exit(1)
-
-if not os.path.exists(CLASS_INDICES_PATH):
-    print(json.dumps({
-        "error": f"Class indices for {crop} not found.",
-        "classIndicesPath": CLASS_INDICES_PATH
-    }))
-    sys.exit(1)
-
-# Load model
-try:
-    model = tf.keras.models.load_model(MODEL_PATH)
-except Exception as e:
-    print(json.dumps({"error": f"Failed to load model: {str(e)}"}))
-    sys.exit(1)
-
-# Load class indices
-with open(CLASS_INDICES_PATH, "r") as f:
-    class_indices = json.load(f)
-
-# Invert dictionary to get index -> class mapping
-CLASS_NAMES = {v: k for k, v in class_indices.items()}
+MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
 
-# Predict function
-def predict_image(img_path):
-    try:
-        img = image.load_img(img_path, target_size=(224, 224))
-        x = image.img_to_array(img)
-        x = np.expand_dims(x, axis=0)
-        x = x / 255.0  # Normalize
-
-        preds = model.predict(x, verbose=0)
-        predicted_class_index = np.argmax(preds[0])
-        predicted_class_name = CLASS_NAMES[predicted_class_index]
-        confidence = float(preds[0][predicted_class_index] * 100)
-
-        # Determine severity based on disease and confidence
-        is_healthy = predicted_class_name.lower() in ["healthy", "healthy_plant"]
-        
-        if is_healthy:
-            severity = "None"
-        elif confidence > 85:
-            severity = "High"
-        elif confidence > 70:
-            severity = "Moderate"
-        else:
-            severity = "Low"
+# Default model backend:
+#   "h5"      each crop's full .h5 model through Keras
+#   "shared"  one shared backbone plus per-crop heads (shared_backbone.py)
+#   "bundle"  TFLite serving bundles (serving_bundle.py)
+#   "tflite"  post-training-quantized TFLite models (quantize.py), variant set by TFLITE_VARIANT
+#   "student" compact distilled students (distill.py)
+MODEL_FORMAT = os.environ.get("MODEL_FORMAT", "h5").lower()
+MODEL_FORMATS = ("h5", "shared", "bundle", "tflite", "student")
+TFLITE_VARIANT = os.environ.get("TFLITE_VARIANT", "int8").lower()
+
+# Supported crops (keep in sync with SUPPORTED_CROPS in backend/routes/predict.js)
+SUPPORTED_CROPS = [
+    "apple",
+    "cherry_(including_sour)",
+    "corn_(maize)",
+    "grape",
+    "peach",
+    "pepper_bell",
+    "potato",
+    "strawberry",
+    "tomato"
+]
+
+
+def model_paths(crop, backend=None):
+    """Return (model_path, class_indices_path) for a crop."""
+    crop = crop.lower()
+    backend = backend or MODEL_FORMAT
+    if backend == "shared" and shared_backbone.has_head(crop):
+        model_path = shared_backbone.head_path(crop)
+    elif backend == "bundle":
+        return serving_bundle.bundle_paths(crop)
+    elif backend == "tflite":
+        model_path = quantized_model_path(crop, TFLITE_VARIANT)
+    elif backend == "student":
+        model_path = os.path.join(MODELS_DIR, f"{crop}_student.h5")
+    else:
+        model_path = os.path.join(MODELS_DIR, f"{crop}_model.h5")
+    class_indices_path = os.path.join(MODELS_DIR, f"{crop}_class_indices.json")
+    return model_path, class_indices_path
+
+
+def quantized_model_path(crop, variant):
+    return os.path.join(MODELS_DIR, "quantized", f"{crop.lower()}_{variant}.tflite")
 
+
+def check_crop(crop):
+    """
+    Return an error payload (HTTP 400) for a crop outside SUPPORTED_CROPS, else None
+
+    Callers check this before anything is labelled with the crop, so client
+    supplied names cannot create new metrics series.
+    """
+    if crop.lower() not in SUPPORTED_CROPS:
+        return {"error": f"Unsupported crop: {crop}", "supportedCrops": SUPPORTED_CROPS, "status": 400}
+    return None
+
+
+def check_model_files(crop, backend=None):
+    """Return an error payload if the crop's model files are missing, else None."""
+    if (backend or MODEL_FORMAT) not in MODEL_FORMATS:
+        return {"error": f"Unknown model backend: {backend or MODEL_FORMAT}"}
+
+    model_path, class_indices_path = model_paths(crop, backend)
+
+    if not os.path.exists(model_path):
         return {
-            "disease": predicted_class_name,
-            "confidence": round(confidence, 2),
-            "severity": severity,
-            "crop": crop.capitalize()
+            "error": f"Model for {crop} not found. Please train the model first.",
+            "modelPath": model_path
         }
+
+    if not os.path.exists(class_indices_path):
+        return {
+            "error": f"Class indices for {crop} not found.",
+            "classIndicesPath": class_indices_path
+        }
+
+    return None
+
+
+def _load_from_disk(crop, backend=None):
+    backend = backend or MODEL_FORMAT
+    model_path, class_indices_path = model_paths(crop, backend)
+    if backend == "bundle":
+        model, class_names, _ = serving_bundle.load_bundle(crop, import_seconds=TF_IMPORT_SECONDS)
+        return model, class_names
+    if backend == "shared" and shared_backbone.has_head(crop):
+        model = shared_backbone.HeadModel(shared_backbone.get_shared_backbone(), crop)
+    elif backend == "tflite":
+        model = TFLiteModel(model_path)
+    else:
+        # Trained models take normalized floats; serve them with the rescaling in the graph
+        model = with_normalization(tf.keras.models.load_model(model_path))
+
+    with open(class_indices_path, "r") as f:
+        class_indices = json.load(f)
+
+    # Invert dictionary to get index -> class mapping
+    class_names = {v: k for k, v in class_indices.items()}
+    return model, class_names
+
+
+# Loaded models, kept warm between predictions (LRU, see model_registry.py), one registry per backend
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(backend=None):
+    backend = backend or MODEL_FORMAT
+    with _registries_lock:
+        if backend not in _registries:
+            # Only the default backend persists request counts (used for pre-warming)
+            counts_path = os.path.join(MODELS_DIR, "request_counts.json") if backend == MODEL_FORMAT else None
+            _registries[backend] = ModelRegistry.from_env(
+                functools.partial(_load_from_disk, backend=backend),
+                counts_path=counts_path
+            )
+        return _registries[backend]
+
+
+registry = get_registry()
+atexit.register(registry.save_counts)
+
+# Results keyed on image bytes + crop + model version (see prediction_cache.py)
+prediction_cache = PredictionCache.from_env()
+
+# Student-first cascade, escalating low-confidence requests to the full model (see cascade.py)
+cascade_policy = CascadePolicy.from_env()
+
+# Treatment info, compiled on first use (see disease_info.py)
+disease_index = DiseaseInfoIndex.from_env()
+
+
+def _collect_gauges():
+    cache = prediction_cache.stats()
+    yield "farmai_models_loaded", "Crop models resident in memory.", {(): len(registry.stats()["loaded"])}
+    yield "farmai_models_resident_bytes", "Memory charged to resident models.", {(): registry.resident_bytes()}
+    yield "farmai_prediction_cache_lookups", "Prediction cache lookups by outcome (since start).", {
+        (("result", "hit"),): cache.get("hits", 0),
+        (("result", "disk_hit"),): cache.get("diskHits", 0),
+        (("result", "coalesced"),): cache.get("coalesced", 0),
+        (("result", "miss"),): cache.get("misses", 0),
+    }
+
+
+metrics.register_collector(_collect_gauges)
+metrics.register_collector(cascade_policy.collect_metrics)
+
+
+def model_version(crop, backend=None):
+    """Fingerprint of the crop's model files on disk, so retrained models never reuse cached results."""
+    backend = backend or MODEL_FORMAT
+    paths = list(model_paths(crop, backend))
+    if backend == "shared" and shared_backbone.has_head(crop):
+        paths.append(shared_backbone.BACKBONE_PATH)
+
+    digest = hashlib.sha256(backend.encode("utf-8"))
+    for path in paths:
+        st = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def read_image_bytes(source):
+    """Raw bytes of an image given as a path, bytes or a file-like object."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        return source.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def load_crop_model(crop, backend=None):
+    """
+    Load (or return the already loaded) model and class names for a crop
+
+    Returns:
+        model, class_names (dict of index -> class name)
+    """
+    return get_registry(backend).get(crop)
+
+
+def preload_models(crops=None):
+    """Load every available crop model up front. Returns the crops that loaded."""
+    available = [crop for crop in crops or SUPPORTED_CROPS if not check_model_files(crop)]
+    return registry.prewarm(crops=available)
+
+
+def load_image_array(source, timings=None):
+    """
+    Load an image as a (224, 224, 3) uint8 array, ready for the serving models
+
+    Normalization happens inside the model graph (see utils/preprocessing.py),
+    so the decoded buffer is used as is. `source` may be a file path, raw
+    bytes or a file-like object (see image_io.py); `timings` receives the
+    decode / preprocess durations in ms.
+    """
+    return load_image(source, target_size=IMG_SIZE, timings=timings)
+
+
+def predict_batch(crop, batch, backend=None):
+    """Run the crop model on a (N, 224, 224, 3) uint8 batch and return the (N, classes) scores."""
+    model, _ = load_crop_model(crop, backend)
+    return model.predict(batch, verbose=0)
+
+
+def format_prediction(preds, class_names, crop):
+    """Turn one row of model scores into the {disease, confidence, severity, crop} payload."""
+    predicted_class_index = int(np.argmax(preds))
+    predicted_class_name = class_names[predicted_class_index]
+    confidence = float(preds[predicted_class_index] * 100)
+
+    # Determine severity based on disease and confidence
+    is_healthy = predicted_class_name.lower() in ["healthy", "healthy_plant"]
+
+    if is_healthy:
+        severity = "None"
+    elif confidence > 85:
+        severity = "High"
+    elif confidence > 70:
+        severity = "Moderate"
+    else:
+        severity = "Low"
+
+    return {
+        "disease": predicted_class_name,
+        "confidence": round(confidence, 2),
+        "severity": severity,
+        "crop": crop.capitalize()
+    }
+
+
+def _predict_uncached(source, crop, batcher=None, backend=None, cascade=False):
+    try:
+        _, class_names = load_crop_model(crop, backend)
+    except Exception as e:
+        return {"error": f"Failed to load model: {str(e)}"}
+
+    try:
+        timings = {} if metrics.ENABLED else None
+        x = load_image_array(source, timings=timings)
+
+        started = time.perf_counter()
+        escalated = True
+        if cascade:
+            student_scores = predict_batch(crop, np.expand_dims(x, axis=0), "student")[0]
+            preds, escalated = cascade_policy.gate(crop, student_scores)
+        if escalated:
+            if batcher is not None:
+                preds = batcher.predict(crop, x)
+            else:
+                preds = predict_batch(crop, np.expand_dims(x, axis=0), backend)[0]
+        inferred = time.perf_counter()
+
+        result = format_prediction(preds, class_names, crop)
+        if cascade:
+            result["servedBy"] = "full" if escalated else "student"
+
+        if timings is not None:
+            timings["inference"] = (inferred - started) * 1000
+            timings["postprocess"] = (time.perf_counter() - inferred) * 1000
+            metrics.observe_stages_ms(timings)
+        return result
+    except (ImageTooLargeError, ImageDecodeError) as e:
+        # "status" is the HTTP status the servers answer with (413 / 400)
+        return {"error": str(e), "status": e.status}
     except Exception as e:
         return {"error": f"Prediction failed: {str(e)}"}
 
-# Main execution
-if __name__ == "__main__":
+
+# Predict function
+def predict_image(img_path, crop="tomato", batcher=None, use_cache=True, backend=None, cascade=None):
+    """
+    Predict the disease in a leaf image
+
+    Args:
+        img_path: Path to the image file, or the image itself as bytes / a file-like object
+        crop (str): Crop name (e.g., 'tomato', 'potato')
+        batcher (MicroBatcher): Optional batching queue (see batching.py); when
+            given, the image is scored together with concurrent requests
+        use_cache (bool): Reuse results for identical image bytes (see prediction_cache.py)
+        backend (str): Model backend (see MODEL_FORMATS), default MODEL_FORMAT; the
+            batcher only serves the default backend and is skipped for others
+        cascade (bool): Try the crop's student model first and only run `backend`
+            when it is unsure (see cascade.py); default CASCADE_ENABLED. Ignored
+            for the student backend or when the crop has no student model.
+
+    Returns:
+        dict with disease, confidence, severity and crop (plus servedBy when
+        cascading), or an error; errors caused by the image itself carry the
+        HTTP "status" to answer with (413 too large, 400 undecodable)
+    """
+    crop = crop.lower()
+    unsupported = check_crop(crop)
+    if unsupported:
+        metrics.REQUESTS.inc(crop="other")
+        metrics.REQUEST_ERRORS.inc(crop="other")
+        return unsupported
+
+    backend = (backend or MODEL_FORMAT).lower()
+    if cascade is None:
+        cascade = cascade_policy.enabled
+    cascade = cascade and backend != "student" and check_model_files(crop, "student") is None
+
+    metrics.REQUESTS.inc(crop=crop)
+    result = _predict_image(img_path, crop, batcher, use_cache, backend, cascade)
+    if "error" in result:
+        metrics.REQUEST_ERRORS.inc(crop=crop)
+    return result
+
+
+def _predict_image(img_path, crop, batcher, use_cache, backend, cascade):
+    if backend != MODEL_FORMAT:
+        batcher = None
+
+    missing = check_model_files(crop, backend)
+    if missing:
+        return missing
+
+    registry.record_request(crop)
+
+    if not (use_cache and prediction_cache.enabled):
+        return _predict_uncached(img_path, crop, batcher, backend, cascade)
+
+    try:
+        image_bytes = read_image_bytes(img_path)
+        version = model_version(crop, backend)
+        if cascade:
+            version = f"{version}:{model_version(crop, 'student')}:{cascade_policy.version(crop)}"
+        key = cache_key(image_bytes, crop, version)
+    except Exception as e:
+        return {"error": f"Prediction failed: {str(e)}"}
+
+    return prediction_cache.get_or_compute(
+        key, lambda: _predict_uncached(image_bytes, crop, batcher, backend, cascade)
+    )
+
+
+def disease_info_for(crop, disease, lang=DEFAULT_LANG):
+    """Treatment info for a predicted disease (see disease_info.py), generic advice if unknown."""
+    started = time.perf_counter()
+    info = disease_index.info_for(crop, disease, lang or DEFAULT_LANG)
+    metrics.observe_stage("disease_info", time.perf_counter() - started)
+    return info
+
+
+def with_disease_info(result, lang=DEFAULT_LANG):
+    """The predict_image payload plus "diseaseInfo" (unchanged if it has an error)."""
+    if "error" in result:
+        return result
+    return {**result, "diseaseInfo": disease_info_for(result["crop"], result["disease"], lang)}
+
+
+def predict_all_crops(img_path, crops=None):
+    """
+    Score one image against every crop's head with a single backbone pass
+    (needs the shared backbone export, see shared_backbone.py)
+
+    Returns:
+        list of predict_image-style payloads, most confident first
+    """
+    crops = [c for c in crops or SUPPORTED_CROPS if shared_backbone.has_head(c)]
+    if not os.path.exists(shared_backbone.BACKBONE_PATH) or not crops:
+        return [{"error": "Shared backbone not exported. Run ml/shared_backbone.py first."}]
+
+    try:
+        # Heads come from the shared registry, so they count against its budget
+        loaded = {crop: get_registry("shared").get(crop) for crop in crops}
+        x = np.expand_dims(load_image_array(img_path), axis=0)
+        scores = shared_backbone.get_shared_backbone().predict_all(
+            x, {crop: model.head for crop, (model, _) in loaded.items()}
+        )
+    except Exception as e:
+        return [{"error": f"Prediction failed: {str(e)}"}]
+
+    results = [format_prediction(scores[crop][0], loaded[crop][1], crop) for crop in crops]
+    return sorted(results, key=lambda r: r["confidence"], reverse=True)
+
+
+def handle_request(line):
+    """
+    Handle one JSON-lines daemon request:
+        {"id": 1, "image": "/path/to/leaf.jpg", "crop": "tomato"}
+    The response echoes the id next to the usual predict_image payload.
+    With "includeInfo": true (and optionally "lang"), the payload also carries
+    "diseaseInfo" (see with_disease_info).
+    {"stats": true} returns the model registry and prediction cache stats instead.
+    """
+    try:
+        req = json.loads(line)
+    except ValueError as e:
+        return {"error": f"Invalid request: {str(e)}"}
+    if not isinstance(req, dict):
+        return {"error": "Invalid request: expected a JSON object"}
+
+    req_id = req.get("id")
+    img_path = req.get("image")
+    crop = req.get("crop", "tomato")
+
+    if req.get("stats"):
+        result = {
+            "models": registry.stats(),
+            "cache": prediction_cache.stats(),
+            "diseaseInfo": disease_index.stats(),
+            "cascade": cascade_policy.stats(),
+        }
+    elif not img_path or not isinstance(img_path, str):
+        result = {"error": "No image path provided"}
+    elif not isinstance(crop, str):
+        result = {"error": "Invalid request: crop must be a string"}
+    elif not os.path.exists(img_path):
+        result = {"error": f"Image file not found: {img_path}"}
+    else:
+        result = predict_image(img_path, crop, backend=req.get("backend"),
+                               cascade=req.get("cascade"))
+        if req.get("includeInfo"):
+            result = with_disease_info(result, req.get("lang"))
+
+    if req_id is not None:
+        result = {"id": req_id, **result}
+    return result
+
+
+def _request_id(line):
+    """Best-effort id of a raw request line, for error responses."""
+    try:
+        req = json.loads(line)
+    except ValueError:
+        return None
+    return req.get("id") if isinstance(req, dict) else None
+
+
+def respond(line):
+    """
+    handle_request for a daemon loop: any exception becomes an error response
+    (echoing the request id) so one bad line cannot take the daemon down.
+    """
+    try:
+        result = handle_request(line)
+        return json.dumps(result)
+    except Exception as e:
+        print(f"Request failed: {e!r}", file=sys.stderr, flush=True)
+        result = {"error": f"Request failed: {str(e)}"}
+        req_id = _request_id(line)
+        if req_id is not None:
+            result = {"id": req_id, **result}
+        return json.dumps(result)
+
+
+def serve_stdio():
+    """JSON-lines daemon over stdin/stdout: one request per line, one response per line."""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        print(respond(line), flush=True)
+
+
+def serve_socket(socket_path):
+    """JSON-lines daemon over a local Unix socket (one connection per client)."""
+    import socketserver
+
+    predict_lock = threading.Lock()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                with predict_lock:
+                    response = respond(line)
+                self.wfile.write((response + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+        print(f"Listening on {socket_path}", file=sys.stderr, flush=True)
+        server.serve_forever()
+
+
+def main():
+    # Parse command line arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", type=str, help="Path to image file")
+    parser.add_argument("--crop", type=str, default="tomato", help="Crop type (tomato, potato, etc.)")
+    parser.add_argument("--backend", type=str, choices=MODEL_FORMATS,
+                        help="Model backend (default: MODEL_FORMAT env or h5)")
+    parser.add_argument("--cascade", action="store_true", default=None,
+                        help="Try the student model first, escalating when unsure (see cascade.py)")
+    parser.add_argument("--with-info", action="store_true",
+                        help="Include the disease's treatment info (diseaseInfo) in the output")
+    parser.add_argument("--lang", type=str, default=DEFAULT_LANG, help="Language of the disease info (en, hi, mr)")
+    parser.add_argument("--all-crops", action="store_true",
+                        help="Score the image against every crop's head (shared backbone export)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep models warm and serve JSON-lines requests on stdin/stdout")
+    parser.add_argument("--socket", type=str,
+                        help="With --daemon, serve on this Unix socket path instead of stdin/stdout")
+    args = parser.parse_args()
+
+    if args.daemon:
+        loaded = preload_models()
+        # Readiness line so the parent process knows the models are warm
+        print(json.dumps({"ready": True, "crops": loaded}), flush=True)
+        if args.socket:
+            serve_socket(args.socket)
+        else:
+            serve_stdio()
+        return
+
     if not args.image:
         print(json.dumps({"error": "No image path provided"}))
         sys.exit(1)
-    
+
     if not os.path.exists(args.image):
         print(json.dumps({"error": f"Image file not found: {args.image}"}))
         sys.exit(1)
-    
-    result = predict_image(args.image)
+
+    if args.all_crops:
+        results = predict_all_crops(args.image)
+        print(json.dumps(results))
+        if "error" in results[0]:
+            sys.exit(1)
+        return
+
+    result = predict_image(args.image, args.crop, backend=args.backend, cascade=args.cascade)
+    if args.with_info:
+        result = with_disease_info(result, args.lang)
     print(json.dumps(result))
-    
+
     if "error" in result:
         sys.exit(1)
+
+
+# Main execution
+if __name__ == "__main__":
+    main()
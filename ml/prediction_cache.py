@@ -0,0 +1,161 @@
+"""
+Content-addressed prediction cache with in-flight request coalescing
+
+Results are keyed on sha256(image bytes) + crop + model version, so a re-sent
+photo (retries, flaky networks, the history page re-running detection) is
+answered without running the model again. Concurrent requests for the same key
+wait for the one inference already running instead of starting their own.
+
+Configuration (environment):
+    PREDICTION_CACHE_SIZE  In-memory LRU entries (default 1024, 0 disables the cache)
+    PREDICTION_CACHE_DIR   Optional directory for an on-disk tier that survives restarts
+"""
+
+import collections
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import Future
+
+
+def cache_key(image_bytes, crop, model_version):
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return hashlib.sha256(f"{digest}:{crop.lower()}:{model_version}".encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """
+    Bounded LRU of prediction payloads with an optional on-disk tier
+
+    Args:
+        max_entries (int): In-memory entries to keep
+        disk_dir (str): Directory for the on-disk tier (None = memory only)
+    """
+
+    def __init__(self, max_entries=1024, disk_dir=None):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._entries = collections.OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._counters = collections.Counter()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", "1024")),
+            disk_dir=os.environ.get("PREDICTION_CACHE_DIR") or None,
+        )
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached result for `key`, or call compute() once and cache it.
+        Results containing an "error" are returned but never cached.
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return dict(result)
+
+            owner = None
+            future = self._inflight.get(key)
+            if future is not None:
+                # Someone is already computing this key, share their result
+                self._counters["coalesced"] += 1
+            else:
+                future = self._inflight[key] = Future()
+                future.set_running_or_notify_cancel()
+                owner = future
+
+        if future is not owner:
+            return dict(future.result())
+
+        try:
+            result = self._read_disk(key)
+            if result is not None:
+                self._count("diskHits")
+            else:
+                self._count("misses")
+                result = compute()
+                if "error" not in result:
+                    self._write_disk(key, result)
+
+            if "error" not in result:
+                with self._lock:
+                    self._entries[key] = result
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            future.set_result(result)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        return dict(result)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+            inflight = len(self._inflight)
+        lookups = sum(counters.get(k, 0) for k in ("hits", "diskHits", "coalesced", "misses"))
+        served = sum(counters.get(k, 0) for k in ("hits", "diskHits", "coalesced"))
+        return {
+            "entries": entries,
+            "maxEntries": self.max_entries,
+            "diskDir": self.disk_dir,
+            "inflight": inflight,
+            "hits": counters.get("hits", 0),
+            "diskHits": counters.get("diskHits", 0),
+            "coalesced": counters.get("coalesced", 0),
+            "misses": counters.get("misses", 0),
+            "hitRate": round(served / lookups, 4) if lookups else 0.0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, result):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # stderr: stdout is the daemon's JSON-lines channel
+            print(f"Could not write prediction cache entry: {e}", file=sys.stderr)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
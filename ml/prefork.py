@@ -0,0 +1,306 @@
+"""
+Pre-forked multi-worker launcher for the Flask inference services
+
+The parent process binds the listening socket, imports TensorFlow/Keras and
+reads the model files once, then forks the workers. Every worker accepts on
+the shared socket, so scaling out no longer means N cold, independent servers.
+
+What is shared: TensorFlow's runtime is not fork-safe once it has created
+its thread pools, so the parent only imports the libraries (the bulk of a
+worker's RSS is the TF/Keras module and code pages, shared copy-on-write)
+and pulls the model files into the page cache. Each worker creates its own
+TF variables after the fork, once its thread pools are sized.
+
+Each worker pins TensorFlow's intra-op/inter-op thread pools (TF's defaults
+size each pool to all cores, so N workers oversubscribe the machine) and can
+be pinned to its own slice of CPUs.
+
+    python ml/prefork.py serve --workers 4 --intra-op 2 --affinity
+    python ml/prefork.py autotune --crop tomato      # writes ml/serving_config.json
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), "backend")
+MODELS_DIR = os.path.join(SCRIPT_DIR, "models")
+CONFIG_PATH = os.path.join(SCRIPT_DIR, "serving_config.json")
+
+
+def load_config(path=CONFIG_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def cpu_slices(workers, cpus=None):
+    """Split the available CPUs into one contiguous slice per worker."""
+    cpus = sorted(cpus if cpus is not None else os.sched_getaffinity(0))
+    per_worker = max(1, len(cpus) // workers)
+    return [cpus[(i * per_worker) % len(cpus):][:per_worker] for i in range(workers)]
+
+
+def configure_threads(intra_op, inter_op, cpus=None):
+    """Size TF's thread pools (must run before TensorFlow executes anything) and pin CPUs."""
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    os.environ["OMP_NUM_THREADS"] = str(intra_op)
+
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+
+def preload_parent():
+    """Work done once in the parent and inherited by every worker."""
+    import numpy  # noqa: F401
+    import tensorflow  # noqa: F401
+
+    # Pull model files into the page cache, shared by all workers
+    if os.path.isdir(MODELS_DIR):
+        for root, _, files in os.walk(MODELS_DIR):
+            for filename in files:
+                if filename.endswith((".h5", ".keras", ".tflite", ".json")):
+                    with open(os.path.join(root, filename), "rb") as f:
+                        while f.read(1 << 20):
+                            pass
+
+
+def import_app(name):
+    """The Flask app to serve: "ml" (ml/server.py) or "backend" (backend/app.py)."""
+    if name == "backend":
+        sys.path.insert(0, BACKEND_DIR)
+        return importlib.import_module("app").app
+    return importlib.import_module("server").app
+
+
+def run_worker(sock, app_name, intra_op, inter_op, cpus):
+    from werkzeug.serving import make_server
+
+    configure_threads(intra_op, inter_op, cpus)
+    app = import_app(app_name)
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    print(f"   Worker {os.getpid()} ready (intra_op={intra_op}, inter_op={inter_op}, cpus={cpus or 'all'})",
+          flush=True)
+    server.serve_forever()
+
+
+def serve(args):
+    config = load_config()
+    workers = args.workers or config.get("workers", 2)
+    intra_op = args.intra_op or config.get("intraOpThreads", max(1, (os.cpu_count() or 1) // workers))
+    inter_op = args.inter_op or config.get("interOpThreads", 1)
+    affinity = args.affinity or config.get("affinity", False)
+    if config.get("batchSize") and "BATCH_MAX_SIZE" not in os.environ:
+        os.environ["BATCH_MAX_SIZE"] = str(config["batchSize"])
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    started = time.perf_counter()
+    preload_parent()
+    print(f"🔧 Parent preloaded in {time.perf_counter() - started:.1f}s, forking {workers} workers "
+          f"on {args.host}:{args.port}", flush=True)
+
+    slices = cpu_slices(workers) if affinity else [None] * workers
+    children = {}
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                run_worker(sock, args.app, intra_op, inter_op, slices[index])
+            finally:
+                os._exit(1)
+        children[pid] = index
+
+    def shutdown(signum, frame):
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for index in range(workers):
+        spawn(index)
+
+    # Supervise: replace workers that die
+    while True:
+        pid, status = os.wait()
+        index = children.pop(pid, None)
+        if index is not None:
+            print(f"⚠️ Worker {pid} exited with status {status}, restarting", flush=True)
+            time.sleep(1)
+            spawn(index)
+
+
+def bench_worker(args):
+    """Measure images/sec for one worker configuration (run as a subprocess by autotune)."""
+    configure_threads(args.intra_op, args.inter_op, [int(c) for c in args.cpus.split(",")] if args.cpus else None)
+
+    import numpy as np
+    from predict import predict_batch
+
+    batch = np.random.randint(0, 256, (args.batch, 224, 224, 3), dtype=np.uint8)
+    predict_batch(args.crop, batch)  # warm up
+
+    images, latencies = 0, []
+    deadline = time.perf_counter() + args.seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        predict_batch(args.crop, batch)
+        latencies.append(time.perf_counter() - started)
+        images += args.batch
+
+    print(json.dumps({
+        "imagesPerSecond": images / sum(latencies),
+        "batchLatencyMs": 1000 * float(np.median(latencies)),
+    }))
+
+
+def _bench_result(proc, stderr_file):
+    """(measurement, None) from a finished bench worker, or (None, reason) if it failed."""
+    stdout, _ = proc.communicate()
+    with stderr_file:
+        stderr_file.seek(0)
+        stderr = stderr_file.read()
+    lines = stdout.strip().splitlines()
+    if proc.returncode == 0 and lines:
+        try:
+            return json.loads(lines[-1]), None
+        except ValueError:
+            pass
+    tail = "\n".join(stderr.strip().splitlines()[-5:]) or "(no output)"
+    return None, f"exit code {proc.returncode}:\n{tail}"
+
+
+def autotune(args):
+    """Benchmark worker x thread x batch combinations on this host and save the best."""
+    cpus = sorted(os.sched_getaffinity(0))
+    worker_options = sorted({w for w in (1, 2, 4, 8, 16) if w <= len(cpus)})
+    thread_options = sorted({t for t in (1, 2, 4, 8, 16) if t <= len(cpus)})
+    batch_options = [int(b) for b in args.batches.split(",")]
+
+    results = []
+    for workers, threads, batch in itertools.product(worker_options, thread_options, batch_options):
+        if workers * threads > len(cpus):
+            continue
+
+        slices = cpu_slices(workers, cpus)
+        procs = []
+        for i in range(workers):
+            # stderr (TF logs) goes to a file: a full pipe would stall a worker mid-benchmark
+            stderr_file = tempfile.TemporaryFile(mode="w+")
+            procs.append((subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "bench-worker",
+                 "--crop", args.crop, "--batch", str(batch), "--seconds", str(args.seconds),
+                 "--intra-op", str(threads), "--inter-op", "1",
+                 "--cpus", ",".join(map(str, slices[i]))],
+                stdout=subprocess.PIPE, stderr=stderr_file, text=True
+            ), stderr_file))
+        outputs, failures = [], []
+        for proc, stderr_file in procs:
+            output, error = _bench_result(proc, stderr_file)
+            if error is None:
+                outputs.append(output)
+            else:
+                failures.append(error)
+        if failures:
+            print(f"   ❌ workers={workers} threads={threads} batch={batch}: "
+                  f"{len(failures)}/{workers} bench worker(s) failed, {failures[0]}", file=sys.stderr, flush=True)
+            continue
+
+        result = {
+            "workers": workers,
+            "intraOpThreads": threads,
+            "interOpThreads": 1,
+            "batchSize": batch,
+            "imagesPerSecond": round(sum(o["imagesPerSecond"] for o in outputs), 2),
+            "batchLatencyMs": round(max(o["batchLatencyMs"] for o in outputs), 2),
+        }
+        results.append(result)
+        print(f"   workers={workers} threads={threads} batch={batch}: "
+              f"{result['imagesPerSecond']} img/s, {result['batchLatencyMs']} ms/batch", flush=True)
+
+    if not results:
+        sys.exit("❌ Every configuration failed, nothing saved (see the bench worker errors above)")
+
+    # Best throughput among configurations that meet the latency budget
+    eligible = [r for r in results if r["batchLatencyMs"] <= args.max_batch_latency_ms] or results
+    best = max(eligible, key=lambda r: r["imagesPerSecond"])
+
+    config = {
+        "workers": best["workers"],
+        "intraOpThreads": best["intraOpThreads"],
+        "interOpThreads": best["interOpThreads"],
+        "batchSize": best["batchSize"],
+        "affinity": True,
+        "host": {"cpus": len(cpus)},
+        "measured": best,
+        "candidates": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(config, f, indent=2)
+    print(f"\n✅ Best: {best['workers']} workers x {best['intraOpThreads']} threads, batch {best['batchSize']} "
+          f"({best['imagesPerSecond']} img/s). Saved to {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-forked inference server and thread autotuner")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="Run the pre-forked server")
+    p.add_argument("--app", choices=["ml", "backend"], default="ml")
+    p.add_argument("--host", type=str, default="0.0.0.0")
+    p.add_argument("--port", type=int, default=6000)
+    p.add_argument("--workers", type=int, help="Worker processes (default: serving_config.json or 2)")
+    p.add_argument("--intra-op", type=int, help="TF intra-op threads per worker")
+    p.add_argument("--inter-op", type=int, help="TF inter-op threads per worker")
+    p.add_argument("--affinity", action="store_true", help="Pin each worker to its own CPU slice")
+    p.set_defaults(func=serve)
+
+    p = sub.add_parser("autotune", help="Benchmark worker/thread/batch combinations")
+    p.add_argument("--crop", type=str, default="tomato")
+    p.add_argument("--batches", type=str, default="1,4,8,16", help="Comma-separated batch sizes to try")
+    p.add_argument("--seconds", type=float, default=5.0, help="Measurement time per combination")
+    p.add_argument("--max-batch-latency-ms", type=float, default=500.0)
+    p.add_argument("--output", type=str, default=CONFIG_PATH)
+    p.set_defaults(func=autotune)
+
+    p = sub.add_parser("bench-worker", help=argparse.SUPPRESS)
+    p.add_argument("--crop", type=str, default="tomato")
+    p.add_argument("--batch", type=int, default=1)
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--intra-op", type=int, default=1)
+    p.add_argument("--inter-op", type=int, default=1)
+    p.add_argument("--cpus", type=str, default="")
+    p.set_defaults(func=bench_worker)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
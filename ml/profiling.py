@@ -0,0 +1,253 @@
+"""
+On-demand profiling of the inference path
+
+Profiles a live server without restarting it under a profiler. A request is
+profiled when:
+
+    - it carries "X-Profile: 1" (or "X-Profile: tf" to add a TensorFlow trace),
+    - the admin endpoint armed the profiler for the next N requests
+      (POST /admin/profile {"requests": 5, "tfTrace": true}), or
+    - it is picked by random sampling (PROFILE_SAMPLE_RATE)
+
+Each profiled request writes a cProfile dump (<name>.prof, open with snakeviz,
+`python -m pstats` or gprof2dot) plus a plain-text top-functions summary, and
+with tfTrace a TensorFlow profiler trace (open the tf/ folder in TensorBoard's
+Profile tab). The file name comes back in the X-Profile-File response header.
+
+Profiled requests bypass the micro-batcher so the forward pass runs on the
+profiled thread. Only one request is profiled at a time; others that would
+have been profiled meanwhile run normally.
+
+Configuration (environment):
+    PROFILING_ENABLED    "1" to honour headers and the admin endpoint (default off)
+    PROFILING_TOKEN      If set, required in X-Profile-Token / the admin request
+    PROFILE_SAMPLE_RATE  Fraction of requests profiled at random (default 0)
+    PROFILE_DIR          Output folder (default ml/cache/profiles)
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROFILE_DIR = os.path.join(SCRIPT_DIR, "cache", "profiles")
+
+# Guard against filling the disk when sampling is left on
+MAX_PROFILE_FILES = 500
+
+
+class Capture:
+    """One request's profiling session (see Profiler.claim)."""
+
+    def __init__(self, profiler, label, tf_trace):
+        self.profiler = profiler
+        self.label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label)[:60] or "request"
+        self.tf_trace = tf_trace
+        self.name = None
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn under the profiler (unprofiled if another capture is running)."""
+        if not self.profiler._busy.acquire(blocking=False):
+            self.profiler._missed()
+            return fn(*args, **kwargs)
+
+        try:
+            self.name = f"{time.strftime('%Y%m%d-%H%M%S')}_{self.label}_{os.getpid()}_{self.profiler._next_id()}"
+            tf_dir = self._start_tf_trace() if self.tf_trace else None
+            profile = cProfile.Profile()
+            started = time.perf_counter()
+            profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                elapsed = time.perf_counter() - started
+                if tf_dir is not None:
+                    self._stop_tf_trace()
+                try:
+                    self.profiler._write(self.name, profile, elapsed, tf_dir)
+                except Exception as e:
+                    # A full disk or unwritable PROFILE_DIR must not fail the request itself
+                    print(f"Profile {self.name} not written: {e!r}", file=sys.stderr, flush=True)
+                    self.name = None
+        finally:
+            self.profiler._busy.release()
+
+    def _start_tf_trace(self):
+        import tensorflow as tf
+
+        tf_dir = os.path.join(self.profiler.out_dir, "tf", self.name)
+        try:
+            tf.profiler.experimental.start(tf_dir)
+            return tf_dir
+        except Exception:
+            return None  # a trace started elsewhere (e.g. TensorBoard) is still running
+
+    def _stop_tf_trace(self):
+        import tensorflow as tf
+
+        try:
+            tf.profiler.experimental.stop()
+        except Exception:
+            pass
+
+
+class Profiler:
+    """
+    Decides which requests get profiled and writes the results
+
+    Args:
+        out_dir (str): Folder for .prof / .txt files and TF traces
+        enabled (bool): Honour X-Profile headers and arm() (sampling works regardless)
+        token (str): Shared secret required by headers and the admin endpoint
+        sample_rate (float): Fraction of requests profiled at random
+    """
+
+    def __init__(self, out_dir=DEFAULT_PROFILE_DIR, enabled=False, token=None, sample_rate=0.0):
+        self.out_dir = out_dir
+        self.enabled = enabled
+        self.token = token
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._armed = 0
+        self._armed_tf = False
+        self._ids = 0
+        self._counters = {"profiled": 0, "missed": 0}
+        self._recent = []
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            out_dir=os.environ.get("PROFILE_DIR") or DEFAULT_PROFILE_DIR,
+            enabled=os.environ.get("PROFILING_ENABLED", "0") == "1",
+            token=os.environ.get("PROFILING_TOKEN") or None,
+            sample_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", "0")),
+        )
+
+    def authorized(self, token):
+        if not self.enabled:
+            return False
+        if self.token is None:
+            return True
+        return token is not None and hmac.compare_digest(str(token), self.token)
+
+    def arm(self, requests=1, tf_trace=False):
+        """
+        Profile the next `requests` requests (0 disarms)
+
+        Raises:
+            ValueError: requests is not a non-negative integer or tf_trace is not a boolean
+        """
+        if isinstance(requests, str) and requests.strip().isdigit():
+            requests = int(requests)
+        if isinstance(requests, bool) or not isinstance(requests, int) or requests < 0:
+            raise ValueError(f"requests must be a non-negative integer, got {requests!r}")
+        if not isinstance(tf_trace, bool):
+            raise ValueError(f"tfTrace must be true or false, got {tf_trace!r}")
+
+        with self._lock:
+            self._armed = requests
+            self._armed_tf = tf_trace
+        return self.status()
+
+    def claim(self, label, header=None, token=None):
+        """
+        Decide whether the current request is profiled
+
+        Args:
+            label (str): Name used in the output files (e.g. crop or route)
+            header (str): Value of the X-Profile request header
+            token (str): Value of the X-Profile-Token request header
+
+        Returns:
+            a Capture to run the request's work through, or None
+        """
+        if header and header != "0" and self.authorized(token):
+            return Capture(self, label, tf_trace=header.lower() == "tf")
+
+        if self.enabled and self._armed:
+            with self._lock:
+                if self._armed > 0:
+                    self._armed -= 1
+                    return Capture(self, label, tf_trace=self._armed_tf)
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return Capture(self, label, tf_trace=False)
+        return None
+
+    def status(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sampleRate": self.sample_rate,
+                "armedRequests": self._armed,
+                "armedTfTrace": self._armed_tf,
+                "outDir": self.out_dir,
+                **self._counters,
+                "recent": list(self._recent),
+            }
+
+    def _next_id(self):
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def _missed(self):
+        with self._lock:
+            self._counters["missed"] += 1
+
+    def _write(self, name, profile, elapsed, tf_dir):
+        os.makedirs(self.out_dir, exist_ok=True)
+        prof_path = os.path.join(self.out_dir, name + ".prof")
+        profile.dump_stats(prof_path)
+
+        summary = io.StringIO()
+        summary.write(f"{name}: {elapsed * 1000:.1f} ms wall\n\n")
+        pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(40)
+        with open(os.path.join(self.out_dir, name + ".txt"), "w") as f:
+            f.write(summary.getvalue())
+
+        entry = {"name": name, "prof": prof_path, "ms": round(elapsed * 1000, 1)}
+        if tf_dir is not None:
+            entry["tfTrace"] = tf_dir
+        with self._lock:
+            self._counters["profiled"] += 1
+            self._recent = (self._recent + [entry])[-20:]
+
+        self._prune()
+
+    def _prune(self):
+        try:
+            files = sorted(
+                (os.path.join(self.out_dir, f) for f in os.listdir(self.out_dir) if f.endswith((".prof", ".txt"))),
+                key=os.path.getmtime
+            )
+        except OSError:
+            return
+        for path in files[:max(0, len(files) - 2 * MAX_PROFILE_FILES)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        # TF traces (one folder per profiled request) under the same limit
+        tf_root = os.path.join(self.out_dir, "tf")
+        try:
+            traces = sorted(
+                (os.path.join(tf_root, d) for d in os.listdir(tf_root)),
+                key=os.path.getmtime
+            )
+        except OSError:
+            return
+        for path in traces[:max(0, len(traces) - MAX_PROFILE_FILES)]:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,253 @@
+"""
+Post-training quantization of the crop models to TFLite
+
+Our servers are CPU-only, and a float32 MobileNetV2 through Keras
+model.predict leaves most of the CPU's speed unused. This converts each
+crop's .h5 into a post-training-quantized TFLite model, run by the TFLite
+interpreter (XNNPACK delegate on by default). Like the serving bundles, the
+converted graph takes uint8 images and rescales them itself:
+
+    int8     integer weights and activations, calibrated on images from
+             ml/data/<Crop>/train
+    float16  float16 weights, float32 compute (no calibration needed)
+
+Each conversion is evaluated against the Keras model on the crop's test
+split. The report (top-1 accuracy of both, prediction agreement and median
+latency) is always written; the model is only written to
+models/quantized/<crop>_<variant>.tflite when the top-1 accuracy drop stays
+within --max-drift.
+
+    python ml/quantize.py --crop tomato --variant int8 --max-drift 1.0
+
+Serve with MODEL_FORMAT=tflite TFLITE_VARIANT=int8 (see predict.py), or per
+request with predict_image(..., backend="tflite").
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from image_io import load_image
+from predict import MODELS_DIR, SUPPORTED_CROPS, quantized_model_path
+from tflite_model import TFLiteModel
+from utils.preprocess import _list_images, get_data_dirs
+from utils.preprocessing import with_normalization
+
+QUANTIZED_DIR = os.path.join(MODELS_DIR, "quantized")
+VARIANTS = ("int8", "float16")
+
+
+def calibration_paths(train_dir, samples, seed=0):
+    """A class-balanced random sample of training images for int8 calibration."""
+    filepaths, classes, _ = _list_images(train_dir)
+    by_class = {}
+    for path, label in zip(filepaths, classes):
+        by_class.setdefault(label, []).append(path)
+
+    rng = random.Random(seed)
+    for paths in by_class.values():
+        rng.shuffle(paths)
+
+    # Round-robin across classes so rare diseases are represented in the activation ranges
+    selected = []
+    while len(selected) < samples and any(by_class.values()):
+        for paths in by_class.values():
+            if paths and len(selected) < samples:
+                selected.append(paths.pop())
+    return selected
+
+
+def convert(model, variant, calibration=None):
+    """
+    Convert a trained Keras model to a quantized TFLite flatbuffer with uint8 input
+
+    Args:
+        model: Keras model (normalized float input, as trained)
+        variant (str): "int8" or "float16"
+        calibration (list): Image paths for the int8 representative dataset
+
+    Returns:
+        tflite model bytes
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(with_normalization(model))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if variant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        if not calibration:
+            raise ValueError("int8 quantization needs calibration images")
+
+        def representative_dataset():
+            for path in calibration:
+                yield [np.expand_dims(load_image(path), axis=0)]
+
+        converter.representative_dataset = representative_dataset
+        # The uint8 -> float cast at the input has no int8 kernel, everything after it is int8
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8, tf.lite.OpsSet.TFLITE_BUILTINS]
+    else:
+        raise ValueError(f"Unknown variant: {variant}")
+
+    return converter.convert()
+
+
+def evaluate(keras_model, tflite_model, test_dir, limit=None, batch_size=32):
+    """
+    Compare the Keras and TFLite models on a test split
+
+    Returns:
+        dict with top-1 accuracy of both models, agreement and latencies
+    """
+    filepaths, labels, _ = _list_images(test_dir)
+    if limit:
+        order = random.Random(0).sample(range(len(filepaths)), min(limit, len(filepaths)))
+        filepaths = [filepaths[i] for i in order]
+        labels = [labels[i] for i in order]
+    labels = np.asarray(labels)
+
+    keras_top1, tflite_top1 = [], []
+    keras_ms, tflite_ms = [], []
+    for start in range(0, len(filepaths), batch_size):
+        batch = np.stack([load_image(p) for p in filepaths[start:start + batch_size]])
+
+        started = time.perf_counter()
+        keras_preds = keras_model.predict(batch, verbose=0)
+        keras_ms.append((time.perf_counter() - started) * 1000 / len(batch))
+
+        started = time.perf_counter()
+        tflite_preds = tflite_model.predict(batch)
+        tflite_ms.append((time.perf_counter() - started) * 1000 / len(batch))
+
+        keras_top1.append(np.argmax(keras_preds, axis=1))
+        tflite_top1.append(np.argmax(tflite_preds, axis=1))
+
+    keras_top1 = np.concatenate(keras_top1)
+    tflite_top1 = np.concatenate(tflite_top1)
+
+    # Single-image latency is what a request sees
+    sample = np.expand_dims(load_image(filepaths[0]), axis=0)
+    single = {}
+    for name, model in (("keras", lambda x: keras_model.predict(x, verbose=0)), ("tflite", tflite_model.predict)):
+        model(sample)
+        timings = []
+        for _ in range(20):
+            started = time.perf_counter()
+            model(sample)
+            timings.append((time.perf_counter() - started) * 1000)
+        single[name] = round(float(np.median(timings)), 2)
+
+    keras_accuracy = float(np.mean(keras_top1 == labels)) * 100
+    tflite_accuracy = float(np.mean(tflite_top1 == labels)) * 100
+    return {
+        "images": int(len(labels)),
+        "keras": {
+            "top1Accuracy": round(keras_accuracy, 2),
+            "latencyMs": single["keras"],
+            "batchLatencyMsPerImage": round(float(np.median(keras_ms)), 2),
+        },
+        "tflite": {
+            "top1Accuracy": round(tflite_accuracy, 2),
+            "latencyMs": single["tflite"],
+            "batchLatencyMsPerImage": round(float(np.median(tflite_ms)), 2),
+        },
+        "top1Drift": round(keras_accuracy - tflite_accuracy, 2),
+        "agreement": round(float(np.mean(keras_top1 == tflite_top1)) * 100, 2),
+        "speedup": round(single["keras"] / single["tflite"], 2) if single["tflite"] else None,
+    }
+
+
+def quantize_crop(crop, variant, max_drift, calibration_samples=200, eval_limit=None, data_crop=None):
+    """
+    Convert, evaluate and (if within max_drift) deploy one crop's quantized model
+
+    Returns:
+        the report dict ("deployed" tells whether the model was written)
+    """
+    crop = crop.lower()
+    h5_path = os.path.join(MODELS_DIR, f"{crop}_model.h5")
+    if not os.path.exists(h5_path):
+        raise FileNotFoundError(f"Model not found for {crop}: {h5_path}")
+
+    train_dir, test_dir = get_data_dirs(data_crop or crop.capitalize())
+    keras_model = tf.keras.models.load_model(h5_path)
+
+    calibration = calibration_paths(train_dir, calibration_samples) if variant == "int8" else None
+    started = time.perf_counter()
+    tflite_bytes = convert(keras_model, variant, calibration)
+    convert_seconds = time.perf_counter() - started
+
+    os.makedirs(QUANTIZED_DIR, exist_ok=True)
+    target = quantized_model_path(crop, variant)
+    candidate = target + ".candidate"
+    with open(candidate, "wb") as f:
+        f.write(tflite_bytes)
+
+    try:
+        metrics = evaluate(with_normalization(keras_model), TFLiteModel(candidate), test_dir, limit=eval_limit)
+        deployed = metrics["top1Drift"] <= max_drift
+        if deployed:
+            os.replace(candidate, target)
+    finally:
+        if os.path.exists(candidate):
+            os.remove(candidate)
+
+    report = {
+        "crop": crop,
+        "variant": variant,
+        "sourceModel": os.path.basename(h5_path),
+        "calibrationImages": len(calibration) if calibration else 0,
+        "convertSeconds": round(convert_seconds, 1),
+        "sizeBytes": {"keras": os.path.getsize(h5_path), "tflite": len(tflite_bytes)},
+        "maxDrift": max_drift,
+        "deployed": deployed,
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        **metrics,
+    }
+    with open(os.path.join(QUANTIZED_DIR, f"{crop}_{variant}_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize crop models to TFLite and check accuracy drift")
+    parser.add_argument("--crop", nargs="*", default=SUPPORTED_CROPS,
+                        help="Crops to convert (default: every supported crop with a trained model)")
+    parser.add_argument("--variant", choices=VARIANTS, default="int8")
+    parser.add_argument("--max-drift", type=float, default=1.0,
+                        help="Largest top-1 accuracy drop (percentage points) allowed to deploy")
+    parser.add_argument("--calibration-samples", type=int, default=200,
+                        help="Training images used to calibrate int8 activation ranges")
+    parser.add_argument("--eval-limit", type=int, help="Evaluate on at most N test images")
+    parser.add_argument("--data-crop", type=str, help="Data folder name if it isn't the capitalized crop name")
+    args = parser.parse_args()
+
+    rejected = False
+    for crop in args.crop:
+        if not os.path.exists(os.path.join(MODELS_DIR, f"{crop.lower()}_model.h5")):
+            print(f"   Skipped {crop}: no trained model")
+            continue
+
+        print(f"🔧 Quantizing {crop} ({args.variant})...")
+        report = quantize_crop(crop, args.variant, args.max_drift, args.calibration_samples,
+                               args.eval_limit, args.data_crop)
+        print(f"   Keras  top-1 {report['keras']['top1Accuracy']:.2f}%  {report['keras']['latencyMs']:.1f} ms")
+        print(f"   TFLite top-1 {report['tflite']['top1Accuracy']:.2f}%  {report['tflite']['latencyMs']:.1f} ms"
+              f"  ({report['speedup']}x, agreement {report['agreement']:.2f}%)")
+        if report["deployed"]:
+            print(f"✅ {crop} {args.variant} saved to: {quantized_model_path(crop, args.variant)}")
+        else:
+            rejected = True
+            print(f"❌ {crop} {args.variant} not deployed: drift {report['top1Drift']:.2f} > {args.max_drift}")
+
+    if rejected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,67 @@
-from flask import Flask, request, jsonify
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
-import numpy as np
-import json
+import time
+
+from flask import Flask, Response, g, request, jsonify
+
+import metrics
+from admission import AdmissionController, Overloaded
+from batching import MicroBatcher
+from disease_info import CONTENT_TYPE as DISEASE_INFO_CONTENT_TYPE, DiseaseInfoNotFound, not_modified
+from predict import cascade_policy, disease_index, disease_info_for, predict_batch, predict_image, prediction_cache, registry
+from plot_predict import FRAMED_CONTENT_TYPE, BatchRequestError, parse_framed, parse_multipart, predict_plot
+from profiling import Profiler
+from tiling import options_from_params, predict_tiles
 
 app = Flask(__name__)
 
-# Load your pre-trained model
-model = load_model("models/tomato_model.h5")
-with open("models/class_indices.json", "r") as f:
-    class_indices = json.load(f)
-class_indices = {v:k for k,v in class_indices.items()}
+# Load your pre-trained models (MODEL_PREWARM picks the most requested crops)
+registry.prewarm_from_env(default_crops=["tomato"])
+
+# Concurrent requests for the same crop share one forward pass
+# (tune with BATCH_MAX_SIZE / BATCH_MAX_WAIT_MS)
+batcher = MicroBatcher.from_env(predict_batch)
+
+# Bounded inference pool: fast 429/503 instead of timeouts under overload
+# (tune with MAX_IN_FLIGHT / MAX_QUEUE)
+admission = AdmissionController.from_env()
+metrics.register_collector(admission.collect_metrics)
+
+# Opt-in profiling of live requests (PROFILING_ENABLED / PROFILE_SAMPLE_RATE, see profiling.py)
+profiler = Profiler.from_env()
+
+class PredictionFailed(RuntimeError):
+    def __init__(self, result):
+        super().__init__(result["error"])
+        # 413 / 400 for oversized or undecodable images, 500 otherwise
+        self.status = result.get("status", 500)
+
+def predict(img_path, crop="tomato", profile=None):
+    if profile is not None:
+        # Unbatched and uncached, so the forward pass runs on the profiled thread
+        result = admission.call(profile.run, predict_image, img_path, crop, use_cache=False)
+    else:
+        result = admission.call(predict_image, img_path, crop, batcher=batcher)
+    if "error" in result:
+        raise PredictionFailed(result)
+    return result["disease"]
+
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def observe_latency(response):
+    # Every route, error responses included, labelled by rule so crop names don't multiply the series
+    if request.url_rule is not None and request.endpoint != "metrics_route":
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.started, endpoint=request.url_rule.rule)
+    return response
+
+@app.errorhandler(PredictionFailed)
+def prediction_failed(e):
+    return jsonify({"prediction": None, "error": str(e)}), e.status
 
-def predict(img_path):
-    img = image.load_img(img_path, target_size=(224,224))
-    img_array = image.img_to_array(img)/255.0
-    img_array = np.expand_dims(img_array, axis=0)
-    preds = model.predict(img_array)
-    class_id = np.argmax(preds)
-    return class_indices[class_id]
+@app.errorhandler(Overloaded)
+def overloaded(e):
+    return jsonify(e.to_dict()), e.status, {"Retry-After": str(e.retry_after)}
 
 @app.route("/predict", methods=["POST"])
 def predict_route():
@@ -26,8 +69,124 @@ def predict_route():
     img_path = data.get("imagePath")
     if not img_path:
         return jsonify({"prediction": None})
-    pred = predict(img_path)
-    return jsonify({"prediction": pred})
+    crop = data.get("crop", "tomato")
+    profile = profiler.claim(crop, request.headers.get("X-Profile"), request.headers.get("X-Profile-Token"))
+    pred = predict(img_path, crop, profile)
+    payload = {"prediction": pred}
+    if data.get("includeInfo"):
+        # Saves callers a separate /api/disease-info round trip
+        payload["diseaseInfo"] = disease_info_for(crop, pred, data.get("lang"))
+    response = jsonify(payload)
+    if profile is not None and profile.name:
+        response.headers["X-Profile-File"] = profile.name
+    return response
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch_route():
+    # {"imagePaths": [...], "crop": ...} or {"images": [{"imagePath": ..., "crop": ...}]},
+    # multipart "images" uploads or the binary framing (see plot_predict.py)
+    try:
+        if request.mimetype == FRAMED_CONTENT_TYPE:
+            items = parse_framed(request.get_data(), default_crop=request.args.get("crop", "tomato"))
+        elif request.mimetype == "multipart/form-data":
+            items = parse_multipart(request.files, request.form, default_crop="tomato")
+        else:
+            data = request.get_json(silent=True)
+            items = paths_from_json({} if data is None else data)
+        profile = profiler.claim("batch", request.headers.get("X-Profile"), request.headers.get("X-Profile-Token"))
+        if profile is None:
+            return jsonify(admission.call(predict_plot, items))
+        response = jsonify(admission.call(profile.run, predict_plot, items))
+        if profile.name:
+            response.headers["X-Profile-File"] = profile.name
+        return response
+    except BatchRequestError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/predict/tiled", methods=["POST"])
+def predict_tiled_route():
+    # Large field / drone image as {"imagePath": ..., "crop": ..., "stride": ...}
+    # or a multipart "image" upload with the same fields (see tiling.py)
+    if request.mimetype == "multipart/form-data":
+        params = request.form
+        source = request.files["image"].read() if "image" in request.files else None
+    else:
+        params = request.get_json(silent=True) or {}
+        source = params.get("imagePath")
+    if not source:
+        return jsonify({"error": "No image provided"}), 400
+    try:
+        options = options_from_params(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = admission.call(predict_tiles, source, **options)
+    return jsonify(result), result.get("status", 500) if "error" in result else 200
+
+def paths_from_json(data):
+    """(image_path, crop) pairs from a JSON batch body. Raises BatchRequestError."""
+    if not isinstance(data, dict):
+        raise BatchRequestError("Request body must be a JSON object")
+    crop = data.get("crop", "tomato")
+    if "images" in data:
+        images = data["images"]
+        if not isinstance(images, list) or not all(isinstance(item, dict) for item in images):
+            raise BatchRequestError("images must be a list of {\"imagePath\": ..., \"crop\": ...} objects")
+        items = [(item.get("imagePath"), item.get("crop") or crop) for item in images]
+    else:
+        paths = data.get("imagePaths", [])
+        if not isinstance(paths, list):
+            raise BatchRequestError("imagePaths must be a list of paths")
+        items = [(path, crop) for path in paths]
+    for path, _ in items:
+        if not isinstance(path, str) or not path:
+            raise BatchRequestError(f"Invalid image path: {path!r}")
+    return items
+
+@app.route("/stats", methods=["GET"])
+def stats_route():
+    return jsonify({
+        "batching": batcher.stats(),
+        "models": registry.stats(),
+        "cache": prediction_cache.stats(),
+        "admission": admission.stats(),
+        "diseaseInfo": disease_index.stats(),
+        "cascade": cascade_policy.stats()
+    })
+
+@app.route("/api/disease-info/<crop>/<disease>", methods=["GET"])
+def disease_info_route(crop, disease):
+    try:
+        entry = disease_index.lookup(crop, disease, request.args.get("lang", "en"))
+    except DiseaseInfoNotFound as e:
+        return jsonify(e.payload), 404
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if not_modified(request.headers.get("If-None-Match"), entry.etag):
+        return Response(status=304, headers=headers)
+    return Response(entry.body, content_type=DISEASE_INFO_CONTENT_TYPE, headers=headers)
+
+@app.route("/api/disease-info", methods=["GET"])
+def disease_info_crops():
+    return jsonify({"crops": disease_index.crops()})
+
+@app.route("/admin/profile", methods=["GET", "POST"])
+def profile_admin():
+    # {"requests": N, "tfTrace": true} profiles the next N prediction requests
+    if not profiler.enabled:
+        return jsonify({"error": "Not found"}), 404
+    if not profiler.authorized(request.headers.get("X-Profile-Token")):
+        return jsonify({"error": "Forbidden"}), 403
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        try:
+            return jsonify(profiler.arm(data.get("requests", 1), data.get("tfTrace", False)))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(profiler.status())
+
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 if __name__ == "__main__":
-    app.run(port=6000)
+    app.run(port=6000, threaded=True)
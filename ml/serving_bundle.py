@@ -0,0 +1,195 @@
+"""
+Fast cold-start serving bundles
+
+Loading a crop from its .h5 means parsing HDF5, rebuilding the Keras graph
+and tracing it on the first model.predict call. A serving bundle is exported
+once after training and holds everything the server needs:
+
+    models/bundles/<crop>.v<version>/
+        model.tflite     serialized graph + weights (memory-mapped at load), uint8 input
+        manifest.json    class indices, preprocessing config, version hash
+    models/bundles/<crop> -> <crop>.v<version>    symlink to the current version
+
+Export:
+    python ml/serving_bundle.py --crops tomato potato     (default: every trained crop)
+
+Serve with MODEL_FORMAT=bundle (see predict.py). load_bundle runs a warm-up
+inference before returning and logs an import / load / first-inference
+breakdown, so startup regressions are visible in the logs.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from tflite_model import TFLiteModel
+from utils import preprocessing
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLES_DIR = os.path.join(SCRIPT_DIR, "models", "bundles")
+# 2: the graph takes uint8 images and rescales them itself
+BUNDLE_FORMAT_VERSION = 2
+
+# Preprocessing contract of the bundle (see utils/preprocessing.py); the rescale
+# is part of the graph, so callers only decode and resize
+PREPROCESSING = preprocessing.manifest()
+
+
+def bundle_dir(crop):
+    return os.path.join(BUNDLES_DIR, crop.lower())
+
+
+def bundle_paths(crop):
+    """Return (model_path, manifest_path) for a crop's bundle."""
+    # Resolve the pointer once, so both files come from the same version even
+    # if an export swaps it in between
+    directory = os.path.realpath(bundle_dir(crop))
+    return os.path.join(directory, "model.tflite"), os.path.join(directory, "manifest.json")
+
+
+def convert_to_tflite(model):
+    """Convert a trained model, with the rescaling stage in the graph (uint8 input)."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(preprocessing.with_normalization(model))
+    return converter.convert()
+
+
+def _remove(path):
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+def _prune_versions(crop, keep):
+    """Delete a crop's bundle versions other than `keep` (directory names)."""
+    prefix = crop.lower() + ".v"
+    for name in os.listdir(BUNDLES_DIR):
+        if name.startswith(prefix) and name not in keep:
+            _remove(os.path.join(BUNDLES_DIR, name))
+
+
+def export_bundle(crop, model_path, class_indices_path, preprocessing_config=PREPROCESSING, tflite_bytes=None):
+    """
+    Write a crop's serving bundle
+
+    Args:
+        crop (str): Crop name
+        model_path (str): Trained .h5 model
+        class_indices_path (str): <crop>_class_indices.json written by train_model.py
+        preprocessing_config (dict): Preprocessing contract recorded in the manifest
+        tflite_bytes (bytes): Already converted graph (default: convert the .h5 with convert_to_tflite)
+
+    Returns:
+        the bundle manifest
+    """
+    with open(class_indices_path, "r") as f:
+        class_indices = json.load(f)
+
+    if tflite_bytes is None:
+        tflite_bytes = convert_to_tflite(tf.keras.models.load_model(model_path))
+
+    version = hashlib.sha256()
+    version.update(tflite_bytes)
+    version.update(json.dumps(class_indices, sort_keys=True).encode("utf-8"))
+    version.update(json.dumps(preprocessing_config, sort_keys=True).encode("utf-8"))
+
+    manifest = {
+        "formatVersion": BUNDLE_FORMAT_VERSION,
+        "crop": crop.lower(),
+        "version": version.hexdigest()[:16],
+        "classIndices": class_indices,
+        "preprocessing": preprocessing_config,
+        "sourceModel": os.path.basename(model_path),
+        "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+    # Write a new version directory next to the current one, then repoint the
+    # <crop> symlink with os.replace (atomic), so a server resolving the link
+    # gets either the old bundle or the new one, never half of either
+    target = bundle_dir(crop)
+    version_name = f"{crop.lower()}.v{manifest['version']}"
+    version_dir = os.path.join(BUNDLES_DIR, version_name)
+    tmp_dir = version_dir + ".partial"
+    os.makedirs(BUNDLES_DIR, exist_ok=True)
+    # Leftovers of an interrupted export (including the old in-place layout)
+    for stale in (tmp_dir, target + ".partial", target + ".old"):
+        _remove(stale)
+
+    os.makedirs(tmp_dir)
+    with open(os.path.join(tmp_dir, "model.tflite"), "wb") as f:
+        f.write(tflite_bytes)
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    _remove(version_dir)
+    os.replace(tmp_dir, version_dir)
+
+    previous = os.path.basename(os.path.realpath(target)) if os.path.islink(target) else None
+    if os.path.isdir(target) and not os.path.islink(target):
+        # Pre-versioning bundle directory: a symlink cannot replace it atomically,
+        # so move it aside first (one-off migration)
+        os.replace(target, target + ".old")
+    link_tmp = target + ".link"
+    _remove(link_tmp)
+    os.symlink(version_name, link_tmp)
+    os.replace(link_tmp, target)
+    _remove(target + ".old")
+
+    # Keep the version just replaced, for readers that resolved the link before the swap
+    _prune_versions(crop, keep={version_name, previous})
+
+    return manifest
+
+
+def load_bundle(crop, import_seconds=None):
+    """
+    Load a crop's bundle and run a warm-up inference
+
+    Returns:
+        model (TFLiteModel), class_names (index -> class), manifest
+    """
+    model_path, manifest_path = bundle_paths(crop)
+
+    started = time.perf_counter()
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    model = TFLiteModel(model_path)
+    load_seconds = time.perf_counter() - started
+
+    # Warm-up so the first real request doesn't pay for allocation/kernel setup
+    height, width = manifest["preprocessing"]["imgSize"]
+    started = time.perf_counter()
+    model.predict(np.zeros((1, height, width, 3), dtype=manifest["preprocessing"]["inputDtype"]))
+    warmup_seconds = time.perf_counter() - started
+
+    timings = [f"load {load_seconds * 1000:.0f} ms", f"first inference {warmup_seconds * 1000:.0f} ms"]
+    if import_seconds is not None:
+        timings.insert(0, f"import {import_seconds * 1000:.0f} ms")
+    print(f"Bundle {crop} v{manifest['version']} ready: {', '.join(timings)}", file=sys.stderr, flush=True)
+
+    class_names = {v: k for k, v in manifest["classIndices"].items()}
+    return model, class_names, manifest
+
+
+if __name__ == "__main__":
+    from predict import SUPPORTED_CROPS
+
+    parser = argparse.ArgumentParser(description="Export serving bundles from trained .h5 models")
+    parser.add_argument("--crops", nargs="*", default=SUPPORTED_CROPS,
+                        help="Crops to export (default: every supported crop with a trained model)")
+    args = parser.parse_args()
+
+    for crop in args.crops:
+        h5_path = os.path.join(SCRIPT_DIR, "models", f"{crop.lower()}_model.h5")
+        class_indices_path = os.path.join(SCRIPT_DIR, "models", f"{crop.lower()}_class_indices.json")
+        if not os.path.exists(h5_path) or not os.path.exists(class_indices_path):
+            print(f"   Skipped {crop}: no trained model")
+            continue
+        manifest = export_bundle(crop, h5_path, class_indices_path)
+        print(f"💾 {crop} bundle v{manifest['version']} saved to: {bundle_dir(crop)}")
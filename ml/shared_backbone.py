@@ -0,0 +1,213 @@
+"""
+Shared frozen MobileNetV2 backbone with per-crop classification heads
+
+train_model.py freezes the ImageNet MobileNetV2 base, so every crop's .h5 holds
+an identical copy of the backbone plus a small GlobalAveragePooling2D ->
+Dense(128) -> Dense(n) head. This module splits the trained models into one
+backbone (which outputs the pooled 1280-d features) and one head per crop, so
+a server keeps a single backbone in memory and runs it once per image.
+
+Export:
+    python ml/shared_backbone.py                  # all crops with a trained .h5
+    python ml/shared_backbone.py --crops tomato potato
+
+Serve with MODEL_FORMAT=shared (see predict.py).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.layers import GlobalAveragePooling2D, Input
+from tensorflow.keras.models import Model
+
+from utils.preprocessing import with_normalization
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SHARED_DIR = os.path.join(SCRIPT_DIR, "models", "shared")
+BACKBONE_PATH = os.path.join(SHARED_DIR, "backbone.h5")
+MANIFEST_PATH = os.path.join(SHARED_DIR, "manifest.json")
+
+
+def head_path(crop):
+    return os.path.join(SHARED_DIR, f"{crop.lower()}_head.h5")
+
+
+_manifest_cache = (None, {})
+
+
+def read_manifest():
+    """The last export's manifest ({} if the backbone was never exported), re-read when it changes."""
+    global _manifest_cache
+    try:
+        mtime = os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    if _manifest_cache[0] != mtime:
+        try:
+            with open(MANIFEST_PATH, "r") as f:
+                _manifest_cache = (mtime, json.load(f))
+        except (OSError, ValueError):
+            return {}
+    return _manifest_cache[1]
+
+
+def has_head(crop):
+    """
+    True if the crop is served from the shared backbone: its head was exported
+    and the last export did not skip it (e.g. a fine-tuned backbone). Other
+    crops keep serving their full .h5 model under MODEL_FORMAT=shared.
+    """
+    crop = crop.lower()
+    return os.path.exists(head_path(crop)) and crop not in read_manifest().get("skipped", {})
+
+
+def _pooling_layer_index(model):
+    for i, layer in enumerate(model.layers):
+        if isinstance(layer, GlobalAveragePooling2D):
+            return i
+    raise ValueError("Model has no GlobalAveragePooling2D layer to split at")
+
+
+def split_model(model):
+    """
+    Split a trained crop model at its pooling layer
+
+    Returns:
+        backbone (image -> pooled features), head (pooled features -> class scores)
+    """
+    pool_index = _pooling_layer_index(model)
+    pool_layer = model.layers[pool_index]
+
+    backbone = Model(inputs=model.input, outputs=pool_layer.output, name="shared_backbone")
+
+    features = Input(shape=pool_layer.output.shape[1:], name="features")
+    x = features
+    for layer in model.layers[pool_index + 1:]:
+        x = layer(x)
+    head = Model(inputs=features, outputs=x, name="head")
+
+    return backbone, head
+
+
+def weights_fingerprint(model):
+    """sha256 over a model's weights, used to check that every crop shares one backbone."""
+    digest = hashlib.sha256()
+    for weights in model.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return digest.hexdigest()
+
+
+def export(crops, models_dir):
+    """Write the shared backbone once and one head per crop."""
+    os.makedirs(SHARED_DIR, exist_ok=True)
+
+    fingerprint = None
+    exported = []
+    skipped = {}
+
+    for crop in crops:
+        crop = crop.lower()
+        model_path = os.path.join(models_dir, f"{crop}_model.h5")
+        if not os.path.exists(model_path):
+            skipped[crop] = "no trained model"
+            continue
+
+        model = tf.keras.models.load_model(model_path)
+        backbone, head = split_model(model)
+        crop_fingerprint = weights_fingerprint(backbone)
+
+        if fingerprint is None:
+            fingerprint = crop_fingerprint
+            backbone.save(BACKBONE_PATH)
+            print(f"💾 Backbone saved to: {BACKBONE_PATH} ({backbone.count_params():,} params)")
+        elif crop_fingerprint != fingerprint:
+            # Fine-tuned backbone: this crop cannot share weights, keep serving its full model
+            skipped[crop] = "backbone weights differ from the shared backbone"
+            continue
+
+        head.save(head_path(crop))
+        exported.append(crop)
+        print(f"💾 {crop} head saved to: {head_path(crop)} ({head.count_params():,} params)")
+
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump({"backboneFingerprint": fingerprint, "crops": exported, "skipped": skipped}, f, indent=2)
+
+    return exported, skipped
+
+
+class SharedBackbone:
+    """
+    One loaded backbone (taking uint8 images). Heads are not cached here: each
+    HeadModel owns its head, so evicting it from the model registry frees it.
+    """
+
+    def __init__(self, backbone_path=BACKBONE_PATH):
+        self.backbone = with_normalization(tf.keras.models.load_model(backbone_path))
+
+    def load_head(self, crop):
+        return tf.keras.models.load_model(head_path(crop))
+
+    def features(self, batch):
+        return self.backbone.predict(batch, verbose=0)
+
+    def predict_all(self, batch, heads):
+        """Score a batch against several crops' heads ({crop: head}) with one backbone pass."""
+        features = self.features(batch)
+        return {crop: head.predict(features, verbose=0) for crop, head in heads.items()}
+
+
+class HeadModel:
+    """
+    Adapter that looks like a Keras model to the registry and batcher, but only
+    owns a crop head; the backbone is shared by every crop.
+    """
+
+    def __init__(self, shared, crop):
+        self.shared = shared
+        self.crop = crop.lower()
+        self.head = shared.load_head(crop)
+
+    @property
+    def weights(self):
+        return self.head.weights
+
+    input_dtype = "uint8"
+
+    def count_params(self):
+        return self.head.count_params()
+
+    def predict(self, batch, verbose=0):
+        return self.head.predict(self.shared.features(batch), verbose=verbose)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_backbone():
+    """Process-wide SharedBackbone, loaded on first use."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = SharedBackbone()
+    return _shared
+
+
+if __name__ == "__main__":
+    from predict import MODELS_DIR, SUPPORTED_CROPS
+
+    parser = argparse.ArgumentParser(description="Export shared backbone and per-crop heads")
+    parser.add_argument("--crops", nargs="*", default=SUPPORTED_CROPS,
+                        help="Crops to export (default: all supported crops)")
+    args = parser.parse_args()
+
+    exported, skipped = export(args.crops, MODELS_DIR)
+    print(f"\n Exported heads: {', '.join(exported) or 'none'}")
+    for crop, reason in skipped.items():
+        print(f"   Skipped {crop}: {reason}")
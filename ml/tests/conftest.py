@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The ml modules import each other as top-level modules (see backend/app.py)
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ML_DIR not in sys.path:
+    sys.path.insert(0, ML_DIR)
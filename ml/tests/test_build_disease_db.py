@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import build_disease_db
+from build_disease_db import COMBINED_PATH, SRC_DIR, build
+
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    """Build outputs (and a copy of the source shards) under tmp_path."""
+    src_dir = tmp_path / "src"
+    shutil.copytree(SRC_DIR, src_dir)
+    monkeypatch.setattr(build_disease_db, "SRC_DIR", str(src_dir))
+    monkeypatch.setattr(build_disease_db, "CROPS_DIR", str(tmp_path / "crops"))
+    monkeypatch.setattr(build_disease_db, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(build_disease_db, "COMBINED_PATH", str(tmp_path / "disease_database.json"))
+    return tmp_path
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_committed_shards_are_valid():
+    summary = build(check_only=True)
+    assert summary["errors"] == []
+    assert summary["built"]
+
+
+def test_build_reproduces_committed_database(scratch):
+    summary = build()
+    assert summary["errors"] == []
+    assert _read_bytes(scratch / "disease_database.json") == _read_bytes(COMBINED_PATH)
+
+    # Nothing changed: nothing is rebuilt or republished
+    summary = build()
+    assert summary["built"] == [] and not summary.get("combinedWritten")
+
+
+def test_incremental_build_rebuilds_only_the_changed_shard(scratch):
+    build()
+    shard_path = scratch / "src" / sorted(os.listdir(scratch / "src"))[0]
+    shard = json.loads(shard_path.read_text(encoding="utf-8"))
+    disease = next(iter(shard["diseases"]))
+    shard["diseases"][disease]["severity"] = "Edited"
+    shard_path.write_text(json.dumps(shard, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    summary = build()
+    assert summary["built"] == [shard_path.stem]
+    assert summary["combinedWritten"]
+    combined = json.loads((scratch / "disease_database.json").read_text(encoding="utf-8"))
+    assert combined[shard["crop"]][disease]["severity"] == "Edited"
+
+
+def test_invalid_shard_publishes_nothing(scratch):
+    build()
+    before = _read_bytes(scratch / "disease_database.json")
+
+    shard_path = scratch / "src" / sorted(os.listdir(scratch / "src"))[0]
+    shard = json.loads(shard_path.read_text(encoding="utf-8"))
+    disease = next(iter(shard["diseases"]))
+    del shard["diseases"][disease]["treatment"]["hi"]
+    shard_path.write_text(json.dumps(shard, ensure_ascii=False), encoding="utf-8")
+
+    summary = build()
+    assert any("treatment.hi missing" in error for error in summary["errors"])
+    assert _read_bytes(scratch / "disease_database.json") == before
+    assert not [name for name in os.listdir(scratch) if name.endswith(".tmp")]
@@ -0,0 +1,74 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from disease_info import DEFAULT_DB_PATH, DiseaseInfoIndex, format_info
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BACKEND_DIR = os.path.join(REPO_DIR, "backend")
+LANGUAGES = ("en", "hi", "mr", "xx")  # "xx": unknown language, falls back to English
+
+# Calls the GET /:crop/:disease handler of routes/diseaseInfo.js for every
+# crop x disease x language, without starting a server
+NODE_SCRIPT = r"""
+console.log = console.error = () => {};
+const router = require("./routes/diseaseInfo.js");
+const db = require("../ml/disease_database.json");
+const layer = router.stack.find(l => l.route && l.route.path === "/:crop/:disease");
+const handle = layer.route.stack[0].handle;
+const out = [];
+for (const crop of Object.keys(db)) {
+  for (const disease of Object.keys(db[crop])) {
+    for (const lang of JSON.parse(process.argv[1])) {
+      const res = {status() { return this; }, json(body) { out.push({crop, disease, lang, body}); }};
+      handle({params: {crop, disease}, query: {lang}}, res);
+    }
+  }
+}
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def _load_database():
+    with open(DEFAULT_DB_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def js_payloads():
+    if shutil.which("node") is None:
+        pytest.skip("node is not installed")
+    if not os.path.isdir(os.path.join(BACKEND_DIR, "node_modules", "express")):
+        pytest.skip("backend dependencies are not installed (npm install in backend/)")
+    output = subprocess.run(
+        ["node", "-e", NODE_SCRIPT, json.dumps(LANGUAGES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True, timeout=60
+    ).stdout
+    return json.loads(output)
+
+
+def test_format_info_matches_disease_info_js(js_payloads):
+    database = _load_database()
+    expected = sum(len(diseases) for diseases in database.values()) * len(LANGUAGES)
+    assert len(js_payloads) == expected
+
+    for case in js_payloads:
+        entry = database[case["crop"]][case["disease"]]
+        # JSON.stringify drops undefined fields; Python sends them as null
+        python = {k: v for k, v in format_info(case["crop"], case["disease"], entry, case["lang"]).items()
+                  if v is not None or k in case["body"]}
+        assert python == case["body"], (case["crop"], case["disease"], case["lang"])
+
+
+def test_index_serves_the_formatted_payload():
+    database = _load_database()
+    index = DiseaseInfoIndex(DEFAULT_DB_PATH)
+    crop = next(iter(database))
+    disease = next(iter(database[crop]))
+
+    compiled = index.lookup(crop.upper(), disease.lower(), "hi")
+    assert compiled.info == format_info(crop, disease, database[crop][disease], "hi")
+    assert json.loads(compiled.body.decode("utf-8")) == compiled.info
@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+import image_io
+from image_io import ImageDecodeError, ImageTooLargeError, compare_decoders, load_image
+
+# Same default as `python ml/image_io.py --max-pixel-diff`
+MAX_PIXEL_DIFF = 12.0
+
+
+def _phone_photo(width=3000, height=2000, quality=90):
+    """A textured JPEG at phone resolution: smooth gradients plus leaf-scale noise."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([x / width * 120, 80 + y / height * 120, (x + y) / (width + height) * 90], axis=-1)
+    blobs = np.kron(rng.uniform(-40, 40, size=(height // 50, width // 50, 3)), np.ones((50, 50, 1)))
+    image = np.clip(base + blobs, 0, 255).astype(np.uint8)
+
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_draft_decode_within_tolerance():
+    (_, reduced, full, diff), = compare_decoders([_phone_photo()])
+    assert reduced.shape == full.shape == (224, 224, 3)
+    assert diff <= MAX_PIXEL_DIFF
+
+
+def test_oversized_image_rejected_from_header(monkeypatch):
+    monkeypatch.setattr(image_io, "MAX_IMAGE_PIXELS", 1000 * 1000)
+    with pytest.raises(ImageTooLargeError) as e:
+        load_image(_phone_photo(width=1200, height=1000))
+    assert e.value.status == 413
+
+
+@pytest.mark.parametrize("data", [b"not an image", _phone_photo(width=400, height=300)[:2000]])
+def test_undecodable_upload(data):
+    with pytest.raises(ImageDecodeError) as e:
+        load_image(data)
+    assert e.value.status == 400
@@ -0,0 +1,64 @@
+"""
+TFLite interpreter wrapper with the model.predict interface the registry,
+batcher and predict.py use for Keras models.
+
+The interpreter memory-maps the .tflite file, so loading is cheap and the
+weights' file pages are shared by every process serving the same file.
+On CPU the interpreter runs float and quantized (int8/float16, see
+quantize.py) graphs through the XNNPACK delegate, which is on by default.
+"""
+
+import os
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+from utils.preprocessing import normalize
+
+
+class TFLiteModel:
+    """
+    Args:
+        model_path (str): .tflite file
+        num_threads (int): Interpreter threads (default: TFLITE_NUM_THREADS or all cores)
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        if num_threads is None:
+            num_threads = int(os.environ.get("TFLITE_NUM_THREADS", "0")) or None
+        self.model_path = model_path
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+        self.param_bytes = os.path.getsize(model_path)
+        self.weights = []
+
+    @property
+    def input_dtype(self):
+        return np.dtype(self._input["dtype"]).name
+
+    def count_params(self):
+        return 0
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input["index"], list(batch.shape))
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+                self._batch_size = batch.shape[0]
+
+            if batch.dtype == np.uint8 and self._input["dtype"] != np.uint8:
+                # Graph without the rescaling stage (older bundles): normalize here
+                batch = normalize(batch)
+            self.interpreter.set_tensor(self._input["index"], batch.astype(self._input["dtype"], copy=False))
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output["index"]).copy()
@@ -0,0 +1,269 @@
+"""
+Tiled inference for high-resolution field and drone images
+
+predict_image squashes a whole photo to 224x224, which is fine for one leaf
+but throws away nearly all detail in a wide field shot. Tiled mode cuts the
+image into overlapping 224x224 patches at full resolution, scores each patch
+and returns a per-tile disease map plus plot-level aggregates.
+
+    - Patches come from np.lib.stride_tricks.sliding_window_view, a zero-copy
+      view of the decoded image; the only copy is gathering each batch of
+      tiles into the model's input buffer.
+    - Near-uniform tiles (sky, bare soil, a backdrop sheet) are skipped before
+      inference: per-tile brightness spread is computed for every tile at once
+      from a summed-area table of a 4x-subsampled grayscale image.
+    - The remaining tiles run through the crop model TILE_BATCH_SIZE at a time.
+
+    python ml/tiling.py drone_frame.jpg --crop tomato --stride 112 --output tiles.json
+
+Configuration (environment):
+    TILE_BATCH_SIZE      Tiles per forward pass (default 64)
+    TILE_MAX_SIDE        Longer side the image is reduced to before tiling (default 4096)
+    TILE_BACKGROUND_STD  Tiles with a smaller grayscale std (0-255) are skipped (default 6)
+"""
+
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+import metrics
+from image_io import ImageDecodeError, ImageTooLargeError, decoded_image
+from plot_predict import summarize
+from predict import SUPPORTED_CROPS, check_crop, check_model_files, format_prediction, load_crop_model, predict_batch
+from utils.preprocessing import IMG_SIZE
+
+TILE_SIZE = IMG_SIZE[0]
+BATCH_SIZE = int(os.environ.get("TILE_BATCH_SIZE", "64"))
+MAX_SIDE = int(os.environ.get("TILE_MAX_SIDE", "4096"))
+BACKGROUND_STD = float(os.environ.get("TILE_BACKGROUND_STD", "6"))
+
+# Subsampling step for the background check (4 -> a 56x56 sample grid per tile)
+STATS_STEP = 4
+
+
+def load_full_image(source, max_side=MAX_SIDE):
+    """
+    Decode an image at (close to) full resolution as RGB uint8 (height, width, 3)
+
+    Images whose longer side exceeds max_side are reduced to it (JPEG
+    scale-on-decode first, then a resize), which bounds the tile count.
+    Images smaller than one tile are padded by edge replication.
+    """
+    with decoded_image(source) as img:
+        if max_side and max(img.size) > max_side:
+            scale = max_side / max(img.size)
+            target = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            if img.format == "JPEG":
+                img.draft("RGB", target)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            if img.size != target:
+                img = img.resize(target, Image.BILINEAR)
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        image = np.asarray(img, dtype=np.uint8)
+
+    pad_y, pad_x = max(0, TILE_SIZE - image.shape[0]), max(0, TILE_SIZE - image.shape[1])
+    if pad_y or pad_x:
+        image = np.pad(image, ((0, pad_y), (0, pad_x), (0, 0)), mode="edge")
+    return image
+
+
+def tile_offsets(length, tile=TILE_SIZE, stride=TILE_SIZE):
+    """Tile start positions along one axis; the last tile is pinned to the edge so nothing is left out."""
+    offsets = list(range(0, length - tile + 1, stride))
+    if offsets[-1] != length - tile:
+        offsets.append(length - tile)
+    return np.asarray(offsets)
+
+
+def tile_windows(image, tile=TILE_SIZE):
+    """Zero-copy view of every tile x tile window: shape (H - tile + 1, W - tile + 1, tile, tile, 3)."""
+    return np.lib.stride_tricks.sliding_window_view(image, (tile, tile, image.shape[2]))[:, :, 0]
+
+
+def tile_spread(image, ys, xs, tile=TILE_SIZE, step=STATS_STEP):
+    """
+    Grayscale standard deviation (0-255) of every tile, shape (len(ys), len(xs))
+
+    Computed from a summed-area table of a step-subsampled grayscale image,
+    so the cost does not depend on the number of (overlapping) tiles.
+    """
+    gray = image[::step, ::step].astype(np.float32) @ np.float32([0.299, 0.587, 0.114])
+    sums = np.zeros((gray.shape[0] + 1, gray.shape[1] + 1), dtype=np.float64)
+    squares = np.zeros_like(sums)
+    sums[1:, 1:] = gray.cumsum(0).cumsum(1)
+    squares[1:, 1:] = (gray.astype(np.float64) ** 2).cumsum(0).cumsum(1)
+
+    y0, x0 = (ys + step - 1) // step, (xs + step - 1) // step
+    size = max(1, tile // step)
+    y1 = np.minimum(y0 + size, gray.shape[0])
+    x1 = np.minimum(x0 + size, gray.shape[1])
+
+    def box(table):
+        return table[y1][:, x1] - table[y0][:, x1] - table[y1][:, x0] + table[y0][:, x0]
+
+    count = (y1 - y0)[:, None] * (x1 - x0)[None, :]
+    mean = box(sums) / count
+    variance = np.maximum(box(squares) / count - mean ** 2, 0)
+    return np.sqrt(variance)
+
+
+def options_from_params(params):
+    """
+    predict_tiles keyword arguments from request parameters (query string / form / JSON)
+
+    Recognizes "crop", "stride" and "backgroundStd". Raises ValueError on bad values.
+    """
+    crop = (params.get("crop") or "tomato").lower()
+    if crop not in SUPPORTED_CROPS:
+        raise ValueError(f"Unsupported crop: {crop}")
+    stride = int(params.get("stride") or TILE_SIZE // 2)
+    if not 16 <= stride <= TILE_SIZE:
+        raise ValueError(f"stride must be between 16 and {TILE_SIZE}")
+    background_std = float(params.get("backgroundStd") if params.get("backgroundStd") is not None else BACKGROUND_STD)
+    return {"crop": crop, "stride": stride, "background_std": background_std}
+
+
+def predict_tiles(source, crop="tomato", stride=TILE_SIZE // 2, batch_size=BATCH_SIZE,
+                  background_std=BACKGROUND_STD, max_side=MAX_SIDE, backend=None):
+    """
+    Score every tile of a large image
+
+    Args:
+        source: Path, bytes or file-like object
+        crop (str): Crop model to use
+        stride (int): Pixels between tile origins (< 224 overlaps tiles)
+        batch_size (int): Tiles per forward pass
+        background_std (float): Skip tiles with a smaller grayscale std (0 keeps every tile)
+        max_side (int): Reduce larger images to this longer side before tiling
+        backend (str): Model backend (see predict.MODEL_FORMATS)
+
+    Returns:
+        dict with the tile grid, a per-tile map (class index per tile, -1 for
+        skipped background), per-tile predictions, the plot_predict-style
+        summary, mean class scores and throughput; or {"error": ...}
+    """
+    crop = crop.lower()
+    unsupported = check_crop(crop)
+    if unsupported:
+        metrics.REQUESTS.inc(crop="other")
+        metrics.REQUEST_ERRORS.inc(crop="other")
+        return unsupported
+
+    metrics.REQUESTS.inc(crop=crop)
+    result = check_model_files(crop, backend)
+    if not result:
+        try:
+            result = _predict_tiles(source, crop, stride, batch_size, background_std, max_side, backend)
+        except (ImageTooLargeError, ImageDecodeError) as e:
+            result = {"error": str(e), "status": e.status}
+        except Exception as e:
+            result = {"error": f"Tiled prediction failed: {str(e)}"}
+    if "error" in result:
+        metrics.REQUEST_ERRORS.inc(crop=crop)
+    return result
+
+
+def _predict_tiles(source, crop, stride, batch_size, background_std, max_side, backend):
+    if stride <= 0:
+        return {"error": "stride must be positive"}
+
+    started = time.perf_counter()
+    _, class_names = load_crop_model(crop, backend)
+    loaded = time.perf_counter()
+    # Only the first request per crop pays for the load; keep it out of "decode"
+    metrics.observe_stage("model_load", loaded - started)
+    image = load_full_image(source, max_side)
+    decoded = time.perf_counter()
+    metrics.observe_stage("decode", decoded - loaded)
+
+    height, width = image.shape[:2]
+    ys, xs = tile_offsets(height, stride=stride), tile_offsets(width, stride=stride)
+    windows = tile_windows(image)
+
+    keep = np.ones((len(ys), len(xs)), dtype=bool)
+    if background_std > 0:
+        keep = tile_spread(image, ys, xs) >= background_std
+    rows, cols = np.nonzero(keep)
+
+    scores = np.zeros((len(rows), len(class_names)), dtype=np.float32)
+    inference_started = time.perf_counter()
+    for start in range(0, len(rows), batch_size):
+        end = start + batch_size
+        # Fancy indexing gathers the batch into one contiguous (n, 224, 224, 3) buffer
+        batch = windows[ys[rows[start:end]], xs[cols[start:end]]]
+        scores[start:end] = predict_batch(crop, batch, backend)
+        metrics.BATCH_SIZE.observe(len(batch), crop=crop)
+    inference_seconds = time.perf_counter() - inference_started
+    metrics.observe_stage("inference", inference_seconds)
+
+    tile_map = np.full((len(ys), len(xs)), -1, dtype=int)
+    tiles = []
+    for (row, col), tile_scores in zip(zip(rows, cols), scores):
+        prediction = format_prediction(tile_scores, class_names, crop)
+        tile_map[row, col] = int(np.argmax(tile_scores))
+        tiles.append({"row": int(row), "col": int(col), "x": int(xs[col]), "y": int(ys[row]), **prediction})
+
+    elapsed = time.perf_counter() - started
+    return {
+        "crop": crop.capitalize(),
+        "image": {"width": width, "height": height},
+        "grid": {"rows": len(ys), "cols": len(xs), "tileSize": TILE_SIZE, "stride": stride},
+        "classNames": [class_names[i] for i in range(len(class_names))],
+        "tileMap": tile_map.tolist(),
+        "tiles": tiles,
+        "summary": summarize(tiles),
+        "meanScores": {
+            class_names[i]: round(float(score) * 100, 2) for i, score in enumerate(scores.mean(axis=0))
+        } if len(scores) else {},
+        "stats": {
+            "tiles": int(keep.size),
+            "analyzed": len(rows),
+            "skippedBackground": int(keep.size - len(rows)),
+            "modelLoadMs": round((loaded - started) * 1000, 1),
+            "decodeMs": round((decoded - loaded) * 1000, 1),
+            "inferenceMs": round(inference_seconds * 1000, 1),
+            "totalMs": round(elapsed * 1000, 1),
+            "tilesPerSecond": round(len(rows) / inference_seconds, 1) if len(rows) and inference_seconds else None,
+        },
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Tiled disease map for a large field / drone image")
+    parser.add_argument("image", type=str, help="Image file")
+    parser.add_argument("--crop", type=str, default="tomato", help="Crop model to use")
+    parser.add_argument("--stride", type=int, default=TILE_SIZE // 2, help="Pixels between tiles (default 112)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Tiles per forward pass")
+    parser.add_argument("--background-std", type=float, default=BACKGROUND_STD,
+                        help="Skip tiles whose grayscale std is below this (0 = keep all)")
+    parser.add_argument("--max-side", type=int, default=MAX_SIDE, help="Reduce larger images to this side")
+    parser.add_argument("--backend", type=str, help="Model backend (see predict.py)")
+    parser.add_argument("--output", type=str, help="Write the full JSON result here")
+    args = parser.parse_args()
+
+    result = predict_tiles(args.image, args.crop, args.stride, args.batch_size,
+                           args.background_std, args.max_side, args.backend)
+    if "error" in result:
+        print(json.dumps(result))
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f)
+        print(f"💾 Tile map saved to {args.output}")
+
+    stats, summary = result["stats"], result["summary"]
+    print(f"🧩 {result['grid']['rows']}x{result['grid']['cols']} tiles, {stats['analyzed']} analyzed, "
+          f"{stats['skippedBackground']} background skipped")
+    print(f"⚡ {stats['tilesPerSecond']} tiles/s, {stats['totalMs']} ms total")
+    print(f"🌿 Affected: {summary['fractionAffected']}, dominant disease: {summary['dominantDisease']}")
+    for row in result["tileMap"]:
+        print("   " + " ".join("." if c < 0 else str(c) for c in row))
@@ -14,6 +14,18 @@ import argparse # take crop name as input from command line
 parser = argparse.ArgumentParser(description='Train crop disease detection model')
 parser.add_argument('--crop', type=str, default='Tomato', 
                     help='Crop name (e.g., Tomato, Potato, Rice)')
+parser.add_argument('--loader', type=str, default='generator', choices=['generator', 'tfdata'],
+                    help='Input pipeline: ImageDataGenerator or tf.data')
+parser.add_argument('--tf-cache', type=str, default=None,
+                    help='With --loader tfdata: directory for the on-disk cache of decoded images')
+parser.add_argument('--export-bundle', action='store_true',
+                    help='Also export the TFLite serving bundle after training (see serving_bundle.py)')
+parser.add_argument('--cached-features', action='store_true',
+                    help='Run the frozen base once, cache pooled features and train only the head')
+parser.add_argument('--augment-passes', type=int, default=0,
+                    help='With --cached-features: augmented passes over the training set (0 = no augmentation)')
+parser.add_argument('--cache-dir', type=str, default=None,
+                    help='With --cached-features: where feature shards are stored (default: ml/cache/features)')
 args = parser.parse_args()
 
 CROP_NAME = args.crop
@@ -22,7 +34,15 @@ print(f"Training model for: {CROP_NAME}")
 print(f"=" * 60)
 
 # Load preprocessed data for the specified crop - Splits them into training and testing
-train_generator, test_generator = load_data(crop=CROP_NAME)
+# The feature cache reads file lists from the ImageDataGenerator iterators
+train_generator, test_generator = load_data(
+    crop=CROP_NAME,
+    augment=not args.cached_features or args.augment_passes > 0,
+    loader='generator' if args.cached_features else args.loader,
+    cache=args.tf_cache
+)
+train_data = getattr(train_generator, "dataset", train_generator)
+test_data = getattr(test_generator, "dataset", test_generator)
 
 # Display dataset info
 print(f"\n Dataset loaded successfully!")
@@ -41,6 +61,49 @@ with open(class_indices_path, "w") as f:
     json.dump(train_generator.class_indices, f, indent=2)
 print(f"\n💾 Class indices saved to: {class_indices_path}")
 
+checkpoint_path = os.path.join(models_dir, f"{CROP_NAME.lower()}_model.h5")
+
+# Fast path: the base is frozen, so compute its features once and train only the head
+if args.cached_features:
+    from utils import feature_cache
+
+    cache_dir = args.cache_dir or feature_cache.DEFAULT_CACHE_DIR
+    print(f"\n🔧 Preparing cached features...")
+    feature_extractor = feature_cache.build_feature_extractor()
+    train_features = feature_cache.load_or_build(
+        train_generator, feature_extractor, cache_dir, CROP_NAME, "train",
+        augment_passes=max(1, args.augment_passes), augment=args.augment_passes > 0
+    )
+    test_features = feature_cache.load_or_build(
+        test_generator, feature_extractor, cache_dir, CROP_NAME, "test"
+    )
+
+    print(f"\n Training head on {train_features.samples} cached feature vectors...")
+    print(f"=" * 60)
+    head, history = feature_cache.train_head(
+        train_features, test_features, train_generator.num_classes,
+        callbacks=[EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True, verbose=1)]
+    )
+
+    model = feature_cache.assemble_model(feature_extractor, head)
+    model.save(checkpoint_path)
+
+    test_loss, test_accuracy = head.evaluate(
+        test_features.batches(32, shuffle=False, repeat=False), verbose=0
+    )
+    print(f"\n" + "=" * 60)
+    print(f" Training completed!")
+    print(f" Model saved to: {checkpoint_path}")
+    print(f"   Test Loss: {test_loss:.4f}")
+    print(f"   Test Accuracy: {test_accuracy * 100:.2f}%")
+    print(f"=" * 60)
+    if args.export_bundle:
+        from serving_bundle import bundle_dir, export_bundle
+        export_bundle(CROP_NAME, checkpoint_path, class_indices_path)
+        print(f"💾 Serving bundle saved to: {bundle_dir(CROP_NAME)}")
+    print(f"To test: python ml/predict.py --image <image_path> --crop {CROP_NAME.lower()}")
+    raise SystemExit(0)
+
 # Transfer learning: MobileNetV2 - This helps in faster and more accurate training.
 print(f"\n🔧 Building model...")
 base_model = tf.keras.applications.MobileNetV2(
@@ -67,7 +130,6 @@ model.compile(
 print(f" Model built successfully!")
 
 # Callbacks
-checkpoint_path = os.path.join(models_dir, f"{CROP_NAME.lower()}_model.h5")
 callbacks = [
     ModelCheckpoint(checkpoint_path, monitor='val_accuracy', save_best_only=True, verbose=1),
     EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True, verbose=1)
@@ -77,9 +139,9 @@ callbacks = [
 print(f"\n Starting training...")
 print(f"=" * 60)
 history = model.fit(
-    train_generator,
+    train_data,
     epochs=15,
-    validation_data=test_generator,
+    validation_data=test_data,
     callbacks=callbacks,
     verbose=1
 )
@@ -91,10 +153,15 @@ print(f"=" * 60)
 
 # Evaluate on test set
 print(f"\n Evaluating model...")
-test_loss, test_accuracy = model.evaluate(test_generator, verbose=0)
+test_loss, test_accuracy = model.evaluate(test_data, verbose=0)
 print(f"   Test Loss: {test_loss:.4f}")
 print(f"   Test Accuracy: {test_accuracy * 100:.2f}%")
 
+if args.export_bundle:
+    from serving_bundle import bundle_dir, export_bundle
+    export_bundle(CROP_NAME, checkpoint_path, class_indices_path)
+    print(f"\n💾 Serving bundle saved to: {bundle_dir(CROP_NAME)}")
+
 print(f"\n Training completed for {CROP_NAME}!")
 print(f"To test: python ml/predict.py --image <image_path> --crop {CROP_NAME.lower()}")
 
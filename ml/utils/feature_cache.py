@@ -0,0 +1,192 @@
+# ml/utils/feature_cache.py
+"""
+Bottleneck-feature cache for fast head training
+
+The MobileNetV2 base in train_model.py is frozen, so its pooled features for a
+given (augmented) image never change between epochs. This module runs the
+backbone once over the load_data generators, stores the pooled features in
+memory-mapped .npy shards and trains the Dense head from those shards.
+
+Cache entries are keyed by a hash of the image contents plus the preprocessing
+settings, so adding/changing images or augmentation settings builds a new entry.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.layers import Dense, GlobalAveragePooling2D, Input
+from tensorflow.keras.models import Model
+
+from utils.preprocess import TRAIN_AUGMENTATION
+from utils.preprocessing import SCALE
+
+CACHE_VERSION = 1
+SHARD_ROWS = 4096
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "features")
+
+
+def build_feature_extractor(img_size=(224, 224)):
+    """Frozen ImageNet MobileNetV2 followed by global average pooling."""
+    base_model = tf.keras.applications.MobileNetV2(
+        input_shape=(*img_size, 3),
+        include_top=False,
+        weights='imagenet'
+    )
+    base_model.trainable = False
+    features = GlobalAveragePooling2D()(base_model.output)
+    return Model(inputs=base_model.input, outputs=features)
+
+
+def build_head(num_classes, feature_dim=1280):
+    """Dense(128) -> Dense(num_classes) head, the same layers train_model.py puts on the base."""
+    features = Input(shape=(feature_dim,))
+    x = Dense(128, activation='relu')(features)
+    output = Dense(num_classes, activation='softmax')(x)
+    return Model(inputs=features, outputs=output)
+
+
+def assemble_model(feature_extractor, head):
+    """Attach a trained head to the feature extractor, giving the usual full crop model."""
+    x = feature_extractor.output
+    for layer in head.layers[1:]:
+        x = layer(x)
+    return Model(inputs=feature_extractor.input, outputs=x)
+
+
+def dataset_fingerprint(generator, settings):
+    """sha256 over every image's bytes and label plus the preprocessing settings."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    for path, label in zip(generator.filepaths, generator.classes):
+        digest.update(os.path.relpath(path, generator.directory).encode("utf-8"))
+        digest.update(str(int(label)).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def _cache_settings(generator, split, augment_passes, augment):
+    return {
+        "version": CACHE_VERSION,
+        "split": split,
+        "imgSize": list(generator.target_size),
+        "rescale": SCALE,
+        "augmentation": TRAIN_AUGMENTATION if augment else None,
+        "augmentPasses": augment_passes,
+        "backbone": "MobileNetV2/imagenet/avgpool",
+        "classIndices": generator.class_indices,
+    }
+
+
+class FeatureShards:
+    """Memory-mapped feature/label shards of one cache entry."""
+
+    def __init__(self, entry_dir):
+        with open(os.path.join(entry_dir, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.features = [
+            np.load(os.path.join(entry_dir, name), mmap_mode='r') for name in self.meta["featureShards"]
+        ]
+        self.labels = [
+            np.load(os.path.join(entry_dir, name), mmap_mode='r') for name in self.meta["labelShards"]
+        ]
+        self.samples = self.meta["samples"]
+
+    def steps(self, batch_size):
+        return sum(-(-len(labels) // batch_size) for labels in self.labels)
+
+    def batches(self, batch_size, shuffle=True, seed=None, repeat=True):
+        """Yield (features, labels) batches shard by shard, shuffled within and across shards."""
+        rng = np.random.default_rng(seed)
+        while True:
+            order = rng.permutation(len(self.features)) if shuffle else range(len(self.features))
+            for shard in order:
+                features, labels = self.features[shard], self.labels[shard]
+                rows = rng.permutation(len(labels)) if shuffle else np.arange(len(labels))
+                for start in range(0, len(rows), batch_size):
+                    idx = np.sort(rows[start:start + batch_size])
+                    yield np.asarray(features[idx]), np.asarray(labels[idx])
+            if not repeat:
+                return
+
+
+def extract_features(generator, feature_extractor, entry_dir, passes=1):
+    """Run the backbone over `passes` epochs of the generator and write .npy shards."""
+    tmp_dir = entry_dir + ".partial"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    feature_shards, label_shards = [], []
+    buffered_features, buffered_labels, buffered_rows = [], [], 0
+
+    def flush():
+        nonlocal buffered_features, buffered_labels, buffered_rows
+        if not buffered_rows:
+            return
+        index = len(feature_shards)
+        feature_shards.append(f"features_{index:05d}.npy")
+        label_shards.append(f"labels_{index:05d}.npy")
+        np.save(os.path.join(tmp_dir, feature_shards[-1]), np.concatenate(buffered_features).astype(np.float32))
+        np.save(os.path.join(tmp_dir, label_shards[-1]), np.concatenate(buffered_labels).astype(np.int32))
+        buffered_features, buffered_labels, buffered_rows = [], [], 0
+
+    for pass_index in range(passes):
+        print(f"   Extracting features, pass {pass_index + 1}/{passes} ({len(generator)} batches)")
+        generator.reset()
+        for _ in range(len(generator)):
+            images, labels = next(generator)
+            buffered_features.append(feature_extractor.predict(images, verbose=0))
+            buffered_labels.append(np.argmax(labels, axis=1))
+            buffered_rows += len(images)
+            if buffered_rows >= SHARD_ROWS:
+                flush()
+    flush()
+
+    samples = sum(len(np.load(os.path.join(tmp_dir, name), mmap_mode='r')) for name in label_shards)
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump({"featureShards": feature_shards, "labelShards": label_shards, "samples": samples}, f, indent=2)
+
+    # Publish the entry only once it is complete, so an interrupted run is never reused
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+
+
+def load_or_build(generator, feature_extractor, cache_dir, crop, split, augment_passes=1, augment=False):
+    """
+    Return FeatureShards for a generator, extracting features only if the cache
+    has no entry for the current images and preprocessing settings
+    """
+    settings = _cache_settings(generator, split, augment_passes, augment)
+    key = dataset_fingerprint(generator, settings)[:16]
+    entry_dir = os.path.join(cache_dir, crop.lower(), f"{split}-{key}")
+
+    if os.path.exists(os.path.join(entry_dir, "meta.json")):
+        print(f"   Using cached {split} features: {entry_dir}")
+    else:
+        print(f"   Building {split} feature cache: {entry_dir}")
+        extract_features(generator, feature_extractor, entry_dir, passes=augment_passes)
+
+    return FeatureShards(entry_dir)
+
+
+def train_head(train_shards, test_shards, num_classes, epochs=15, batch_size=32, callbacks=None):
+    """Train the Dense head on cached features. Returns (head, history)."""
+    head = build_head(num_classes, feature_dim=train_shards.features[0].shape[1])
+    head.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=0.0001),
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy']
+    )
+    history = head.fit(
+        train_shards.batches(batch_size),
+        steps_per_epoch=train_shards.steps(batch_size),
+        epochs=epochs,
+        validation_data=test_shards.batches(batch_size, shuffle=False),
+        validation_steps=test_shards.steps(batch_size),
+        callbacks=callbacks or [],
+        verbose=1
+    )
+    return head, history
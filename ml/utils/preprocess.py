@@ -1,19 +1,41 @@
 # ml/utils/preprocess.py
 import os
+import hashlib
+import math
+import time
 import numpy as np
+import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 
-def load_data(crop='Tomato', img_size=(224, 224), batch_size=32):
+from utils.preprocessing import IMG_SIZE, RESIZE_METHOD, SCALE, normalize
+
+# Data augmentation applied to training images (also part of the feature cache key)
+TRAIN_AUGMENTATION = dict(
+    rotation_range=20,
+    width_shift_range=0.1,
+    height_shift_range=0.1,
+    shear_range=0.1,
+    zoom_range=0.1,
+    horizontal_flip=True,
+    fill_mode="nearest"
+)
+
+# Same extensions flow_from_directory accepts
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.ppm', '.tif', '.tiff')
+
+# The subset tf.io.decode_image can read (no TIFF / PPM), used by the tf.data loader
+TF_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# Fixed seed for the one-off file order shuffle in front of the tf.data cache
+CACHE_SHUFFLE_SEED = 1337
+
+
+def get_data_dirs(crop):
     """
-    Load and preprocess images for training and testing
-    
-    Args:
-        crop (str): Crop name (e.g., 'Tomato', 'Potato', 'Rice')
-        img_size (tuple): Image dimensions (width, height)
-        batch_size (int): Batch size for training
-    
+    Locate the train/test folders for a crop
+
     Returns:
-        train_generator, test_generator
+        train_dir, test_dir
     """
     # Go up 2 levels from utils -> ml
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -27,30 +49,50 @@ def load_data(crop='Tomato', img_size=(224, 224), batch_size=32):
 
     if not os.path.exists(train_dir):
         raise FileNotFoundError(f"Training directory not found: {train_dir}")
-    
+
     if not os.path.exists(test_dir):
         raise FileNotFoundError(f"Test directory not found: {test_dir}")
 
+    return train_dir, test_dir
+
+
+def load_data(crop='Tomato', img_size=IMG_SIZE, batch_size=32, augment=True, loader='generator', cache=None):
+    """
+    Load and preprocess images for training and testing
+
+    Args:
+        crop (str): Crop name (e.g., 'Tomato', 'Potato', 'Rice')
+        img_size (tuple): Image dimensions (width, height)
+        batch_size (int): Batch size for training
+        augment (bool): Apply TRAIN_AUGMENTATION to training images
+        loader (str): 'generator' (ImageDataGenerator) or 'tfdata' (see load_data_tf)
+        cache (str): With loader='tfdata', directory for the on-disk dataset cache
+
+    Returns:
+        train_generator, test_generator
+    """
+    if loader == 'tfdata':
+        return load_data_tf(crop, img_size, batch_size, augment=augment, cache=cache)
+    if loader != 'generator':
+        raise ValueError(f"Unknown loader: {loader}")
+
+    train_dir, test_dir = get_data_dirs(crop)
+
     # Data augmentation for training
-    train_datagen = ImageDataGenerator(
-        rescale=1./255,
-        rotation_range=20,
-        width_shift_range=0.1,
-        height_shift_range=0.1,
-        shear_range=0.1,
-        zoom_range=0.1,
-        horizontal_flip=True,
-        fill_mode="nearest"
-    )
+    if augment:
+        train_datagen = ImageDataGenerator(rescale=SCALE, **TRAIN_AUGMENTATION)
+    else:
+        train_datagen = ImageDataGenerator(rescale=SCALE)
 
     # No augmentation for test, just rescale
-    test_datagen = ImageDataGenerator(rescale=1./255)
+    test_datagen = ImageDataGenerator(rescale=SCALE)
 
     train_generator = train_datagen.flow_from_directory(
         train_dir,
         target_size=img_size,
         batch_size=batch_size,
-        class_mode='categorical'
+        class_mode='categorical',
+        interpolation=RESIZE_METHOD
     )
 
     test_generator = test_datagen.flow_from_directory(
@@ -58,7 +100,210 @@ def load_data(crop='Tomato', img_size=(224, 224), batch_size=32):
         target_size=img_size,
         batch_size=batch_size,
         class_mode='categorical',
-        shuffle=False
+        shuffle=False,
+        interpolation=RESIZE_METHOD
     )
 
     return train_generator, test_generator
+
+
+class DatasetSplit:
+    """
+    A batched tf.data.Dataset plus the metadata train_model.py reads from the
+    ImageDataGenerator iterators (samples, class_indices, num_classes).
+    """
+
+    def __init__(self, dataset, filepaths, classes, class_indices, batch_size):
+        self.dataset = dataset
+        self.filepaths = filepaths
+        self.classes = np.array(classes)
+        self.class_indices = class_indices
+        self.num_classes = len(class_indices)
+        self.samples = len(filepaths)
+        self.batch_size = batch_size
+
+    def __len__(self):
+        return math.ceil(self.samples / self.batch_size)
+
+    def __iter__(self):
+        return iter(self.dataset)
+
+
+def _list_images(directory, extensions=IMAGE_EXTENSIONS):
+    """File paths and labels in flow_from_directory order (sorted class folders)."""
+    class_names = sorted(
+        name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name))
+    )
+    class_indices = {name: i for i, name in enumerate(class_names)}
+
+    filepaths, classes = [], []
+    for name in class_names:
+        class_dir = os.path.join(directory, name)
+        for root, _, files in sorted(os.walk(class_dir)):
+            for filename in sorted(files):
+                if filename.lower().endswith(extensions):
+                    filepaths.append(os.path.join(root, filename))
+                    classes.append(class_indices[name])
+    return filepaths, classes, class_indices
+
+
+def build_augmentation(settings=TRAIN_AUGMENTATION):
+    """On-graph Keras augmentation layers matching the ImageDataGenerator settings."""
+    fill_mode = settings.get("fill_mode", "nearest")
+    layers = []
+
+    if settings.get("rotation_range"):
+        # ImageDataGenerator uses degrees, RandomRotation uses fractions of a full turn
+        layers.append(tf.keras.layers.RandomRotation(settings["rotation_range"] / 360.0, fill_mode=fill_mode))
+    if settings.get("width_shift_range") or settings.get("height_shift_range"):
+        layers.append(tf.keras.layers.RandomTranslation(
+            settings.get("height_shift_range", 0.0),
+            settings.get("width_shift_range", 0.0),
+            fill_mode=fill_mode
+        ))
+    if settings.get("shear_range") and hasattr(tf.keras.layers, "RandomShear"):
+        # shear_range is an angle in degrees; RandomShear takes the shear intensity
+        shear = math.tan(math.radians(settings["shear_range"]))
+        layers.append(tf.keras.layers.RandomShear(x_factor=shear, y_factor=shear, fill_mode=fill_mode))
+    if settings.get("zoom_range"):
+        zoom = settings["zoom_range"]
+        layers.append(tf.keras.layers.RandomZoom(
+            height_factor=(-zoom, zoom),
+            width_factor=(-zoom, zoom),
+            fill_mode=fill_mode
+        ))
+    if settings.get("horizontal_flip"):
+        layers.append(tf.keras.layers.RandomFlip("horizontal"))
+
+    return tf.keras.Sequential(layers, name="augmentation")
+
+
+def _make_dataset(filepaths, classes, num_classes, img_size, batch_size,
+                  shuffle=False, augmentation=None, cache=None):
+    autotune = tf.data.AUTOTUNE
+
+    def decode(path, label):
+        raw = tf.io.read_file(path)
+        img = tf.io.decode_image(raw, channels=3, expand_animations=False)
+        # Nearest-neighbour resize keeps the uint8 dtype, so the cache stores 1 byte per pixel
+        img = tf.image.resize(img, img_size, method=RESIZE_METHOD)
+        return img, tf.one_hot(label, num_classes)
+
+    ds = tf.data.Dataset.from_tensor_slices((filepaths, classes))
+
+    if cache is None:
+        # Shuffle file paths, not decoded images, to keep the shuffle buffer small
+        if shuffle:
+            ds = ds.shuffle(len(filepaths), reshuffle_each_iteration=True)
+        ds = ds.map(decode, num_parallel_calls=autotune, deterministic=not shuffle)
+    else:
+        # The cache replays files in listing order, i.e. grouped by class, and the
+        # shuffle buffer below is much smaller than a crop's dataset: mix the
+        # classes once (fixed seed, so the cached order stays valid) before caching
+        if shuffle:
+            order = np.random.default_rng(CACHE_SHUFFLE_SEED).permutation(len(filepaths))
+            ds = tf.data.Dataset.from_tensor_slices(
+                ([filepaths[i] for i in order], [classes[i] for i in order])
+            )
+        # Cache decoded images (before augmentation, so every epoch gets new augmentations)
+        ds = ds.map(decode, num_parallel_calls=autotune).cache(cache)
+        if shuffle:
+            ds = ds.shuffle(min(len(filepaths), 2048), reshuffle_each_iteration=True)
+
+    ds = ds.batch(batch_size)
+    ds = ds.map(lambda x, y: (normalize(x), y), num_parallel_calls=autotune)
+
+    if augmentation is not None:
+        ds = ds.map(lambda x, y: (augmentation(x, training=True), y), num_parallel_calls=autotune)
+
+    return ds.prefetch(autotune)
+
+
+def _files_fingerprint(filepaths):
+    """Short hash of every file's path, size and mtime, so adding or changing images invalidates the cache."""
+    digest = hashlib.sha256()
+    for path in filepaths:
+        st = os.stat(path)
+        digest.update(f"{path}:{st.st_size}:{st.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def load_data_tf(crop='Tomato', img_size=IMG_SIZE, batch_size=32, augment=True, cache=None):
+    """
+    tf.data version of load_data: parallel decode/resize, on-graph augmentation
+    and prefetching
+
+    Args:
+        crop (str): Crop name (e.g., 'Tomato', 'Potato', 'Rice')
+        img_size (tuple): Image dimensions (width, height)
+        batch_size (int): Batch size for training
+        augment (bool): Apply TRAIN_AUGMENTATION to training images
+        cache (str): Directory for an on-disk cache of decoded images (None = no cache);
+            the cache name includes a fingerprint of the image files, so a changed
+            dataset gets a fresh cache
+
+    TIFF and PPM images are skipped (tf.io.decode_image cannot read them);
+    use loader='generator' for datasets that need them.
+
+    Returns:
+        train_split, test_split (DatasetSplit)
+    """
+    train_dir, test_dir = get_data_dirs(crop)
+    splits = []
+
+    for split, directory in (("train", train_dir), ("test", test_dir)):
+        filepaths, classes, class_indices = _list_images(directory, TF_IMAGE_EXTENSIONS)
+        unsupported = len(_list_images(directory)[0]) - len(filepaths)
+        if unsupported:
+            print(f"Skipping {unsupported} {split} image(s) that tf.data cannot decode (TIFF/PPM)")
+        is_train = split == "train"
+
+        cache_file = None
+        if cache is not None:
+            os.makedirs(cache, exist_ok=True)
+            cache_file = os.path.join(
+                cache,
+                f"{crop.lower()}_{split}_{img_size[0]}x{img_size[1]}_uint8_{_files_fingerprint(filepaths)}"
+            )
+
+        dataset = _make_dataset(
+            filepaths, classes, len(class_indices), img_size, batch_size,
+            shuffle=is_train,
+            augmentation=build_augmentation() if is_train and augment else None,
+            cache=cache_file
+        )
+        print(f"Found {len(filepaths)} images belonging to {len(class_indices)} classes.")
+        splits.append(DatasetSplit(dataset, filepaths, classes, class_indices, batch_size))
+
+    return splits[0], splits[1]
+
+
+def measure_throughput(data, batches=50):
+    """Images/sec for iterating `batches` batches of a generator or DatasetSplit."""
+    iterator = iter(data)
+    next(iterator)  # warm up (file listing, graph tracing)
+
+    images = 0
+    started = time.perf_counter()
+    for _ in range(batches):
+        try:
+            x, _ = next(iterator)
+        except StopIteration:
+            break
+        images += len(x)
+    return images / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare ImageDataGenerator and tf.data loader throughput')
+    parser.add_argument('--crop', type=str, default='Tomato')
+    parser.add_argument('--batches', type=int, default=50)
+    parser.add_argument('--cache', type=str, default=None, help='On-disk cache directory for the tf.data loader')
+    args = parser.parse_args()
+
+    for loader in ('generator', 'tfdata'):
+        train_data, _ = load_data(crop=args.crop, loader=loader, cache=args.cache)
+        rate = measure_throughput(train_data, args.batches)
+        print(f"   {loader:>9}: {rate:.1f} images/sec")
@@ -0,0 +1,69 @@
+# ml/utils/preprocessing.py
+"""
+The single definition of how an image becomes model input
+
+Training (preprocess.py), serving (predict.py, image_io.py) and exported
+models (serving_bundle.py, quantize.py) all read these values, so the
+contract cannot drift between them:
+
+    decode -> RGB -> resize to IMG_SIZE (nearest) -> uint8 NHWC
+           -> x * SCALE + OFFSET  (float32, inside the model graph when serving)
+
+Trained .h5 models take the normalized float input. Serving models take the
+uint8 buffer straight from the decoder; with_normalization() puts the
+Rescaling stage in front of a trained model so no float copy is made
+outside the graph.
+
+TensorFlow is imported lazily, so decode-only code (image_io.py) can read the
+constants without loading it.
+"""
+import numpy as np
+
+IMG_SIZE = (224, 224)
+COLOR_MODE = "rgb"
+RESIZE_METHOD = "nearest"
+SCALE = 1. / 255
+OFFSET = 0.0
+SERVING_DTYPE = "uint8"
+
+
+def manifest():
+    """The preprocessing contract as stored in serving bundle manifests."""
+    return {
+        "imgSize": list(IMG_SIZE),
+        "colorMode": COLOR_MODE,
+        "resize": RESIZE_METHOD,
+        "rescale": SCALE,
+        "offset": OFFSET,
+        "inputDtype": SERVING_DTYPE,
+    }
+
+
+def normalize(x):
+    """uint8 image(s) -> float32 model input (numpy arrays or tensors)."""
+    if isinstance(x, np.ndarray):
+        return x.astype(np.float32) * np.float32(SCALE) + np.float32(OFFSET)
+    import tensorflow as tf
+    return tf.cast(x, tf.float32) * SCALE + OFFSET
+
+
+def accepts_uint8(model):
+    """True if a model (Keras, or an adapter with an input_dtype attribute) takes raw uint8 images."""
+    try:
+        dtype = model.inputs[0].dtype
+    except (AttributeError, IndexError, TypeError):
+        dtype = getattr(model, "input_dtype", None)
+    return "uint8" in str(dtype)
+
+
+def with_normalization(model):
+    """
+    Wrap a trained model (normalized float input) into a serving model that
+    takes uint8 NHWC images and rescales them in the graph.
+    """
+    if accepts_uint8(model):
+        return model
+    import tensorflow as tf
+    inputs = tf.keras.Input(shape=tuple(model.input_shape[1:]), dtype=SERVING_DTYPE, name="image")
+    x = tf.keras.layers.Rescaling(SCALE, OFFSET, name="rescaling")(inputs)
+    return tf.keras.Model(inputs=inputs, outputs=model(x), name=f"{model.name}_serving")
@@ -0,0 +1,333 @@
+"""
+Video / frame-stream disease detection
+
+Consumes a video file, a folder (or glob) of frames, or any iterable of RGB
+frames, and yields results as it goes, for a partner walking a row with a
+phone camera:
+
+    - Each frame gets a 64-bit difference hash (dHash) from a 9x8 grayscale
+      thumbnail. Frames within HASH_THRESHOLD bits of the last analyzed frame
+      are skipped and inherit its result; every MAX_SKIP frames one is
+      analyzed anyway, so a slow pan cannot drift unnoticed.
+    - Frames that remain are batched through the crop model.
+    - Consecutive analyzed frames with the same predicted disease form a
+      segment. Each segment is emitted as soon as the next one starts, and a
+      summary (processed / skipped frames, end-to-end fps) comes last.
+
+Decoding runs on a background thread, so reading the next frames overlaps
+with inference. Video files need OpenCV (pip install opencv-python-headless);
+frame folders only need Pillow.
+
+    python ml/video_stream.py row_walk.mp4 --crop tomato --output row_walk.jsonl
+    python ml/video_stream.py "frames/*.jpg" --crop potato --fps 2
+"""
+
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+import metrics
+from batch_predict import IMAGE_EXTENSIONS
+from predict import check_crop, check_model_files, format_prediction, load_crop_model, predict_batch
+from utils.preprocessing import IMG_SIZE
+
+BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", "16"))
+HASH_THRESHOLD = int(os.environ.get("STREAM_HASH_THRESHOLD", "6"))
+MAX_SKIP = int(os.environ.get("STREAM_MAX_SKIP", "30"))
+
+# Frames decoded ahead of inference
+PREFETCH_FRAMES = 64
+
+
+def dhash(frame, hash_size=8):
+    """64-bit difference hash of an RGB uint8 frame (similar frames differ in few bits)."""
+    # A strided view shrinks big frames before Pillow touches them
+    step = max(1, min(frame.shape[0], frame.shape[1]) // (hash_size * 16))
+    thumb = Image.fromarray(np.ascontiguousarray(frame[::step, ::step])).convert("L")
+    pixels = np.asarray(thumb.resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def model_input(frame):
+    """Full frame -> (224, 224, 3) uint8, the same resize as image_io.load_image."""
+    img = Image.fromarray(frame)
+    if img.size != (IMG_SIZE[1], IMG_SIZE[0]):
+        img = img.resize((IMG_SIZE[1], IMG_SIZE[0]), Image.NEAREST)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def video_frames(path, sample_fps=None):
+    """
+    Yield (frame_index, seconds, RGB frame) from a video file (needs OpenCV)
+
+    Args:
+        sample_fps (float): Read at most this many frames per second of video;
+            dropped frames are grabbed but never converted
+    """
+    try:
+        import cv2
+    except ImportError:
+        raise ImportError("Video input needs OpenCV: pip install opencv-python-headless")
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Could not open video: {path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    every = max(1, round(fps / sample_fps)) if sample_fps else 1
+
+    try:
+        index = 0
+        while capture.grab():
+            if index % every == 0:
+                ok, bgr = capture.retrieve()
+                if not ok:
+                    break
+                yield index, index / fps, cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            index += 1
+    finally:
+        capture.release()
+
+
+def image_frames(paths, fps=None):
+    """Yield (frame_index, seconds or None, RGB frame) from image files, in order."""
+    for index, path in enumerate(paths):
+        with Image.open(path) as img:
+            frame = np.asarray(img.convert("RGB"), dtype=np.uint8)
+        yield index, (index / fps if fps else None), frame
+
+
+def open_source(source, sample_fps=None, fps=None):
+    """Frames from a video path, a folder of images or a glob pattern."""
+    if os.path.isdir(source):
+        paths = sorted(
+            os.path.join(source, name) for name in os.listdir(source) if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        return image_frames(paths, fps)
+    if any(ch in source for ch in "*?["):
+        return image_frames(sorted(glob.glob(source)), fps)
+    return video_frames(source, sample_fps)
+
+
+def _prefetch(frames, size=PREFETCH_FRAMES):
+    """Run a frame generator on a background thread, `size` frames ahead."""
+    buffer = queue.Queue(maxsize=size)
+    done = object()
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            for item in frames:
+                if not put(item):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+        finally:
+            # Runs the source's own cleanup (e.g. releasing cv2.VideoCapture)
+            # when the consumer stopped early
+            close = getattr(frames, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=reader, name="stream-decode", daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+class _Segment:
+    """Consecutive analyzed frames with the same predicted disease."""
+
+    def __init__(self, disease, frame_index, seconds):
+        self.disease = disease
+        self.start_frame = self.end_frame = frame_index
+        self.start_time = self.end_time = seconds
+        self.scores = []
+        self.skipped = 0
+
+    def payload(self, number, class_names, crop):
+        result = format_prediction(np.mean(self.scores, axis=0), class_names, crop)
+        return {
+            "segment": number,
+            "startFrame": self.start_frame,
+            "endFrame": self.end_frame,
+            "startTime": None if self.start_time is None else round(self.start_time, 3),
+            "endTime": None if self.end_time is None else round(self.end_time, 3),
+            **result,
+            "framesAnalyzed": len(self.scores),
+            "framesSkipped": self.skipped,
+        }
+
+
+class _PendingFrame:
+    """An analyzed frame waiting for its batch, plus the skipped frames that followed it."""
+
+    def __init__(self, frame_index, seconds, x):
+        self.frame_index = frame_index
+        self.seconds = seconds
+        self.x = x
+        self.skipped = 0
+        self.last_index, self.last_seconds = frame_index, seconds
+
+
+def analyze_stream(frames, crop="tomato", batch_size=BATCH_SIZE, hash_threshold=HASH_THRESHOLD,
+                   max_skip=MAX_SKIP, backend=None):
+    """
+    Detect diseases along a frame stream, yielding results incrementally
+
+    Args:
+        frames (iterable): (frame_index, seconds or None, RGB uint8 frame) tuples,
+            e.g. from open_source / video_frames / image_frames
+        crop (str): Crop model to use
+        batch_size (int): Analyzed frames per forward pass
+        hash_threshold (int): Skip frames whose dHash is within this many bits
+            of the last analyzed frame (-1 analyzes every frame)
+        max_skip (int): Analyze at least one frame in this many
+        backend (str): Model backend (see predict.MODEL_FORMATS)
+
+    Yields:
+        one dict per segment, then {"summary": {...}}; or a single {"error": ...}
+    """
+    crop = crop.lower()
+    missing = check_crop(crop) or check_model_files(crop, backend)
+    if missing:
+        yield missing
+        return
+    _, class_names = load_crop_model(crop, backend)
+
+    started = time.perf_counter()
+    counts = {"frames": 0, "analyzed": 0, "skipped": 0}
+    pending = []
+    state = {"segment": None, "segments": 0}
+    last_hash, since_analyzed = None, 0
+
+    def run_batch():
+        inference_started = time.perf_counter()
+        scores = predict_batch(crop, np.stack([p.x for p in pending]), backend)
+        metrics.observe_stage("inference", time.perf_counter() - inference_started)
+        metrics.BATCH_SIZE.observe(len(pending), crop=crop)
+
+        finished = []
+        for frame, row in zip(pending, scores):
+            disease = class_names[int(np.argmax(row))]
+            segment = state["segment"]
+            if segment is None or segment.disease != disease:
+                if segment is not None:
+                    state["segments"] += 1
+                    finished.append(segment.payload(state["segments"], class_names, crop))
+                segment = state["segment"] = _Segment(disease, frame.frame_index, frame.seconds)
+            segment.scores.append(row)
+            segment.skipped += frame.skipped
+            segment.end_frame, segment.end_time = frame.last_index, frame.last_seconds
+        pending.clear()
+        return finished
+
+    try:
+        for frame_index, seconds, image in _prefetch(iter(frames)):
+            counts["frames"] += 1
+            frame_hash = dhash(image)
+            if last_hash is not None and since_analyzed < max_skip \
+                    and hamming(frame_hash, last_hash) <= hash_threshold:
+                # Credit the skip to the analyzed frame it follows
+                counts["skipped"] += 1
+                since_analyzed += 1
+                follows = pending[-1] if pending else state["segment"]
+                follows.skipped += 1
+                if pending:
+                    follows.last_index, follows.last_seconds = frame_index, seconds
+                else:
+                    follows.end_frame, follows.end_time = frame_index, seconds
+                continue
+
+            last_hash, since_analyzed = frame_hash, 0
+            counts["analyzed"] += 1
+            pending.append(_PendingFrame(frame_index, seconds, model_input(image)))
+            if len(pending) >= batch_size:
+                yield from run_batch()
+
+        if pending:
+            yield from run_batch()
+    except Exception as e:
+        yield {"error": f"Stream failed: {str(e)}", "framesRead": counts["frames"]}
+        return
+
+    if state["segment"] is not None:
+        state["segments"] += 1
+        yield state["segment"].payload(state["segments"], class_names, crop)
+
+    elapsed = time.perf_counter() - started
+    yield {"summary": {
+        "crop": crop.capitalize(),
+        **counts,
+        "skipRate": round(counts["skipped"] / counts["frames"], 3) if counts["frames"] else None,
+        "segments": state["segments"],
+        "seconds": round(elapsed, 3),
+        "fps": round(counts["frames"] / elapsed, 1) if elapsed else None,
+        "analyzedFps": round(counts["analyzed"] / elapsed, 1) if elapsed else None,
+    }}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Continuous disease detection over a video or frame sequence")
+    parser.add_argument("source", type=str, help="Video file, folder of frames, or a quoted glob pattern")
+    parser.add_argument("--crop", type=str, default="tomato", help="Crop model to use")
+    parser.add_argument("--sample-fps", type=float, help="Video: read at most this many frames per second")
+    parser.add_argument("--fps", type=float, help="Frame folders: frame rate used for timestamps")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Analyzed frames per forward pass")
+    parser.add_argument("--hash-threshold", type=int, default=HASH_THRESHOLD,
+                        help="Skip frames within this many dHash bits of the last analyzed one (-1 = none)")
+    parser.add_argument("--max-skip", type=int, default=MAX_SKIP, help="Analyze at least one frame in this many")
+    parser.add_argument("--backend", type=str, help="Model backend (see predict.py)")
+    parser.add_argument("--output", type=str, help="JSON-lines output file (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    failed = False
+    try:
+        frames = open_source(args.source, sample_fps=args.sample_fps, fps=args.fps)
+        for line in analyze_stream(frames, args.crop, args.batch_size, args.hash_threshold,
+                                   args.max_skip, args.backend):
+            failed = failed or "error" in line
+            out.write(json.dumps(line) + "\n")
+            out.flush()
+            if "summary" in line:
+                summary = line["summary"]
+                print(f"🎞️ {summary['frames']} frames: {summary['analyzed']} analyzed, "
+                      f"{summary['skipped']} skipped, {summary['segments']} segments, "
+                      f"{summary['fps']} fps", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if failed:
+        sys.exit(1)